@@ -0,0 +1,235 @@
+# admission.py
+"""
+Admission control for tool calls.
+
+A tool call needs a slot before it runs:
+
+- at most `max_concurrent` calls run at once in total, and at most
+  tool_limits[tool] (default `default_tool_limit`) calls of one tool
+- calls that cannot start right away wait in one bounded queue
+  (`max_queue` entries, `queue_timeout` seconds each); a freed slot goes to
+  the waiter with the lowest priority number whose tool is under its limit,
+  in arrival order within a priority
+- exempt tools (health and diagnostics) never wait and take no slot
+
+In degrade mode, server.py answers a call of a snapshot-backed tool
+(`degradable`) that cannot start right away from retained snapshots instead
+of queuing it: while STALE_READ is set, dataset loads in app.py return the
+cached or last retained snapshot (marked degraded/stale) and never call an
+upstream. Calls whose data was never fetched still queue. Other tools (app
+lookups, exports) reach upstreams or the disk outside dataset loads, so they
+always queue for a slot.
+
+A call that finds the queue full or waits longer than `queue_timeout`
+fails with Overloaded.
+"""
+import asyncio
+import heapq
+import itertools
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+# Tools that fan out to every dataset or region.
+DEFAULT_TOOL_LIMITS = {
+    "get_all_trending_games": 2,
+    "get_all_trending_changes": 2,
+    "get_multi_region_data": 2,
+    "get_trending_sections": 2,
+    "export_snapshots": 1,
+}
+# Lower runs first; single-dataset tools go before the fan-out ones.
+DEFAULT_PRIORITIES = {
+    "get_all_trending_games": 1,
+    "get_all_trending_changes": 1,
+    "get_multi_region_data": 1,
+    "get_trending_sections": 1,
+    "export_snapshots": 2,
+}
+DEFAULT_EXEMPT_TOOLS = ("get_api_health", "get_memory_profile", "cpu_profile")
+# Tools whose upstream work all goes through dataset loads, so a STALE_READ
+# run of them does no upstream or disk work.
+DEFAULT_DEGRADABLE_TOOLS = (
+    "get_steam_trending_games",
+    "get_steam_top_sellers",
+    "get_steam_most_played",
+    "get_epic_free_games",
+    "get_epic_trending_games",
+    "get_all_trending_games",
+    "get_trending_sections",
+    "get_multi_region_data",
+    "get_dataset_changes",
+    "get_all_trending_changes",
+    "get_trending_movers",
+)
+
+
+class Overloaded(Exception):
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class StaleRead:
+    """Dataset keys a degrade-mode call was answered from, and the ones it had no snapshot for."""
+
+    def __init__(self):
+        self.served: List[str] = []
+        self.missing: List[str] = []
+
+
+STALE_READ: ContextVar[Optional[StaleRead]] = ContextVar("stale_read", default=None)
+
+
+def parse_limits(spec: Optional[str]) -> Dict[str, int]:
+    """'get_all_trending_games=1,export_snapshots=0' -> {"get_all_trending_games": 1, ...}"""
+    limits = {}
+    for part in (spec or "").split(","):
+        name, _, value = part.partition("=")
+        if name.strip() and value.strip():
+            limits[name.strip()] = int(value)
+    return limits
+
+
+class AdmissionController:
+    def __init__(
+        self,
+        max_concurrent: int = 8,
+        default_tool_limit: int = 4,
+        tool_limits: Optional[Dict[str, int]] = None,
+        priorities: Optional[Dict[str, int]] = None,
+        exempt: Iterable[str] = DEFAULT_EXEMPT_TOOLS,
+        max_queue: int = 32,
+        queue_timeout: float = 10.0,
+        degrade: bool = True,
+        degradable: Iterable[str] = DEFAULT_DEGRADABLE_TOOLS,
+    ):
+        self.max_concurrent = max_concurrent
+        self.default_tool_limit = default_tool_limit
+        self.tool_limits = {**DEFAULT_TOOL_LIMITS, **(tool_limits or {})}
+        self.priorities = {**DEFAULT_PRIORITIES, **(priorities or {})}
+        self.exempt = frozenset(exempt)
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.degrade = degrade
+        self.degradable = frozenset(degradable)
+        self.running = 0
+        self.waiting = 0
+        self.active: Dict[str, int] = {}
+        # (priority, arrival, tool, future); futures of timed-out waiters stay
+        # in the heap until _dispatch() pops them.
+        self._waiters: List[Tuple[int, int, str, asyncio.Future]] = []
+        self._arrivals = itertools.count()
+        self.counters: Dict[str, Dict[str, int]] = {}
+
+    def is_exempt(self, tool: str) -> bool:
+        return tool in self.exempt
+
+    def can_degrade(self, tool: str) -> bool:
+        """True if a saturated call of `tool` may be answered from retained snapshots."""
+        return self.degrade and tool in self.degradable
+
+    def limit(self, tool: str) -> int:
+        return self.tool_limits.get(tool, self.default_tool_limit)
+
+    def _count(self, tool: str, counter: str) -> None:
+        counts = self.counters.setdefault(
+            tool, {"admitted": 0, "queued": 0, "degraded": 0, "rejected": 0, "timedOut": 0}
+        )
+        counts[counter] += 1
+
+    def _has_capacity(self, tool: str) -> bool:
+        return self.running < self.max_concurrent and self.active.get(tool, 0) < self.limit(tool)
+
+    def saturated(self, tool: str) -> bool:
+        """True if a call of `tool` would have to queue."""
+        # Waiters left in the queue are blocked by their own tool limit, so
+        # they do not hold back a tool that still has capacity.
+        return not self._has_capacity(tool)
+
+    def record_degraded(self, tool: str) -> None:
+        self._count(tool, "degraded")
+
+    def _take(self, tool: str) -> None:
+        self.running += 1
+        self.active[tool] = self.active.get(tool, 0) + 1
+        self._count(tool, "admitted")
+
+    def _release(self, tool: str) -> None:
+        self.running -= 1
+        self.active[tool] -= 1
+        self._dispatch()
+
+    def _dispatch(self) -> None:
+        blocked = []
+        while self._waiters and self.running < self.max_concurrent:
+            entry = heapq.heappop(self._waiters)
+            _, _, tool, future = entry
+            if future.done():
+                continue  # timed out or cancelled
+            if self.active.get(tool, 0) >= self.limit(tool):
+                blocked.append(entry)
+                continue
+            self._take(tool)
+            future.set_result(None)
+        for entry in blocked:
+            heapq.heappush(self._waiters, entry)
+
+    async def _acquire(self, tool: str) -> None:
+        if self._has_capacity(tool):
+            self._take(tool)
+            return
+        if self.waiting >= self.max_queue:
+            self._count(tool, "rejected")
+            raise Overloaded(
+                f"Server is saturated: {self.waiting} calls already queued", self.queue_timeout
+            )
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(
+            self._waiters, (self.priorities.get(tool, 0), next(self._arrivals), tool, future)
+        )
+        self.waiting += 1
+        self._count(tool, "queued")
+        try:
+            await asyncio.wait_for(future, self.queue_timeout)
+        except asyncio.TimeoutError:
+            self._count(tool, "timedOut")
+            raise Overloaded(
+                f"No slot for {tool} became free within {self.queue_timeout:g}s", self.queue_timeout
+            ) from None
+        except BaseException:
+            # Cancelled after the slot was granted: hand it on.
+            if future.done() and not future.cancelled():
+                self._release(tool)
+            raise
+        finally:
+            self.waiting -= 1
+
+    @asynccontextmanager
+    async def slot(self, tool: str):
+        await self._acquire(tool)
+        try:
+            yield
+        finally:
+            self._release(tool)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "running": self.running,
+            "waiting": self.waiting,
+            "maxConcurrent": self.max_concurrent,
+            "maxQueue": self.max_queue,
+            "queueTimeoutSeconds": self.queue_timeout,
+            "degradeMode": self.degrade,
+            "tools": {
+                tool: {
+                    "active": self.active.get(tool, 0),
+                    "limit": self.limit(tool),
+                    "priority": self.priorities.get(tool, 0),
+                    **counts,
+                }
+                for tool, counts in self.counters.items()
+            },
+            "checkedAt": datetime.now().isoformat(),
+        }
@@ -1,49 +1,547 @@
 import asyncio
 import aiohttp
 import json
+import os
 import random
 import time
 import re
 import ssl
+from contextlib import aclosing, asynccontextmanager
 from datetime import datetime
-from typing import List, Dict, Optional, Any
-from bs4 import BeautifulSoup
+from itertools import islice
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, List, Optional, Tuple
+from urllib.parse import urlparse
+
+from admission import STALE_READ, StaleRead
+from cache import AppInfoCache, SnapshotCache
+from cache_backends import create_cache_backend
+from checkpoint import CheckpointStore
+from deltas import SnapshotHistory
+from export import EXPORT_FORMATS, SnapshotExporter
+from fusion import DEFAULT_K, RankFusion, parse_weights
+from pipeline import head, merge, take_unique, unique_records
+from prices import PriceHistory, annotate_prices
+from promotions import PromotionCalendar, expiry_ttl, parse_time
+from health import HealthMonitor
+from quotas import CURRENT_CLIENT, FairSemaphore
+from startup import STARTUP
+from trends import TRACKED_DATASETS, TrendEngine
+from tracing import SPAN_KIND_CLIENT, TRACER, traced
+from streaming import StreamingHTMLParser, find_first, has_ancestor, has_class, text_of
+
+# --- HTML parsing ---
+# bs4 and lxml are imported on the first parse rather than with this module,
+# so importing app (and creating GameAnalyticsApp) stays cheap.
+_BeautifulSoup = None
+
+
+def parse_html(markup: str):
+    global _BeautifulSoup
+    if _BeautifulSoup is None:
+        with STARTUP.phase("import bs4+lxml (first parse)"):
+            from bs4 import BeautifulSoup
+            import lxml.etree  # noqa: F401  (the "lxml" tree builder)
+        _BeautifulSoup = BeautifulSoup
+    with TRACER.span("parse.html", **{"parse.input_size": len(markup)}):
+        return _BeautifulSoup(markup, "lxml")
+
+
+def release_tree(soup) -> None:
+    """
+    Frees a parse tree as soon as its records are extracted. BeautifulSoup
+    trees are reference cycles, so without this they live until the cyclic
+    GC runs, and concurrent calls pile them up.
+    """
+    if soup is not None:
+        soup.decompose()
+
+
+# --- Upstream body size caps ---
+# Bytes read per response, by host. HTML is cut off at the cap (parsers only
+# need the top of a page); JSON over the cap is rejected, since a truncated
+# document cannot be decoded.
+MAX_BODY_BYTES = {
+    "store.steampowered.com": 3 * 1024 * 1024,
+    "steamcharts.com": 1024 * 1024,
+    "store-site-backend-static.ak.epicgames.com": 2 * 1024 * 1024,
+    "store.epicgames.com": 3 * 1024 * 1024,
+}
+DEFAULT_MAX_BODY_BYTES = 4 * 1024 * 1024
+
+
+class ResponseTooLarge(Exception):
+    pass
+
+
+def raise_for_status(response: aiohttp.ClientResponse) -> None:
+    TRACER.current_span().set_attributes(
+        {"http.request.method": response.method, "http.response.status_code": response.status}
+    )
+    response.raise_for_status()
+
+
+async def read_capped(
+    response: aiohttp.ClientResponse, url: str, truncate: bool = True
+) -> bytes:
+    limit = MAX_BODY_BYTES.get(urlparse(url).netloc, DEFAULT_MAX_BODY_BYTES)
+    if not truncate and (response.content_length or 0) > limit:
+        raise ResponseTooLarge(f"{url}: {response.content_length} bytes exceeds {limit}")
+    chunks = []
+    size = 0
+    async for chunk in response.content.iter_chunked(64 * 1024):
+        chunks.append(chunk)
+        size += len(chunk)
+        if size >= limit:
+            if not truncate:
+                raise ResponseTooLarge(f"{url}: body exceeds {limit} bytes")
+            print(f"[{datetime.now()}] Body of {url} cut off at {limit} bytes")
+            response.close()
+            break
+    body = b"".join(chunks)[:limit]
+    TRACER.current_span().set_attributes(
+        {"http.response.body.size": len(body), "http.response.truncated": size >= limit}
+    )
+    return body
+
+
+async def read_text_capped(response: aiohttp.ClientResponse, url: str) -> str:
+    body = await read_capped(response, url, truncate=True)
+    return body.decode(response.charset or "utf-8", errors="replace")
+
+# --- Region handling ---
+DEFAULT_REGION = "US"
+
+# Country code -> default store locale. Unknown countries fall back to en-US.
+REGION_LOCALES = {
+    "US": "en-US",
+    "GB": "en-GB",
+    "CA": "en-CA",
+    "AU": "en-AU",
+    "DE": "de-DE",
+    "FR": "fr-FR",
+    "ES": "es-ES",
+    "IT": "it-IT",
+    "PL": "pl-PL",
+    "TR": "tr-TR",
+    "BR": "pt-BR",
+    "JP": "ja-JP",
+    "KR": "ko-KR",
+    "CN": "zh-CN",
+    "RU": "ru-RU",
+}
+
+# Locale language prefix -> Steam "l=" parameter.
+STEAM_LANGUAGES = {
+    "en": "english",
+    "de": "german",
+    "fr": "french",
+    "es": "spanish",
+    "it": "italian",
+    "pl": "polish",
+    "tr": "turkish",
+    "pt": "brazilian",
+    "ja": "japanese",
+    "ko": "koreana",
+    "zh": "schinese",
+    "ru": "russian",
+}
+
+
+def resolve_region(
+    region: Optional[str] = None, locale: Optional[str] = None
+) -> Dict[str, str]:
+    """Normalizes a region/locale pair into the parameters each store expects."""
+    cc = (region or DEFAULT_REGION).strip().upper()
+    if len(cc) != 2 or not cc.isalpha():
+        raise ValueError(f"Invalid region code: {region!r} (expected ISO 3166 alpha-2)")
+    locale = (locale or REGION_LOCALES.get(cc, "en-US")).strip()
+    if not re.fullmatch(r"[a-zA-Z]{2}(-[a-zA-Z]{2})?", locale):
+        raise ValueError(f"Invalid locale: {locale!r} (expected e.g. 'en-US')")
+    return {
+        "cc": cc,
+        "locale": locale,
+        "steam_language": STEAM_LANGUAGES.get(locale[:2].lower(), "english"),
+        "accept_language": f"{locale},{locale[:2]};q=0.9,en;q=0.8",
+    }
+
+
+# --- Per-host rate limiting ---
+class HostRateLimiter:
+    """
+    Spaces requests to the same host by a minimum interval and bounds how many
+    requests to a host may be in flight at once. Shared by all services so
+    concurrent fetches (e.g. several regions) still respect upstream limits.
+    Waiting requests get slots by weighted fair queuing across the clients
+    they are made for (quotas.CURRENT_CLIENT), not in arrival order.
+    """
+
+    def __init__(
+        self,
+        default_interval: float = 1.5,
+        max_concurrency: int = 4,
+        host_intervals: Optional[Dict[str, float]] = None,
+        client_weights: Optional[Dict[str, float]] = None,
+    ):
+        self.default_interval = default_interval
+        self.max_concurrency = max_concurrency
+        self.host_intervals = host_intervals or {}
+        self.client_weights = client_weights or {}
+        self._last_request: Dict[str, float] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self._semaphores: Dict[str, FairSemaphore] = {}
+        # Per host: requests waiting for a slot and requests holding one.
+        self.waiting: Dict[str, int] = {}
+        self.in_flight: Dict[str, int] = {}
+
+    def _interval_for(self, host: str) -> float:
+        return self.host_intervals.get(host, self.default_interval)
+
+    def _client_weight(self, client: str) -> float:
+        return self.client_weights.get(client, 1.0)
+
+    @asynccontextmanager
+    async def slot(self, url: str):
+        # Every upstream request runs inside one slot, so the request's span
+        # starts here and includes the time spent waiting for the slot.
+        host = urlparse(url).netloc
+        client = CURRENT_CLIENT.get()
+        semaphore = self._semaphores.get(host)
+        if semaphore is None:
+            semaphore = self._semaphores[host] = FairSemaphore(
+                self.max_concurrency, self._client_weight
+            )
+        lock = self._locks.setdefault(host, asyncio.Lock())
+        with TRACER.span(
+            "http.fetch", kind=SPAN_KIND_CLIENT, **{"url.full": url, "server.address": host}
+        ):
+            with TRACER.span(
+                "rate_limiter.wait", **{"server.address": host, "client.id": client}
+            ) as wait_span:
+                self.waiting[host] = self.waiting.get(host, 0) + 1
+                try:
+                    await semaphore.acquire(client)
+                    try:
+                        async with lock:
+                            wait = self._interval_for(host) - (
+                                time.time() - self._last_request.get(host, 0)
+                            )
+                            if wait > 0:
+                                wait_span.set_attribute("rate_limiter.sleep_ms", round(wait * 1000, 1))
+                                await asyncio.sleep(wait)
+                            self._last_request[host] = time.time()
+                    except BaseException:
+                        semaphore.release()
+                        raise
+                finally:
+                    self.waiting[host] -= 1
+            self.in_flight[host] = self.in_flight.get(host, 0) + 1
+            try:
+                yield
+            finally:
+                self.in_flight[host] -= 1
+                semaphore.release()
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        return {
+            host: {
+                "waiting": self.waiting.get(host, 0),
+                "inFlight": self.in_flight.get(host, 0),
+                "waitingByClient": dict(self._semaphores[host].waiting_by_client)
+                if host in self._semaphores
+                else {},
+            }
+            for host in sorted(set(self.waiting) | set(self.in_flight))
+        }
+
+
+# Redirects all upstream requests to a local simulator (benchmarks/upstream_sim.py):
+# https://<host>/<path> becomes <UPSTREAM_SIMULATOR_URL>/<host>/<path>. Rate
+# limiting still keys on the original host.
+UPSTREAM_SIMULATOR_URL = os.getenv("UPSTREAM_SIMULATOR_URL")
+
+
+def upstream_url(url: str) -> str:
+    if not UPSTREAM_SIMULATOR_URL:
+        return url
+    parsed = urlparse(url)
+    target = url.split(parsed.netloc, 1)[1]
+    return f"{UPSTREAM_SIMULATOR_URL.rstrip('/')}/{parsed.netloc}{target}"
+
+
+# --- Streaming extractors (lxml elements, see streaming.py) ---
+STREAM_CHUNK_BYTES = 16 * 1024
+
+FEATURED_CAPSULE_CLASSES = (
+    "featuredcapsule",
+    "main_cluster_capsule",
+    "home_area_spotlight",
+    "discovery_queue_spotlight",
+)
+
+
+def _is_featured_capsule(element) -> bool:
+    if has_class(element, *FEATURED_CAPSULE_CLASSES):
+        return True
+    return has_class(element, "store_capsule") and has_ancestor(
+        element, lambda parent: has_class(parent, "carousel_items")
+    )
+
+
+def _featured_game_record(item) -> Optional[Dict[str, Any]]:
+    link = find_first(item, lambda e: e.tag == "a" and e.get("href"))
+    if link is None:
+        return None
+
+    href = link.get("href")
+    app_id_match = re.search(r"/app/(\d+)/", href)
+    app_id = None
+    if app_id_match:
+        app_id = app_id_match.group(1)
+    else:
+        data_appid = item.get("data-ds-appid") or item.get("data-ds-bundleid")
+        if data_appid and data_appid.isdigit():
+            app_id = data_appid
+        else: # Try to get from URL if it's a bundle or sub
+            id_match_alt = re.search(r'/(bundle|sub)/(\d+)', href)
+            if id_match_alt:
+                app_id = f"{id_match_alt.group(1)}_{id_match_alt.group(2)}"
+    if not app_id:
+        return None
+
+    title_elem = find_first(
+        item,
+        lambda e: has_class(
+            e, "store_capsule_name", "featuredcapsule_title", "focus_title",
+            "home_area_spotlight_name", "dq_title",
+        ),
+    )
+    name = text_of(title_elem) or None
+    if not name:
+        img = find_first(item, lambda e: e.tag == "img" and e.get("alt") is not None)
+        if img is not None:
+            name = img.get("alt").strip()
+
+    price_elem = find_first(
+        item,
+        lambda e: has_class(e, "discount_final_price", "focus_price", "home_area_spotlight_price")
+        or (
+            has_class(e, "price")
+            and has_ancestor(e, lambda parent: has_class(parent, "store_capsule_price"))
+        ),
+    )
+    price = text_of(price_elem) if price_elem is not None else "N/A"
+
+    discount_elem = find_first(item, lambda e: has_class(e, "discount_pct", "discount_percent"))
+    discount = 0
+    if discount_elem is not None:
+        try:
+            discount = int(text_of(discount_elem).replace("-", "").replace("%", ""))
+        except ValueError:
+            discount = 0
+
+    img_elem = find_first(item, lambda e: e.tag == "img" and e.get("src"))
+    image = img_elem.get("src") if img_elem is not None else None
+
+    if not name:
+        return None
+    return {
+        "id": app_id,
+        "name": name,
+        "price": price,
+        "discount": discount,
+        "headerImage": image,
+        "platform": "Steam",
+        "category": "Featured",
+        "isTrending": True,
+        "source": "featured_home",
+        "url": href
+    }
+
+
+def _is_top_games_row(element) -> bool:
+    # SteamCharts' "#top-games tbody tr"
+    if element.tag != "tr":
+        return False
+    parent = element.getparent()
+    return (
+        parent is not None
+        and parent.tag == "tbody"
+        and has_ancestor(parent, lambda p: p.tag == "table" and p.get("id") == "top-games")
+    )
+
+
+def _steamcharts_game(row, min_cells: int) -> Optional[Dict[str, Any]]:
+    cells = list(row.iterdescendants("td"))
+    if len(cells) < min_cells:
+        return None
+    name_link = find_first(cells[1], lambda e: e.tag == "a" and e.get("href"))
+    name = text_of(name_link) if name_link is not None else text_of(cells[1])
+    app_id = None
+    if name_link is not None:
+        match = re.search(r"/app/(\d+)", name_link.get("href"))
+        if match: app_id = match.group(1)
+    if not app_id: app_id = f"chart_{name.replace(' ', '_').lower()}"
+    return {
+        "cells": [text_of(cell) for cell in cells],
+        "id": app_id,
+        "name": name,
+        "url": name_link.get("href") if name_link is not None else None,
+    }
+
+
+def _steamcharts_popular_record(row) -> Optional[Dict[str, Any]]:
+    game = _steamcharts_game(row, min_cells=3)
+    if game is None:
+        return None
+    current_players = int(game["cells"][2].replace(",", ""))
+    if game["name"].lower() == "game" or current_players <= 0:
+        return None
+    return {
+        "id": game["id"],
+        "name": game["name"],
+        "currentPlayers": current_players,
+        "platform": "Steam",
+        "category": "Popular (SteamCharts)",
+        "isTrending": True,
+        "source": "steamcharts_top",
+        "url": game["url"]
+    }
+
+
+def _steamcharts_live_record(row) -> Optional[Dict[str, Any]]:
+    game = _steamcharts_game(row, min_cells=4)
+    if game is None:
+        return None
+    cells = game["cells"]
+    rank = int(cells[0])
+    current_players = int(cells[2].replace(",", ""))
+    peak_players = int(cells[3].replace(",", ""))
+    change_24h = cells[4] if len(cells) > 4 and cells[4] != "-" else None
+    if game["name"].lower() == "game" or current_players <= 0:
+        return None
+    return {
+        "id": game["id"],
+        "name": game["name"],
+        "currentPlayers": current_players,
+        "peakPlayers": peak_players,
+        "change24h": change_24h,
+        "rank": rank,
+        "platform": "Steam",
+        "isPopular": True,
+        "source": "steamcharts_live",
+        "lastUpdated": datetime.now().isoformat(),
+        "url": game["url"]
+    }
+
+
+def _is_player_count_row(element) -> bool:
+    return has_class(element, "player_count_row")
+
+
+def _steam_stats_game(row, id_prefix: str) -> Optional[Dict[str, Any]]:
+    name_link = find_first(row, lambda e: e.tag == "a" and has_class(e, "gameLink"))
+    if name_link is None:
+        return None
+    name = text_of(name_link)
+    app_id = None
+    match = re.search(r"/app/(\d+)", name_link.get("href") or "")
+    if match: app_id = match.group(1)
+    if not app_id: app_id = f"{id_prefix}_{name.replace(' ', '_').lower()}"
+    current_players_cell = find_first(row, lambda e: has_class(e, "currentServers"))
+    current_players = (
+        int(text_of(current_players_cell).replace(",", ""))
+        if current_players_cell is not None
+        else 0
+    )
+    if not name or current_players <= 0:
+        return None
+    return {
+        "id": app_id,
+        "name": name,
+        "currentPlayers": current_players,
+        "url": name_link.get("href"),
+    }
+
+
+def _steam_global_stats_record(row) -> Optional[Dict[str, Any]]:
+    game = _steam_stats_game(row, "stats")
+    if game is None:
+        return None
+    return {
+        "id": game["id"],
+        "name": game["name"],
+        "currentPlayers": game["currentPlayers"],
+        "platform": "Steam",
+        "category": "Popular (Global Stats)",
+        "isTrending": True,
+        "source": "steam_global_stats_page",
+        "url": game["url"]
+    }
+
+
+def _steam_stats_alternative_record(row) -> Optional[Dict[str, Any]]:
+    # "rank" is assigned by the caller from the position among kept rows.
+    game = _steam_stats_game(row, "stats_alt")
+    if game is None:
+        return None
+    return {
+        "id": game["id"],
+        "name": game["name"],
+        "currentPlayers": game["currentPlayers"],
+        "platform": "Steam",
+        "isPopular": True,
+        "source": "steam_stats_page_alt",
+        "lastUpdated": datetime.now().isoformat(),
+        "url": game["url"]
+    }
+
 
 # --- SteamService class ---
+TRENDING_LIMIT = 25
+DEFAULT_TRENDING_WEIGHTS = {
+    "featured_home": 1.0,
+    "new_trending_api": 1.0,
+    "popular_new_releases_api": 0.8,
+    "steamcharts_top": 0.5,
+    "steam_global_stats_page": 0.5,
+}
+
+
 class SteamService:
-    def __init__(self):
+    def __init__(self, rate_limiter: Optional[HostRateLimiter] = None):
         self.base_url = "https://api.steampowered.com"
         self.store_url = "https://store.steampowered.com"
-        self.last_request = 0
         self.request_delay = 1.5  # Rate limiting
+        self.rate_limiter = rate_limiter or HostRateLimiter(
+            default_interval=self.request_delay
+        )
         self.user_agents = [
             "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
             "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/119.0.0.0 Safari/537.36",
             "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
             "Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:120.0) Gecko/20100101 Firefox/120.0",
         ]
+        # Bytes read and early stops per streamed source (see stream_records).
+        self.stream_stats: Dict[str, Dict[str, int]] = {}
+        # Rank-fusion weights for get_trending_games; STEAM_TRENDING_WEIGHTS
+        # ("source=weight,...") overrides them and weight 0 skips a source.
+        self.trending_weights = {
+            **DEFAULT_TRENDING_WEIGHTS,
+            **parse_weights(os.getenv("STEAM_TRENDING_WEIGHTS")),
+        }
+        self.trending_fusion_k = int(os.getenv("STEAM_TRENDING_FUSION_K", str(DEFAULT_K)))
         print(f"[{datetime.now()}] SteamService initialized.")
 
     def get_random_user_agent(self) -> str:
         return random.choice(self.user_agents)
 
-    async def make_request(
-        self, url: str, session: aiohttp.ClientSession, is_json: bool = False
-    ) -> Any:
-        now = time.time()
-        time_since_last = now - self.last_request
-
-        if time_since_last < self.request_delay:
-            await asyncio.sleep(self.request_delay - time_since_last)
-
-        self.last_request = time.time()
-
+    def _request_headers(self, is_json: bool, accept_language: str) -> Dict[str, str]:
         headers = {
             "User-Agent": self.get_random_user_agent(),
             "Accept": "application/json, text/plain, */*"
             if is_json
             else "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8",
-            "Accept-Language": "en-US,en;q=0.9",
+            "Accept-Language": accept_language,
             "Accept-Encoding": "gzip, deflate, br",
             "DNT": "1",
             "Connection": "keep-alive",
@@ -52,237 +550,263 @@ class SteamService:
 
         if is_json:
             headers["X-Requested-With"] = "XMLHttpRequest"
+        return headers
+
+    async def make_request(
+        self,
+        url: str,
+        session: aiohttp.ClientSession,
+        is_json: bool = False,
+        accept_language: str = "en-US,en;q=0.9",
+    ) -> Any:
+        headers = self._request_headers(is_json, accept_language)
 
         # print(f"[{datetime.now()}] Making request to: {url}")
-        async with session.get(url, headers=headers, timeout=20) as response:
-            response.raise_for_status()  # Raise an exception for HTTP errors
-            if is_json:
-                return await response.json()
-            return await response.text()
+        async with self.rate_limiter.slot(url):
+            async with session.get(upstream_url(url), headers=headers, timeout=20) as response:
+                raise_for_status(response)  # Raise an exception for HTTP errors
+                if is_json:
+                    return json.loads(await read_capped(response, url, truncate=False))
+                return await read_text_capped(response, url)
+
+    async def iter_records(
+        self,
+        url: str,
+        session: aiohttp.ClientSession,
+        match: Callable[[Any], bool],
+        extract: Callable[[Any], Optional[Dict[str, Any]]],
+        limit: int,
+        source: str,
+        accept_language: str = "en-US,en;q=0.9",
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Fetches an HTML page and parses it while it downloads, yielding
+        extract() of each element accepted by match() as soon as its end tag
+        arrives. Reading stops, dropping the connection, once `limit`
+        elements have been seen, the host's body cap is reached or the
+        consumer closes the generator.
+        """
+        seen = 0
+        rows = 0
+        bytes_read = 0
+        complete = False
+        cap = MAX_BODY_BYTES.get(urlparse(url).netloc, DEFAULT_MAX_BODY_BYTES)
+
+        def take(elements):
+            nonlocal seen, rows
+            for element in elements:
+                if seen >= limit:
+                    return
+                seen += 1
+                record = self._extract_record(extract, element, source)
+                if record:
+                    rows += 1
+                    yield record
+
+        try:
+            async with self.rate_limiter.slot(url):
+                async with session.get(
+                    upstream_url(url),
+                    headers=self._request_headers(False, accept_language),
+                    timeout=20,
+                ) as response:
+                    try:
+                        raise_for_status(response)
+                        parser = StreamingHTMLParser(match, encoding=response.charset)
+                        async for chunk in response.content.iter_chunked(STREAM_CHUNK_BYTES):
+                            bytes_read += len(chunk)
+                            for record in take(parser.feed(chunk)):
+                                yield record
+                            if seen >= limit or bytes_read >= cap:
+                                break
+                        else:
+                            complete = True
+                            for record in take(parser.close()):
+                                yield record
+                    finally:
+                        if not complete:
+                            response.close()
+                        TRACER.current_span().set_attributes(
+                            {
+                                "http.response.body.size": bytes_read,
+                                "stream.stopped_early": not complete,
+                                "stream.elements": seen,
+                                "rows": rows,
+                            }
+                        )
+        finally:
+            stats = self.stream_stats.setdefault(
+                source, {"requests": 0, "bytesRead": 0, "earlyStops": 0}
+            )
+            stats["requests"] += 1
+            stats["bytesRead"] += bytes_read
+            stats["earlyStops"] += int(not complete and bytes_read > 0)
+
+    @staticmethod
+    def _extract_record(
+        extract: Callable[[Any], Optional[Dict[str, Any]]], element: Any, source: str
+    ) -> Optional[Dict[str, Any]]:
+        try:
+            return extract(element)
+        except Exception as e:
+            print(f"[{datetime.now()}] SteamService: Error parsing {source} entry: {e}")
+            return None
+
+    async def stream_records(self, *args, **kwargs) -> List[Dict[str, Any]]:
+        """iter_records() collected into a list (same arguments)."""
+        async with aclosing(self.iter_records(*args, **kwargs)) as records:
+            return [record async for record in records]
+
+    def _search_url(self, filter_params: str, spec: Dict[str, str]) -> str:
+        # Steam search results are priced in the currency of the "cc" country.
+        return (
+            f"{self.store_url}/search/results/?query&start=0&dynamic_data=&supportedlang=english"
+            f"&infinite=1&{filter_params}&cc={spec['cc']}&l={spec['steam_language']}"
+        )
 
-    async def get_trending_games(self) -> List[Dict[str, Any]]:
+    @traced("steam.get_trending_games")
+    async def get_trending_games(
+        self,
+        region: str = DEFAULT_REGION,
+        locale: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
+        spec = resolve_region(region, locale)
         # SSL doğrulamasını devre dışı bırak
         ssl_context = ssl.create_default_context()
         ssl_context.check_hostname = False
         ssl_context.verify_mode = ssl.CERT_NONE
-        
-        connector = aiohttp.TCPConnector(ssl=ssl_context)
-        async with aiohttp.ClientSession(connector=connector) as session:
-            games = []
-            sources_attempted = []
 
-            try:
-                sources_attempted.append("featured_home")
-                featured_games = await self._get_featured_games(session)
-                games.extend(featured_games)
-            except Exception as e:
-                print(
-                    f"[{datetime.now()}] SteamService: Featured games error: {e}"
-                )
-
-            try:
-                sources_attempted.append("new_trending_api")
-                trending_games = await self._get_new_trending_games(session)
-                games.extend(trending_games)
-            except Exception as e:
-                print(
-                    f"[{datetime.now()}] SteamService: New trending games error: {e}"
-                )
-
-            try:
-                sources_attempted.append("popular_new_releases_api")
-                new_releases = await self._get_popular_new_releases(session)
-                games.extend(new_releases)
-            except Exception as e:
-                print(
-                    f"[{datetime.now()}] SteamService: New releases error: {e}"
-                )
+        primary = {
+            "featured_home": lambda session: self._iter_featured_games(session, spec),
+            "new_trending_api": lambda session: self._iter_new_trending_games(session, spec),
+            "popular_new_releases_api": lambda session: self._iter_popular_new_releases(session, spec),
+        }
+        # Tried in order, only while the fused list is still sparse: (source, min games, records).
+        fallbacks = [
+            ("steamcharts_top", 5, self._iter_steam_charts_popular),
+            ("steam_global_stats_page", 3, self._iter_steam_global_stats),
+        ]
+        fusion = RankFusion(self.trending_weights, k=self.trending_fusion_k)
+        sources_attempted = []
 
-            if len(games) < 5: # Try more sources if initial results are sparse
-                try:
-                    sources_attempted.append("steamcharts_top")
-                    popular_games = await self._get_steam_charts_popular(
-                        session
-                    )
-                    games.extend(popular_games)
-                except Exception as e:
-                    print(
-                        f"[{datetime.now()}] SteamService: Steam charts popular error: {e}"
-                    )
+        connector = aiohttp.TCPConnector(ssl=ssl_context)
+        async with aiohttp.ClientSession(connector=connector) as session:
+            # Weight 0 turns a source off. The rest stream concurrently into the
+            # fusion record by record (so the ranking is valid at every step),
+            # each closed after TRENDING_LIMIT records.
+            sources = {
+                name: head(records(session), TRENDING_LIMIT)
+                for name, records in primary.items()
+                if fusion.weight(name) > 0
+            }
+            sources_attempted.extend(sources)
+            async with aclosing(merge(sources)) as merged:
+                async for name, record in merged:
+                    fusion.add_record(name, record)
 
-            if len(games) < 3: # One last attempt if still very few games
+            for name, min_games, records in fallbacks:
+                if len(fusion) >= min_games or fusion.weight(name) <= 0:
+                    continue
+                sources_attempted.append(name)
                 try:
-                    sources_attempted.append("steam_global_stats_page")
-                    stats_games = await self._get_steam_global_stats(session)
-                    games.extend(stats_games)
+                    fusion.add(name, await take_unique(records(session), TRENDING_LIMIT))
                 except Exception as e:
-                    print(
-                        f"[{datetime.now()}] SteamService: Steam global stats error: {e}"
-                    )
-
-            seen_ids = set()
-            unique_games = []
-            for game in games:
-                game_id = game.get("id")
-                # Ensure game_id is a string for the set
-                if game_id and str(game_id) not in seen_ids and len(unique_games) < 25 :
-                    seen_ids.add(str(game_id))
-                    unique_games.append(game)
-
-            if not unique_games:
-                print(
-                    f"[{datetime.now()}] SteamService: No trending games data could be retrieved from any source. Sources attempted: {sources_attempted}"
-                )
-            return unique_games
+                    print(f"[{datetime.now()}] SteamService: {name} error: {e}")
 
-    async def _get_featured_games(
-        self, session: aiohttp.ClientSession
-    ) -> List[Dict[str, Any]]:
-        response_text = await self.make_request(
-            f"{self.store_url}/?l=english&cc=US", session
-        )
-        soup = BeautifulSoup(response_text, "lxml")
-        games = []
-        carousel_items = soup.select(
-            ".carousel_items .store_capsule, .featuredcapsule, .main_cluster_capsule, .home_area_spotlight, .discovery_queue_spotlight"
+        unique_games = fusion.ranked(limit=TRENDING_LIMIT)
+        if not unique_games:
+            print(
+                f"[{datetime.now()}] SteamService: No trending games data could be retrieved from any source. Sources attempted: {sources_attempted}"
+            )
+        return annotate_prices(unique_games, spec["cc"])
+
+    @traced("steam.source.featured_home")
+    async def _iter_featured_games(
+        self, session: aiohttp.ClientSession, spec: Dict[str, str]
+    ) -> AsyncIterator[Dict[str, Any]]:
+        # Only the first 10 capsules are used: parse the page as it streams in
+        # and stop downloading once they have been seen.
+        async with aclosing(
+            self.iter_records(
+                f"{self.store_url}/?l={spec['steam_language']}&cc={spec['cc']}",
+                session,
+                match=_is_featured_capsule,
+                extract=_featured_game_record,
+                limit=10,
+                source="featured_home",
+                accept_language=spec["accept_language"],
+            )
+        ) as records:
+            async for record in records:
+                yield record
+
+    @traced("steam.source.new_trending_api")
+    async def _iter_new_trending_games(
+        self,
+        session: aiohttp.ClientSession,
+        spec: Dict[str, str],
+    ) -> AsyncIterator[Dict[str, Any]]:
+        url = self._search_url(
+            "count=15&sort_by=_ASC&snr=1_7_7_popularnew_7&filter=popularnew", spec
         )
-
-        for item in carousel_items[:10]:
-            try:
-                link = item.find("a", href=True)
-                if not link:
-                    continue
-
-                href = link["href"]
-                app_id_match = re.search(r"/app/(\d+)/", href)
-                app_id = None
-                if app_id_match:
-                    app_id = app_id_match.group(1)
-                else:
-                    data_appid = item.get("data-ds-appid") or item.get(
-                        "data-ds-bundleid"
-                    )
-                    if data_appid and data_appid.isdigit():
-                        app_id = data_appid
-                    else: # Try to get from URL if it's a bundle or sub
-                        id_match_alt = re.search(r'/(bundle|sub)/(\d+)', href)
-                        if id_match_alt:
-                            app_id = f"{id_match_alt.group(1)}_{id_match_alt.group(2)}"
-
-
-                if not app_id:
-                    continue
-
-                title_elem = item.select_one(
-                    ".store_capsule_name, .featuredcapsule_title, .focus_title, .home_area_spotlight_name, .dq_title"
-                )
-                name = title_elem.text.strip() if title_elem else None
-
-                if not name:
-                    img = item.find("img", alt=True)
-                    if img:
-                        name = img["alt"].strip()
-
-                price_elem = item.select_one(
-                    ".discount_final_price, .store_capsule_price .price, .focus_price, .home_area_spotlight_price, .dq_price .discount_final_price"
-                )
-                price = price_elem.text.strip() if price_elem else "N/A"
-
-                discount_elem = item.select_one(".discount_pct, .discount_percent")
-                discount = 0
-                if discount_elem:
-                    discount_text = (
-                        discount_elem.text.strip().replace("-", "").replace("%", "")
-                    )
-                    try:
-                        discount = int(discount_text)
-                    except ValueError:
-                        discount = 0
-
-                img_elem = item.find("img", src=True)
-                image = img_elem["src"] if img_elem else None
-
-                if name and app_id:
-                    games.append(
-                        {
-                            "id": app_id,
-                            "name": name,
-                            "price": price,
-                            "discount": discount,
-                            "headerImage": image,
-                            "platform": "Steam",
-                            "category": "Featured",
-                            "isTrending": True,
-                            "source": "featured_home",
-                            "url": href
-                        }
-                    )
-            except Exception as e:
-                print(
-                    f"[{datetime.now()}] SteamService: Error parsing featured game: {e}"
-                )
-                continue
-        return games
-
-    async def _get_new_trending_games(
-        self, session: aiohttp.ClientSession
-    ) -> List[Dict[str, Any]]:
-        url = f"{self.store_url}/search/results/?query&start=0&count=15&dynamic_data=&sort_by=_ASC&supportedlang=english&snr=1_7_7_popularnew_7&filter=popularnew&infinite=1"
         try:
-            data = await self.make_request(url, session, is_json=True)
+            data = await self.make_request(
+                url, session, is_json=True, accept_language=spec["accept_language"]
+            )
         except Exception as e:
             print(
                 f"[{datetime.now()}] SteamService: Failed to fetch new_trending JSON: {e}"
             )
-            return []
+            return
 
         if "results_html" not in data:
             print(
                 f"[{datetime.now()}] SteamService: No results_html in Steam new_trending response"
             )
-            return []
+            return
 
-        soup = BeautifulSoup(data["results_html"], "lxml")
-        games = []
-        for item in soup.select("a.search_result_row"):
-            try:
-                app_id = item.get("data-ds-appid")
-                if not app_id:
-                    continue
+        soup = parse_html(data["results_html"])
+        try:
+            # Rows are extracted one at a time as the consumer pulls them.
+            for item in soup.select("a.search_result_row"):
+                try:
+                    app_id = item.get("data-ds-appid")
+                    if not app_id:
+                        continue
 
-                name = item.select_one(".title").text.strip()
-                price = (
-                    item.select_one(".search_price").text.strip()
-                    if item.select_one(".search_price")
-                    else "N/A"
-                )
-                release_date = (
-                    item.select_one(".search_released").text.strip()
-                    if item.select_one(".search_released")
-                    else "Unknown"
-                )
-                review_score = None
-                review_summary_span = item.select_one(".search_review_summary span")
-                if review_summary_span and 'data-tooltip-html' in review_summary_span.attrs:
-                    tooltip_html = review_summary_span['data-tooltip-html']
-                    match = re.search(r"(\d+)% of the", tooltip_html)
-                    if match:
-                        review_score = f"{match.group(1)}%"
-
-                image = (
-                    item.select_one(".search_capsule img")["src"]
-                    if item.select_one(".search_capsule img")
-                    else None
-                )
-                tags = [
-                    tag.text.strip()
-                    for tag in item.select(".search_tag")
-                    if tag.text.strip()
-                ]
-
-                if name and app_id:
-                    games.append(
-                        {
+                    name = item.select_one(".title").text.strip()
+                    price = (
+                        item.select_one(".search_price").text.strip()
+                        if item.select_one(".search_price")
+                        else "N/A"
+                    )
+                    release_date = (
+                        item.select_one(".search_released").text.strip()
+                        if item.select_one(".search_released")
+                        else "Unknown"
+                    )
+                    review_score = None
+                    review_summary_span = item.select_one(".search_review_summary span")
+                    if review_summary_span and 'data-tooltip-html' in review_summary_span.attrs:
+                        tooltip_html = review_summary_span['data-tooltip-html']
+                        match = re.search(r"(\d+)% of the", tooltip_html)
+                        if match:
+                            review_score = f"{match.group(1)}%"
+
+                    image = (
+                        item.select_one(".search_capsule img")["src"]
+                        if item.select_one(".search_capsule img")
+                        else None
+                    )
+                    tags = [
+                        tag.text.strip()
+                        for tag in item.select(".search_tag")
+                        if tag.text.strip()
+                    ]
+
+                    record = None
+                    if name and app_id:
+                        record = {
                             "id": app_id,
                             "name": name,
                             "price": price,
@@ -296,58 +820,65 @@ class SteamService:
                             "source": "new_trending_api",
                             "url": item.get('href')
                         }
+                except Exception as e:
+                    print(
+                        f"[{datetime.now()}] SteamService: Error parsing new_trending game: {e}"
                     )
-            except Exception as e:
-                print(
-                    f"[{datetime.now()}] SteamService: Error parsing new_trending game: {e}"
-                )
-                continue
-        return games
-
-    async def _get_popular_new_releases(
-        self, session: aiohttp.ClientSession
-    ) -> List[Dict[str, Any]]:
-        url = f"{self.store_url}/search/results/?query&start=0&count=10&dynamic_data=&sort_by=Released_DESC&supportedlang=english&filter=popularnew&infinite=1"
+                    continue
+                if record:
+                    yield record
+        finally:
+            release_tree(soup)
+
+    @traced("steam.source.popular_new_releases_api")
+    async def _iter_popular_new_releases(
+        self,
+        session: aiohttp.ClientSession,
+        spec: Dict[str, str],
+    ) -> AsyncIterator[Dict[str, Any]]:
+        url = self._search_url("count=10&sort_by=Released_DESC&filter=popularnew", spec)
         try:
-            data = await self.make_request(url, session, is_json=True)
+            data = await self.make_request(
+                url, session, is_json=True, accept_language=spec["accept_language"]
+            )
         except Exception as e:
             print(
                 f"[{datetime.now()}] SteamService: Failed to fetch popular_new_releases JSON: {e}"
             )
-            return []
+            return
 
         if "results_html" not in data:
             print(
                 f"[{datetime.now()}] SteamService: No results_html in Steam popular_new_releases response"
             )
-            return []
+            return
 
-        soup = BeautifulSoup(data["results_html"], "lxml")
-        games = []
-        for item in soup.select("a.search_result_row"):
-            try:
-                app_id = item.get("data-ds-appid")
-                if not app_id:
-                    continue
-                name = item.select_one(".title").text.strip()
-                price = (
-                    item.select_one(".search_price").text.strip()
-                    if item.select_one(".search_price")
-                    else "N/A"
-                )
-                release_date = (
-                    item.select_one(".search_released").text.strip()
-                    if item.select_one(".search_released")
-                    else "Unknown"
-                )
-                image = (
-                    item.select_one(".search_capsule img")["src"]
-                    if item.select_one(".search_capsule img")
-                    else None
-                )
-                if name and app_id:
-                    games.append(
-                        {
+        soup = parse_html(data["results_html"])
+        try:
+            for item in soup.select("a.search_result_row"):
+                try:
+                    app_id = item.get("data-ds-appid")
+                    if not app_id:
+                        continue
+                    name = item.select_one(".title").text.strip()
+                    price = (
+                        item.select_one(".search_price").text.strip()
+                        if item.select_one(".search_price")
+                        else "N/A"
+                    )
+                    release_date = (
+                        item.select_one(".search_released").text.strip()
+                        if item.select_one(".search_released")
+                        else "Unknown"
+                    )
+                    image = (
+                        item.select_one(".search_capsule img")["src"]
+                        if item.select_one(".search_capsule img")
+                        else None
+                    )
+                    record = None
+                    if name and app_id:
+                        record = {
                             "id": app_id,
                             "name": name,
                             "price": price,
@@ -359,126 +890,57 @@ class SteamService:
                             "source": "popular_new_releases_api",
                             "url": item.get('href')
                         }
+                except Exception as e:
+                    print(
+                        f"[{datetime.now()}] SteamService: Error parsing popular_new_release: {e}"
                     )
-            except Exception as e:
-                print(
-                    f"[{datetime.now()}] SteamService: Error parsing popular_new_release: {e}"
-                )
-                continue
-        return games
+                    continue
+                if record:
+                    yield record
+        finally:
+            release_tree(soup)
 
-    async def _get_steam_charts_popular(
+    @traced("steam.source.steamcharts_top")
+    async def _iter_steam_charts_popular(
         self, session: aiohttp.ClientSession
-    ) -> List[Dict[str, Any]]:
-        try:
-            response_text = await self.make_request(
-                "https://steamcharts.com/", session
-            )
-        except Exception as e:
-            print(
-                f"[{datetime.now()}] SteamService: Failed to fetch SteamCharts page: {e}"
-            )
-            return []
-
-        soup = BeautifulSoup(response_text, "lxml")
-        games = []
-        table = soup.find("table", id="top-games")
-        if not table:
-            print(
-                f"[{datetime.now()}] SteamService: Could not find SteamCharts table"
+    ) -> AsyncIterator[Dict[str, Any]]:
+        async with aclosing(
+            self.iter_records(
+                "https://steamcharts.com/",
+                session,
+                match=_is_top_games_row,
+                extract=_steamcharts_popular_record,
+                limit=10,
+                source="steamcharts_top",
             )
-            return []
-
-        for row in table.select("tbody tr")[:10]:
-            try:
-                cells = row.select("td")
-                if len(cells) < 3:
-                    continue
-                name_link = cells[1].find("a", href=True)
-                name = name_link.text.strip() if name_link else cells[1].text.strip()
-                app_id = None
-                if name_link:
-                    match = re.search(r"/app/(\d+)", name_link["href"])
-                    if match: app_id = match.group(1)
-                if not app_id: app_id = f"chart_{name.replace(' ', '_').lower()}"
-
-
-                current_players = int(cells[2].text.strip().replace(",", ""))
-                if name.lower() != "game" and current_players > 0:
-                    games.append(
-                        {
-                            "id": app_id,
-                            "name": name,
-                            "currentPlayers": current_players,
-                            "platform": "Steam",
-                            "category": "Popular (SteamCharts)",
-                            "isTrending": True,
-                            "source": "steamcharts_top",
-                            "url": name_link['href'] if name_link else None
-                        }
-                    )
-            except Exception as e:
-                print(
-                    f"[{datetime.now()}] SteamService: Error parsing SteamCharts row: {e}"
-                )
-                continue
-        return games
+        ) as records:
+            async for record in records:
+                yield record
 
-    async def _get_steam_global_stats(
+    @traced("steam.source.steam_global_stats_page")
+    async def _iter_steam_global_stats(
         self, session: aiohttp.ClientSession
-    ) -> List[Dict[str, Any]]:
-        try:
-            response_text = await self.make_request(
+    ) -> AsyncIterator[Dict[str, Any]]:
+        async with aclosing(
+            self.iter_records(
                 f"{self.store_url}/stats/Steam-Game-and-Player-Statistics?l=english",
                 session,
+                match=_is_player_count_row,
+                extract=_steam_global_stats_record,
+                limit=10,
+                source="steam_global_stats_page",
             )
-        except Exception as e:
-            print(
-                f"[{datetime.now()}] SteamService: Failed to fetch Steam global stats page: {e}"
-            )
-            return []
-
-        soup = BeautifulSoup(response_text, "lxml")
-        games = []
-        for row in soup.select(".player_count_row")[:10]:
-            try:
-                name_link = row.select_one("a.gameLink")
-                if not name_link:
-                    continue
-                name = name_link.text.strip()
-                app_id = None
-                match = re.search(r"/app/(\d+)", name_link["href"])
-                if match: app_id = match.group(1)
-                if not app_id: app_id = f"stats_{name.replace(' ', '_').lower()}"
-
-
-                current_players_cell = row.select_one("span.currentServers")
-                current_players = (
-                    int(current_players_cell.text.strip().replace(",", ""))
-                    if current_players_cell
-                    else 0
-                )
-                if name and current_players > 0:
-                    games.append(
-                        {
-                            "id": app_id,
-                            "name": name,
-                            "currentPlayers": current_players,
-                            "platform": "Steam",
-                            "category": "Popular (Global Stats)",
-                            "isTrending": True,
-                            "source": "steam_global_stats_page",
-                            "url": name_link['href'] if name_link else None
-                        }
-                    )
-            except Exception as e:
-                print(
-                    f"[{datetime.now()}] SteamService: Error parsing Steam global stats row: {e}"
-                )
-                continue
-        return games
-
-    async def get_top_sellers(self) -> List[Dict[str, Any]]:
+        ) as records:
+            async for record in records:
+                yield record
+
+    @traced("steam.get_top_sellers")
+    async def get_top_sellers(
+        self,
+        region: str = DEFAULT_REGION,
+        locale: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
+        spec = resolve_region(region, locale)
         # SSL doğrulamasını devre dışı bırak
         ssl_context = ssl.create_default_context()
         ssl_context.check_hostname = False
@@ -486,9 +948,11 @@ class SteamService:
         
         connector = aiohttp.TCPConnector(ssl=ssl_context)
         async with aiohttp.ClientSession(connector=connector) as session:
-            url = f"{self.store_url}/search/results/?query&start=0&count=20&dynamic_data=&sort_by=_ASC&supportedlang=english&filter=topsellers&infinite=1"
+            url = self._search_url("count=20&sort_by=_ASC&filter=topsellers", spec)
             try:
-                data = await self.make_request(url, session, is_json=True)
+                data = await self.make_request(
+                    url, session, is_json=True, accept_language=spec["accept_language"]
+                )
             except Exception as e:
                 print(
                     f"[{datetime.now()}] SteamService: Failed to fetch top_sellers JSON: {e}"
@@ -501,78 +965,82 @@ class SteamService:
                 )
                 return []
 
-            soup = BeautifulSoup(data["results_html"], "lxml")
-            games = []
-            for index, item in enumerate(soup.select("a.search_result_row")):
-                try:
-                    app_id = item.get("data-ds-appid")
-                    if not app_id:
-                        continue
-                    name = item.select_one(".title").text.strip()
-                    price_text = (
-                        item.select_one(".search_price").text.strip()
-                        if item.select_one(".search_price")
-                        else "N/A"
-                    )
-                    discount = 0
-                    discount_span = item.select_one(".search_discount span")
-                    if discount_span and discount_span.text.strip():
-                        try:
-                            discount = int(discount_span.text.strip().replace("-","").replace("%",""))
-                        except ValueError:
-                            pass # discount remains 0
-
-                    review_score, review_count = None, None
-                    review_summary_span = item.select_one(".search_review_summary span")
-                    if review_summary_span and 'data-tooltip-html' in review_summary_span.attrs:
-                        tooltip_html = review_summary_span['data-tooltip-html']
-                        score_match = re.search(r"(\d+)% of the", tooltip_html)
-                        if score_match: review_score = f"{score_match.group(1)}%"
-                        count_match = re.search(r"([\d,]+) user reviews", tooltip_html)
-                        if count_match: review_count = count_match.group(1).replace(",", "")
-
-
-                    release_date = (
-                        item.select_one(".search_released").text.strip()
-                        if item.select_one(".search_released")
-                        else "Unknown"
-                    )
-                    image = (
-                        item.select_one(".search_capsule img")["src"]
-                        if item.select_one(".search_capsule img")
-                        else None
-                    )
-                    tags = [
-                        tag.text.strip()
-                        for tag in item.select(".search_tag")
-                        if tag.text.strip()
-                    ]
-                    if name and app_id:
-                        games.append(
-                            {
-                                "id": app_id,
-                                "name": name,
-                                "price": price_text,
-                                "discount": discount,
-                                "headerImage": image,
-                                "platform": "Steam",
-                                "releaseDate": release_date,
-                                "reviewScore": review_score,
-                                "reviewCount": review_count,
-                                "tags": tags,
-                                "rank": index + 1,
-                                "isTopSeller": True,
-                                "source": "top_sellers_api",
-                                "url": item.get('href')
-                            }
+            soup = parse_html(data["results_html"])
+            try:
+                games = []
+                for index, item in enumerate(soup.select("a.search_result_row")):
+                    try:
+                        app_id = item.get("data-ds-appid")
+                        if not app_id:
+                            continue
+                        name = item.select_one(".title").text.strip()
+                        price_text = (
+                            item.select_one(".search_price").text.strip()
+                            if item.select_one(".search_price")
+                            else "N/A"
                         )
-                except Exception as e:
-                    print(
-                        f"[{datetime.now()}] SteamService: Error parsing top_seller: {e}"
-                    )
-                    continue
-            return games
+                        discount = 0
+                        discount_span = item.select_one(".search_discount span")
+                        if discount_span and discount_span.text.strip():
+                            try:
+                                discount = int(discount_span.text.strip().replace("-","").replace("%",""))
+                            except ValueError:
+                                pass # discount remains 0
+
+                        review_score, review_count = None, None
+                        review_summary_span = item.select_one(".search_review_summary span")
+                        if review_summary_span and 'data-tooltip-html' in review_summary_span.attrs:
+                            tooltip_html = review_summary_span['data-tooltip-html']
+                            score_match = re.search(r"(\d+)% of the", tooltip_html)
+                            if score_match: review_score = f"{score_match.group(1)}%"
+                            count_match = re.search(r"([\d,]+) user reviews", tooltip_html)
+                            if count_match: review_count = count_match.group(1).replace(",", "")
+
+
+                        release_date = (
+                            item.select_one(".search_released").text.strip()
+                            if item.select_one(".search_released")
+                            else "Unknown"
+                        )
+                        image = (
+                            item.select_one(".search_capsule img")["src"]
+                            if item.select_one(".search_capsule img")
+                            else None
+                        )
+                        tags = [
+                            tag.text.strip()
+                            for tag in item.select(".search_tag")
+                            if tag.text.strip()
+                        ]
+                        if name and app_id:
+                            games.append(
+                                {
+                                    "id": app_id,
+                                    "name": name,
+                                    "price": price_text,
+                                    "discount": discount,
+                                    "headerImage": image,
+                                    "platform": "Steam",
+                                    "releaseDate": release_date,
+                                    "reviewScore": review_score,
+                                    "reviewCount": review_count,
+                                    "tags": tags,
+                                    "rank": index + 1,
+                                    "isTopSeller": True,
+                                    "source": "top_sellers_api",
+                                    "url": item.get('href')
+                                }
+                            )
+                    except Exception as e:
+                        print(
+                            f"[{datetime.now()}] SteamService: Error parsing top_seller: {e}"
+                        )
+                        continue
+                return annotate_prices(games, spec["cc"])
+            finally:
+                release_tree(soup)
 
+    @traced("steam.get_current_player_stats")
     async def get_current_player_stats(self) -> List[Dict[str, Any]]:
         # SSL doğrulamasını devre dışı bırak
         ssl_context = ssl.create_default_context()
@@ -583,64 +1051,14 @@ class SteamService:
         async with aiohttp.ClientSession(connector=connector) as session:
             games_steamcharts = []
             try:
-                response_text = await self.make_request(
-                    "https://steamcharts.com/", session
+                games_steamcharts = await self.stream_records(
+                    "https://steamcharts.com/",
+                    session,
+                    match=_is_top_games_row,
+                    extract=_steamcharts_live_record,
+                    limit=20,
+                    source="steamcharts_live",
                 )
-                soup = BeautifulSoup(response_text, "lxml")
-                table = soup.find("table", id="top-games")
-                if table:
-                    for index, row in enumerate(table.select("tbody tr")[:20]):
-                        try:
-                            cells = row.select("td")
-                            if len(cells) < 4:
-                                continue
-                            rank = int(cells[0].text.strip())
-                            name_link = cells[1].find("a", href=True)
-                            name = name_link.text.strip() if name_link else cells[1].text.strip()
-
-                            app_id = None
-                            if name_link:
-                                match = re.search(r"/app/(\d+)", name_link["href"])
-                                if match: app_id = match.group(1)
-                            if not app_id: app_id = f"chart_{name.replace(' ', '_').lower()}"
-
-
-                            current_players = int(
-                                cells[2].text.strip().replace(",", "")
-                            )
-                            peak_players = int(
-                                cells[3].text.strip().replace(",", "")
-                            )
-                            change_24h = (
-                                cells[4].text.strip()
-                                if len(cells) > 4 and cells[4].text.strip() != "-"
-                                else None
-                            )
-                            if name.lower() != "game" and current_players > 0:
-                                games_steamcharts.append(
-                                    {
-                                        "id": app_id,
-                                        "name": name,
-                                        "currentPlayers": current_players,
-                                        "peakPlayers": peak_players,
-                                        "change24h": change_24h,
-                                        "rank": rank,
-                                        "platform": "Steam",
-                                        "isPopular": True,
-                                        "source": "steamcharts_live",
-                                        "lastUpdated": datetime.now().isoformat(),
-                                        "url": name_link['href'] if name_link else None
-                                    }
-                                )
-                        except Exception as e:
-                            print(
-                                f"[{datetime.now()}] SteamService: Error parsing SteamCharts player stats row: {e}"
-                            )
-                            continue
-                else:
-                    print(
-                        f"[{datetime.now()}] SteamService: SteamCharts table not found."
-                    )
             except Exception as e:
                 print(
                     f"[{datetime.now()}] SteamService: SteamCharts request error: {e}"
@@ -653,70 +1071,172 @@ class SteamService:
                 return await self._get_steam_stats_alternative(session)
             return games_steamcharts
 
+    @traced("steam.source.steam_stats_alternative")
     async def _get_steam_stats_alternative(
         self, session: aiohttp.ClientSession
     ) -> List[Dict[str, Any]]:
         try:
-            response_text = await self.make_request(
+            games = await self.stream_records(
                 f"{self.store_url}/stats/Steam-Game-and-Player-Statistics?l=english",
                 session,
+                match=_is_player_count_row,
+                extract=_steam_stats_alternative_record,
+                limit=15,
+                source="steam_stats_page_alt",
             )
         except Exception as e:
             print(
                 f"[{datetime.now()}] SteamService: Failed to fetch Steam stats alternative page: {e}"
             )
             return []
-
-        soup = BeautifulSoup(response_text, "lxml")
-        games = []
-        for index, row in enumerate(soup.select(".player_count_row")[:15]):
-            try:
-                name_link = row.select_one("a.gameLink")
-                if not name_link:
-                    continue
-                name = name_link.text.strip()
-                app_id = None
-                match = re.search(r"/app/(\d+)", name_link["href"])
-                if match: app_id = match.group(1)
-                if not app_id: app_id = f"stats_alt_{name.replace(' ', '_').lower()}"
-
-                current_players_cell = row.select_one("span.currentServers")
-                current_players = (
-                    int(current_players_cell.text.strip().replace(",", ""))
-                    if current_players_cell
-                    else 0
-                )
-                if name and current_players > 0:
-                    games.append(
-                        {
-                            "id": app_id,
-                            "name": name,
-                            "currentPlayers": current_players,
-                            "rank": index + 1,
-                            "platform": "Steam",
-                            "isPopular": True,
-                            "source": "steam_stats_page_alt",
-                            "lastUpdated": datetime.now().isoformat(),
-                            "url": name_link['href'] if name_link else None
-                        }
-                    )
-            except Exception as e:
-                print(
-                    f"[{datetime.now()}] SteamService: Error parsing Steam stats alternative row: {e}"
-                )
-                continue
+        for index, game in enumerate(games):
+            game["rank"] = index + 1
         return games
 
+    @traced("steam.app_details")
+    async def fetch_app_details(
+        self, session: aiohttp.ClientSession, appid: str, spec: Dict[str, str]
+    ) -> Optional[Dict[str, Any]]:
+        """Store page details for one app (the endpoint takes a single appid); None if unknown."""
+        payload = await self.make_request(
+            f"{self.store_url}/api/appdetails?appids={appid}&cc={spec['cc']}&l={spec['steam_language']}",
+            session,
+            is_json=True,
+            accept_language=spec["accept_language"],
+        )
+        entry = (payload or {}).get(appid) or {}
+        if not entry.get("success") or not isinstance(entry.get("data"), dict):
+            return None
+        return _app_details_record(appid, entry["data"])
+
+    @traced("steam.app_reviews")
+    async def fetch_app_reviews(
+        self, session: aiohttp.ClientSession, appid: str
+    ) -> Optional[Dict[str, Any]]:
+        """Review summary for one app (all languages and purchase types); None if unknown."""
+        payload = await self.make_request(
+            f"{self.store_url}/appreviews/{appid}?json=1&language=all&purchase_type=all&num_per_page=0",
+            session,
+            is_json=True,
+        )
+        summary = (payload or {}).get("query_summary")
+        if not (payload or {}).get("success") or not isinstance(summary, dict):
+            return None
+        if not summary.get("total_reviews") and not summary.get("review_score_desc"):
+            return None
+        return _app_reviews_record(appid, summary)
+
+
+def _app_details_record(appid: str, data: Dict[str, Any]) -> Dict[str, Any]:
+    price = data.get("price_overview") or {}
+    release = data.get("release_date") or {}
+    return {
+        "id": appid,
+        "name": data.get("name"),
+        "platform": "Steam",
+        "type": data.get("type"),
+        "shortDescription": data.get("short_description"),
+        "developers": data.get("developers") or [],
+        "publishers": data.get("publishers") or [],
+        "genres": [genre.get("description") for genre in data.get("genres") or []],
+        "releaseDate": release.get("date"),
+        "comingSoon": release.get("coming_soon"),
+        "isFree": data.get("is_free"),
+        "price": price.get("final_formatted") or ("Free" if data.get("is_free") else None),
+        "originalPrice": price.get("initial_formatted") or None,
+        "discount": price.get("discount_percent"),
+        "currency": price.get("currency"),
+        # price_overview amounts are in hundredths of the currency unit.
+        "priceAmount": price["final"] / 100 if "final" in price else (0.0 if data.get("is_free") else None),
+        "originalPriceAmount": price["initial"] / 100 if "initial" in price else None,
+        "metacriticScore": (data.get("metacritic") or {}).get("score"),
+        "recommendations": (data.get("recommendations") or {}).get("total"),
+        "headerImage": data.get("header_image"),
+        "website": data.get("website"),
+        "url": f"https://store.steampowered.com/app/{appid}/",
+        "source": "steam_appdetails",
+    }
+
+
+def _app_reviews_record(appid: str, summary: Dict[str, Any]) -> Dict[str, Any]:
+    total = summary.get("total_reviews") or 0
+    positive = summary.get("total_positive") or 0
+    return {
+        "id": appid,
+        "reviewScoreDescription": summary.get("review_score_desc"),
+        "reviewScore": summary.get("review_score"),  # Steam's 0-9 scale
+        "positivePercent": round(100 * positive / total) if total else None,
+        "totalReviews": total,
+        "totalPositive": positive,
+        "totalNegative": summary.get("total_negative") or 0,
+        "source": "steam_appreviews",
+    }
+
+
+def _listing_reviews(row: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Review summary carried by a search-result row ("91%", "12345"), if any."""
+    score = re.match(r"(\d+)%", str(row.get("reviewScore") or ""))
+    count = str(row.get("reviewCount") or "")
+    if not score:
+        return None
+    return {
+        "id": str(row["id"]),
+        "positivePercent": int(score.group(1)),
+        "totalReviews": int(count) if count.isdigit() else None,
+        "source": row.get("source"),
+    }
+
 
 # --- EpicGamesService class ---
+# Catalog search backend used by the store's own browse page (JSON, no HTML).
+TRENDING_CATALOG_QUERY = """
+query searchStoreQuery($category: String, $count: Int, $country: String!, $locale: String, $sortBy: String, $sortDir: String, $start: Int) {
+  Catalog {
+    searchStore(category: $category, count: $count, country: $country, locale: $locale, sortBy: $sortBy, sortDir: $sortDir, start: $start) {
+      elements {
+        title
+        id
+        namespace
+        productSlug
+        urlSlug
+        keyImages { type url }
+        catalogNs { mappings(pageType: "productHome") { pageSlug pageType } }
+        offerMappings { pageSlug pageType }
+        price(country: $country) {
+          totalPrice { discountPrice originalPrice currencyCode fmtPrice(locale: $locale) { originalPrice discountPrice } }
+        }
+      }
+    }
+  }
+}
+"""
+CATALOG_IMAGE_PREFERENCE = ("OfferImageWide", "DieselStoreFrontWide", "Thumbnail", "OfferImageTall")
+
+
 class EpicGamesService:
-    def __init__(self):
+    def __init__(self, rate_limiter: Optional[HostRateLimiter] = None):
         self.base_url = "https://store-site-backend-static.ak.epicgames.com/freeGamesPromotions"
-        self.store_browse_url = "https://store.epicgames.com/en-US/browse"
+        self.store_root_url = "https://store.epicgames.com"
+        self.graphql_url = f"{self.store_root_url}/graphql"
+        # Latency/bytes per trending data path ("catalog_api", "html_scrape").
+        self.path_stats: Dict[str, Dict[str, Any]] = {}
+        # Epic has historically tolerated unthrottled requests; only cap concurrency.
+        self.rate_limiter = rate_limiter or HostRateLimiter(default_interval=0.0)
         print(f"[{datetime.now()}] EpicGamesService initialized.")
 
+    def store_browse_url(self, locale: str = "en-US") -> str:
+        return f"{self.store_root_url}/{locale}/browse"
+
+    def product_url(self, slug: str, locale: str = "en-US") -> str:
+        return f"{self.store_root_url}/{locale}/p/{slug}"
 
-    async def get_free_games(self) -> List[Dict[str, Any]]:
+    @traced("epic.get_free_games")
+    async def get_free_games(
+        self,
+        region: str = DEFAULT_REGION,
+        locale: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
+        spec = resolve_region(region, locale)
         # SSL doğrulamasını devre dışı bırak
         ssl_context = ssl.create_default_context()
         ssl_context.check_hostname = False
@@ -724,17 +1244,22 @@ class EpicGamesService:
         
         connector = aiohttp.TCPConnector(ssl=ssl_context)
         async with aiohttp.ClientSession(connector=connector) as session:
-            url = f"{self.base_url}?locale=en-US&country=US&allowCountries=US"
+            url = (
+                f"{self.base_url}?locale={spec['locale']}"
+                f"&country={spec['cc']}&allowCountries={spec['cc']}"
+            )
             headers = {
                 "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
                 "Accept": "application/json",
+                "Accept-Language": spec["accept_language"],
             }
             try:
-                async with session.get(
-                    url, headers=headers, timeout=15
-                ) as response:
-                    response.raise_for_status()
-                    data = await response.json()
+                async with self.rate_limiter.slot(url):
+                    async with session.get(
+                        upstream_url(url), headers=headers, timeout=15
+                    ) as response:
+                        raise_for_status(response)
+                        data = json.loads(await read_capped(response, url, truncate=False))
             except Exception as e:
                 print(
                     f"[{datetime.now()}] EpicGamesService: Failed to fetch Epic free games: {e}"
@@ -808,11 +1333,11 @@ class EpicGamesService:
 
 
                     product_slug = game.get("productSlug") or (game.get("offerMappings", [{}])[0].get("pageSlug") if game.get("offerMappings") else None)
-                    game_url = f"https://store.epicgames.com/en-US/p/{product_slug}" if product_slug else None
+                    game_url = self.product_url(product_slug, spec["locale"]) if product_slug else None
                     if not game_url and game.get('catalogNs',{}).get('mappings'): # Fallback for URL from mappings
                         for mapping in game['catalogNs']['mappings']:
                             if mapping.get('pageType') == 'productHome':
-                                game_url = f"https://store.epicgames.com/en-US/p/{mapping.get('pageSlug')}"
+                                game_url = self.product_url(mapping.get('pageSlug'), spec["locale"])
                                 if not product_slug: product_slug = mapping.get('pageSlug')
                                 break
 
@@ -865,7 +1390,15 @@ class EpicGamesService:
                 )
             return filtered_games[:15]
 
-    async def get_trending_games(self) -> List[Dict[str, Any]]:
+    @traced("epic.get_trending_games")
+    async def get_trending_games(
+        self, region: str = DEFAULT_REGION, locale: Optional[str] = None, limit: int = 10
+    ) -> List[Dict[str, Any]]:
+        """
+        Trending games ordered by Epic's own catalog search (JSON), falling back
+        to scraping the browse page when the catalog backend is unavailable.
+        """
+        spec = resolve_region(region, locale)
         # SSL doğrulamasını devre dışı bırak
         ssl_context = ssl.create_default_context()
         ssl_context.check_hostname = False
@@ -873,168 +1406,1047 @@ class EpicGamesService:
         
         connector = aiohttp.TCPConnector(ssl=ssl_context)
         async with aiohttp.ClientSession(connector=connector) as session:
-            headers = {
-                "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
-                "Accept-Language": "en-US,en;q=0.9",
+            games = await self._get_trending_from_catalog(session, spec, limit)
+            if games:
+                return games
+            print(
+                f"[{datetime.now()}] EpicGamesService: Catalog search returned no trending games. Falling back to browse page scrape."
+            )
+            return await self._get_trending_from_html(session, spec, limit)
+
+    def _record_path(
+        self, path: str, started: float, nbytes: int, rows: int, ok: bool
+    ) -> None:
+        stats = self.path_stats.setdefault(
+            path,
+            {"calls": 0, "failures": 0, "totalSeconds": 0.0, "totalBytes": 0, "totalRows": 0},
+        )
+        stats["calls"] += 1
+        stats["failures"] += 0 if ok else 1
+        stats["totalSeconds"] += time.perf_counter() - started
+        stats["totalBytes"] += nbytes
+        stats["totalRows"] += rows
+
+    def get_path_stats(self) -> Dict[str, Any]:
+        """Per-path latency/bytes for the trending sources (catalog_api vs html_scrape)."""
+        report = {}
+        for path, stats in self.path_stats.items():
+            calls = stats["calls"] or 1
+            report[path] = {
+                **stats,
+                "totalSeconds": round(stats["totalSeconds"], 3),
+                "avgLatencyMs": round(stats["totalSeconds"] / calls * 1000, 1),
+                "avgBytes": stats["totalBytes"] // calls,
+            }
+        return report
+
+    @traced("epic.source.catalog_api")
+    async def _get_trending_from_catalog(
+        self, session: aiohttp.ClientSession, spec: Dict[str, str], limit: int
+    ) -> List[Dict[str, Any]]:
+        payload = {
+            "query": TRENDING_CATALOG_QUERY,
+            "variables": {
+                "category": "games/edition/base",
+                "count": limit,
+                "country": spec["cc"],
+                "locale": spec["locale"],
+                "sortBy": "trending",
+                "sortDir": "DESC",
+                "start": 0,
+            },
+        }
+        headers = {
+            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
+            "Accept": "application/json",
+            "Accept-Language": spec["accept_language"],
+            "Content-Type": "application/json",
+        }
+        started = time.perf_counter()
+        try:
+            async with self.rate_limiter.slot(self.graphql_url):
+                async with session.post(
+                    upstream_url(self.graphql_url), json=payload, headers=headers, timeout=15
+                ) as response:
+                    raise_for_status(response)
+                    body = await read_capped(response, self.graphql_url, truncate=False)
+            data = json.loads(body)
+        except Exception as e:
+            self._record_path("catalog_api", started, 0, 0, ok=False)
+            print(
+                f"[{datetime.now()}] EpicGamesService: Failed to query Epic catalog for trending games: {e}"
+            )
+            return []
+        games = self._parse_catalog_trending(data, spec, limit)
+        self._record_path("catalog_api", started, len(body), len(games), ok=bool(games))
+        return games
+
+    def _parse_catalog_trending(
+        self, data: Dict[str, Any], spec: Dict[str, str], limit: int
+    ) -> List[Dict[str, Any]]:
+        elements = (
+            ((data or {}).get("data") or {})
+            .get("Catalog", {})
+            .get("searchStore", {})
+            .get("elements")
+            or []
+        )
+        games = []
+        for element in elements:
+            try:
+                slug = element.get("productSlug") or element.get("urlSlug")
+                for mapping in (element.get("offerMappings") or []) + (
+                    (element.get("catalogNs") or {}).get("mappings") or []
+                ):
+                    if mapping.get("pageSlug"):
+                        slug = mapping["pageSlug"]
+                        break
+                if slug:
+                    slug = slug.split("/")[0]  # "some-game/home" -> "some-game"
+
+                images = {
+                    img.get("type"): img.get("url")
+                    for img in element.get("keyImages") or []
+                    if img.get("url")
+                }
+                image = next(
+                    (images[t] for t in CATALOG_IMAGE_PREFERENCE if t in images),
+                    next(iter(images.values()), None),
+                )
+
+                total_price = (element.get("price") or {}).get("totalPrice") or {}
+                fmt_price = total_price.get("fmtPrice") or {}
+                original_amount = total_price.get("originalPrice")
+                current_amount = total_price.get("discountPrice")
+                price = "N/A"
+                discount = 0
+                # A missing amount is unknown, not free: derive nothing from half a price.
+                if original_amount is not None and current_amount is not None:
+                    price = "Free" if current_amount == 0 else fmt_price.get("discountPrice") or "N/A"
+                    if original_amount:
+                        discount = round(100 * (original_amount - current_amount) / original_amount)
+
+                if not element.get("title"):
+                    continue
+                games.append(
+                    {
+                        "id": slug or element.get("id"),
+                        "name": element["title"],
+                        "price": price,
+                        "discount": discount,
+                        "platform": "Epic Games",
+                        "url": self.product_url(slug, spec["locale"]) if slug else None,
+                        "headerImage": image,
+                        "category": "Trending/Featured",
+                        "isTrending": True,
+                        "source": "epic_catalog_api",
+                    }
+                )
+                if len(games) >= limit:
+                    break
+            except Exception as e:
+                print(
+                    f"[{datetime.now()}] EpicGamesService: Error parsing Epic catalog element: {e}"
+                )
+                continue
+        return games
+
+    @traced("epic.source.html_scrape")
+    async def _get_trending_from_html(
+        self, session: aiohttp.ClientSession, spec: Dict[str, str], limit: int = 10
+    ) -> List[Dict[str, Any]]:
+        headers = {
+            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
+            "Accept-Language": spec["accept_language"],
+        }
+        browse_url = (
+            f"{self.store_browse_url(spec['locale'])}"
+            f"?sortBy=trending&sortDir=DESC&count=20&country={spec['cc']}"
+        )
+        started = time.perf_counter()
+        html = None
+        try:
+            async with self.rate_limiter.slot(browse_url):
+                async with session.get(
+                    upstream_url(browse_url),
+                    headers=headers,
+                    timeout=20,
+                ) as response:
+                    raise_for_status(response)
+                    html = await read_text_capped(response, browse_url)
+        except Exception as e:
+            print(
+                f"[{datetime.now()}] EpicGamesService: Failed to fetch Epic trending browse page: {e}. Falling back to main page."
+            )
+            main_url = f"{self.store_root_url}/{spec['locale']}/"
+            try:
+                async with self.rate_limiter.slot(main_url):
+                    async with session.get(
+                        upstream_url(main_url),
+                        headers=headers,
+                        timeout=15,
+                    ) as response_main:
+                        raise_for_status(response_main)
+                        html = await read_text_capped(response_main, main_url)
+            except Exception as e_main:
+                print(
+                    f"[{datetime.now()}] EpicGamesService: Failed to fetch Epic main page for trending: {e_main}"
+                )
+                self._record_path("html_scrape", started, 0, 0, ok=False)
+                return []
+        
+        if not html:
+            self._record_path("html_scrape", started, 0, 0, ok=False)
+            return []
+        games = self._parse_trending_html(html, limit)
+        self._record_path("html_scrape", started, len(html.encode()), len(games), ok=bool(games))
+        return games
+
+    def _parse_trending_html(self, html: str, limit: int = 10) -> List[Dict[str, Any]]:
+        soup = parse_html(html)
+        try:
+            # Cards are parsed lazily: parsing stops once `limit` distinct games were found.
+            games = list(
+                islice(
+                    unique_records(
+                        self._iter_trending_cards(soup),
+                        key=lambda game: game["url"] or game["name"].lower(),
+                    ),
+                    limit,
+                )
+            )
+            if not games:
+                print(
+                    f"[{datetime.now()}] EpicGamesService: No trending games found on Epic Games Store via scraping."
+                )
+            return games
+        finally:
+            release_tree(soup)
+
+    def _iter_trending_cards(self, soup) -> Iterator[Dict[str, Any]]:
+        # Common selectors for game cards on Epic Store
+        # These might need frequent updates due to website changes
+        card_selectors = [
+            'div[data-testid^="offer-card-"]',
+            'article[data-testid^="offer-card-"]',
+            '.css-1myhtyb', # Generic card class often used
+            '.css-1jx3eyg', # Another generic card class
+            'div[role="group"] > div[data-component="DiscoverCard"]', # For discover sections
+            'section[data-testid="section-wrapper"] li[data-testid="list-item"]' # For list items in sections
+        ]
+        game_cards = (card for selector in card_selectors for card in soup.select(selector))
+
+        for index, card in enumerate(islice(game_cards, 25)): # Process up to 25 candidates
+            try:
+                name, price, game_url, image = None, "N/A", None, None
+
+                # Try to find a link first, as it's a good anchor
+                link_elem = card.find("a", href=True)
+                if link_elem:
+                    href_val = link_elem["href"]
+                    if href_val.startswith("/"):
+                        game_url = f"{self.store_root_url}{href_val}"
+                    elif href_val.startswith("http"):
+                        game_url = href_val
+                
+                    # Extract name from link's inner text or aria-label
+                    name_candidate_elems = link_elem.select('span[data-testid="offer-title-info-title"], div[data-testid="truncate-text-title"], .css-2ucwu, .css-uahz85, span[aria-label]')
+                    for elem in name_candidate_elems:
+                        if elem.text.strip(): name = elem.text.strip(); break
+                    if not name and link_elem.get('aria-label'): name = link_elem.get('aria-label')
+                    if not name and link_elem.text.strip(): name = link_elem.text.strip()
+
+
+                # If name not found via link, try broader card search
+                if not name:
+                    name_elems = card.select('span[data-testid="offer-title-info-title"], div[data-testid="truncate-text-title"], .css-2ucwu, .css-uahz85, h3')
+                    for elem in name_elems:
+                        if elem.text.strip(): name = elem.text.strip(); break
+            
+                # Image alt text as fallback for name
+                if not name:
+                    img_alt_elem = card.select_one("img[alt]")
+                    if img_alt_elem and img_alt_elem["alt"].strip():
+                        name = img_alt_elem["alt"].strip().replace("Cover art for ", "").replace("Box art for ", "")
+
+                if not name: continue # Skip if no name found
+
+                price_elems = card.select('span[data-testid="offer-price"], .css-119zqif, .css-4f2d21, div[data-testid="purchase-price-items"] span')
+                for elem in price_elems:
+                    if elem.text.strip(): price = elem.text.strip(); break
+            
+                img_elem = card.select_one("img[src]")
+                if img_elem: image = img_elem["src"]
+
+                game_id = f"epic_trend_{index}"
+                if game_url:
+                    match = re.search(r"/(?:p|store)/([^/?]+)", game_url)
+                    if match: game_id = match.group(1)
+                elif name:
+                    game_id = f"epic_trend_{name.lower().replace(' ', '_').replace(':','')}"
+
+
+                record = {
+                    "id": game_id,
+                    "name": name,
+                    "price": price,
+                    "platform": "Epic Games",
+                    "url": game_url,
+                    "headerImage": image,
+                    "category": "Trending/Featured",
+                    "isTrending": True,
+                    "source": "epic_store_scrape"
+                }
+            except Exception as e:
+                print(
+                    f"[{datetime.now()}] EpicGamesService: Error parsing Epic game card: {e}"
+                )
+                continue
+            yield record
+
+
+# --- The GameAnalyticsApp class that server.py expects ---
+
+# Dataset name -> whether its upstream content depends on the requested region.
+DATASET_REGIONAL = {
+    "steam_trending": True,
+    "steam_top_sellers": True,
+    "steam_most_played": False,  # SteamCharts / Steam stats pages are global
+    "epic_free_games": True,
+    "epic_trending_games": True,
+}
+
+# (platform, type) labels of each dataset's section in aggregate responses.
+DATASET_LABELS = {
+    "steam_trending": ("Steam", "Trending Games"),
+    "steam_top_sellers": ("Steam", "Top Sellers"),
+    "steam_most_played": ("Steam", "Most Played Games"),
+    "epic_free_games": ("Epic Games", "Free Games"),
+    "epic_trending_games": ("Epic Games", "Trending Games"),
+}
+# get_trending_sections without `sections`: Steam only (no Epic browse scrape).
+DEFAULT_SECTIONS = ("steam_trending", "steam_top_sellers", "steam_most_played")
+
+# Fields that describe the game itself rather than its regional store listing.
+# In multi-region responses these are sent once per game instead of per region.
+# Name, description, tags and release date come back in the request's
+# language (Steam l= / Accept-Language), so they stay with each region's rows.
+REGION_INDEPENDENT_FIELDS = (
+    "headerImage",
+    "reviewScore",
+    "reviewCount",
+    "developer",
+    "publisher",
+    "images",
+    "namespace",
+    "productSlug",
+)
+
+MAX_BATCH_REGIONS = 20
+# Steam app lookups (details / reviews): ids per call; every uncached id is one
+# request to store.steampowered.com, so the host's rate limit bounds the batch.
+MAX_LOOKUP_APPIDS = 25
+# Ranking datasets whose Steam rows seed the per-appid cache, and the row
+# fields that go into a "listing" details record.
+APP_INFO_SEED_DATASETS = ("steam_trending", "steam_top_sellers")
+APP_LISTING_FIELDS = (
+    "name",
+    "platform",
+    "price",
+    "originalPrice",
+    "discount",
+    "priceAmount",
+    "originalPriceAmount",
+    "currency",
+    "releaseDate",
+    "tags",
+    "headerImage",
+    "url",
+)
+
+
+def normalize_app_ids(app_ids: Any) -> List[str]:
+    if isinstance(app_ids, (str, int)):
+        app_ids = [app_ids]
+    ids: List[str] = []
+    for app_id in app_ids or []:
+        value = str(app_id).strip()
+        if not value.isdigit():
+            raise ValueError(f"Invalid Steam app id: {app_id!r}")
+        if value not in ids:
+            ids.append(value)
+    if not ids:
+        raise ValueError("No app ids given")
+    if len(ids) > MAX_LOOKUP_APPIDS:
+        raise ValueError(f"At most {MAX_LOOKUP_APPIDS} app ids per call (got {len(ids)})")
+    return ids
+
+
+class GameAnalyticsApp:
+    def __init__(self):
+        print(f"[{datetime.now()}] GameAnalyticsApp: Initializing services...")
+        # One limiter for all services so batched/concurrent calls share host budgets.
+        self.rate_limiter = HostRateLimiter(
+            default_interval=1.5,
+            host_intervals={
+                "store-site-backend-static.ak.epicgames.com": 0.0,
+                "store.epicgames.com": 0.5,
+            },
+            # QUOTA_CLIENT_WEIGHTS="team-a=2,team-b=1": relative share of upstream slots.
+            client_weights=parse_weights(os.getenv("QUOTA_CLIENT_WEIGHTS")),
+        )
+        self.steam_service = SteamService(rate_limiter=self.rate_limiter)
+        self.epic_service = EpicGamesService(rate_limiter=self.rate_limiter)
+        # CACHE_BACKEND_URL (sqlite:///..., redis://...) shares snapshots between
+        # worker processes; unset keeps the cache local to this process.
+        backend_url = os.getenv("CACHE_BACKEND_URL")
+        self.cache = SnapshotCache(
+            default_ttl=float(os.getenv("CACHE_TTL_SECONDS", "300")),
+            backend=create_cache_backend(backend_url) if backend_url else None,
+        )
+        # Versions of recent snapshots per cache key, for delta feeds.
+        self.history = SnapshotHistory(max_versions=10)
+        # Called as listener(dataset, region, old_rows, new_rows) when a dataset's
+        # content changes (e.g. resource subscriptions in server.py).
+        self.snapshot_listeners: List[Any] = []
+        # Per-appid Steam details and review summaries (lookup tools), seeded
+        # by the ranking datasets.
+        self.app_info = AppInfoCache(
+            max_entries=int(os.getenv("APP_INFO_CACHE_ENTRIES", "5000")),
+            ttl=float(os.getenv("APP_INFO_TTL_SECONDS", "3600")),
+        )
+        # Per-appid, per-region price change points, fed by the same fresh
+        # loads and by detail lookups.
+        self.prices = PriceHistory(
+            max_series=int(os.getenv("PRICE_HISTORY_SERIES", "50000")),
+            max_points=int(os.getenv("PRICE_HISTORY_POINTS", "500")),
+        )
+        # Epic promotion windows per region: free-games snapshots expire at the
+        # next promotion start/end (capped by the safety TTL), and
+        # get_epic_free_games_at answers from the calendar without fetching.
+        self.promotions = PromotionCalendar()
+        self.promotion_safety_ttl = float(os.getenv("EPIC_PROMOTION_SAFETY_TTL_SECONDS", "21600"))
+        # Latest snapshots are checkpointed to disk and restored here, so a
+        # restart answers from them (with their age) while refreshing.
+        self.checkpoints = CheckpointStore(
+            path=os.getenv("CHECKPOINT_PATH"),
+            interval=float(os.getenv("CHECKPOINT_INTERVAL_SECONDS", "60")),
+            max_age=float(os.getenv("CHECKPOINT_MAX_AGE_SECONDS", "86400")),
+        )
+        self.restore_grace = float(os.getenv("CHECKPOINT_RESTORE_GRACE_SECONDS", "300"))
+        self.restored_keys: List[Tuple[str, Optional[str], Optional[str]]] = []
+        self._restore_refresh: Optional[asyncio.Task] = None
+        self.exporter = SnapshotExporter(
+            output_dir=os.getenv("EXPORT_DIR"),
+            keep_files=int(os.getenv("EXPORT_KEEP_FILES", "20")),
+        )
+        # Player-count / rank time series for momentum scoring (one observation per fresh fetch).
+        self.trends = TrendEngine(capacity=int(os.getenv("TREND_HISTORY_SNAPSHOTS", "288")))
+        # Last load outcome per full-snapshot cache key, for get_api_health.
+        self.dataset_status: Dict[str, Dict[str, Any]] = {}
+        # Background upstream probes and loop-lag sampling; started by the
+        # server lifespan (HEALTH_PROBE_INTERVAL=0 keeps only the lag sampler).
+        self.health = HealthMonitor(
+            probes={
+                "steam_store": f"{self.steam_service.store_url}/search/results/?query&start=0&count=1&infinite=1&cc=US&l=english",
+                "steamcharts": "https://steamcharts.com/",
+                "epic_free_games_api": f"{self.epic_service.base_url}?locale=en-US&country=US&allowCountries=US",
+                "epic_store": f"{self.epic_service.store_root_url}/en-US/",
+            },
+            rate_limiter=self.rate_limiter,
+            url_rewriter=upstream_url,
+            probe_interval=float(os.getenv("HEALTH_PROBE_INTERVAL", "60")),
+            max_loop_lag=float(os.getenv("HEALTH_MAX_LOOP_LAG_SECONDS", "1.0")),
+        )
+        with STARTUP.phase("restore checkpoint"):
+            self._restore_checkpoint()
+        self.initialization_time = datetime.now()
+        print(f"[{datetime.now()}] GameAnalyticsApp: Services initialized.")
+
+    @traced("app.warm_up")
+    async def warm_up(self, datasets: Optional[List[str]] = None) -> Dict[str, Any]:
+        """
+        Pays cold-start costs ahead of the first tool call: loads the parsing
+        libraries, resolves upstream hostnames and prefetches datasets into the
+        snapshot cache. Services open a session per call, so DNS resolution is
+        the part of connection setup that can be warmed here.
+        """
+        datasets = datasets or ["steam_top_sellers", "steam_most_played", "epic_free_games"]
+        results: Dict[str, Any] = {
+            name: "error: unknown dataset" for name in datasets if name not in DATASET_REGIONAL
+        }
+        datasets = [name for name in datasets if name in DATASET_REGIONAL]
+        # Importing/initializing the parser holds the GIL but keeps the loop free for I/O.
+        await asyncio.to_thread(parse_html, "<html><body><p>warm</p></body></html>")
+
+        hosts = {
+            urlparse(url).hostname
+            for url in (
+                self.steam_service.store_url,
+                "https://steamcharts.com/",
+                self.epic_service.base_url,
+                self.epic_service.store_root_url,
+            )
+        }
+        loop = asyncio.get_running_loop()
+        with STARTUP.phase("warm-up: resolve upstream hosts"):
+            await asyncio.gather(
+                *(loop.getaddrinfo(host, 443) for host in hosts), return_exceptions=True
+            )
+
+        with STARTUP.phase(f"warm-up: prefetch {', '.join(datasets)}"):
+            loaded = await asyncio.gather(
+                *(self._load_dataset(name) for name in datasets), return_exceptions=True
+            )
+        for name, result in zip(datasets, loaded):
+            results[name] = (
+                f"error: {result}" if isinstance(result, Exception) else len(result["value"])
+            )
+        print(f"[{datetime.now()}] GameAnalyticsApp: Warm-up finished: {results}")
+        return results
+
+    def _dataset_fetcher(self, dataset: str, spec: Dict[str, str]):
+        fetchers = {
+            "steam_trending": lambda: self.steam_service.get_trending_games(
+                spec["cc"], spec["locale"]
+            ),
+            "steam_top_sellers": lambda: self.steam_service.get_top_sellers(
+                spec["cc"], spec["locale"]
+            ),
+            "steam_most_played": lambda: self.steam_service.get_current_player_stats(),
+            "epic_free_games": lambda: self.epic_service.get_free_games(
+                spec["cc"], spec["locale"]
+            ),
+            "epic_trending_games": lambda: self.epic_service.get_trending_games(
+                spec["cc"], spec["locale"]
+            ),
+        }
+        return fetchers[dataset]
+
+    def _dataset_ttl(self, dataset: str):
+        if dataset == "epic_free_games":
+            return lambda games: expiry_ttl(games, self.promotion_safety_ttl)
+        return None  # cache default
+
+    @traced("app.load_dataset")
+    async def _load_dataset(
+        self,
+        dataset: str,
+        region: Optional[str] = None,
+        locale: Optional[str] = None,
+        refresh: bool = False,
+    ) -> Dict[str, Any]:
+        """
+        Fetches a dataset through the region-aware snapshot cache, always as
+        the full snapshot: field projection is applied to the returned rows by
+        the caller (projection.apply_projection), so every projection of a
+        dataset shares one cache entry and one upstream fetch.
+        refresh=True refetches the full snapshot even if it is cached.
+        """
+        spec = resolve_region(region, locale)
+        if DATASET_REGIONAL[dataset]:
+            key = self.cache.make_key(dataset, spec["cc"], spec["locale"])
+        else:
+            key = self.cache.make_key(dataset)
+        region_label = spec["cc"] if DATASET_REGIONAL[dataset] else "global"
+        span = TRACER.current_span()
+        span.set_attributes({"dataset": dataset, "region": region_label})
+        stale_read = STALE_READ.get()
+        if stale_read is not None:
+            span.set_attribute("admission.degraded", True)
+            return self._retained_snapshot(key, dataset, spec, region_label, stale_read)
+        result = await self.cache.get_or_fetch(
+            key, self._dataset_fetcher(dataset, spec), self._dataset_ttl(dataset), force=refresh
+        )
+        span.set_attributes({"cache.hit": result["cached"], "cache.stale": result["stale"]})
+        self._record_dataset_status(key, dataset, region_label, result)
+        self._index_snapshot(
+            dataset,
+            spec,
+            region_label,
+            result["value"],
+            time.time() - (result["age"] or 0),
+            fresh=not result["cached"],
+        )
+        previous_version = self.history.latest_version(key)
+        version = self.history.record(key, result["value"])
+        if previous_version is not None and version != previous_version:
+            old_rows = self.history.get(key, previous_version) or []
+            for listener in self.snapshot_listeners:
+                try:
+                    listener(dataset, region_label, old_rows, result["value"])
+                except Exception as e:
+                    print(f"[{datetime.now()}] GameAnalyticsApp: Snapshot listener error: {e}")
+        return {
+            **result,
+            "key": key,
+            "version": version,
+            "region": region_label,
+            "locale": spec["locale"] if DATASET_REGIONAL[dataset] else None,
+        }
+
+    def _index_snapshot(
+        self,
+        dataset: str,
+        spec: Dict[str, str],
+        region_label: str,
+        rows: List[Dict[str, Any]],
+        fetched_at: float,
+        fresh: bool,
+    ) -> None:
+        """Feeds a loaded snapshot to the derived indexes (fresh: first time this process sees it)."""
+        if dataset in TRACKED_DATASETS:
+            try:
+                self.trends.observe(dataset, region_label, rows, fetched_at)
+            except ImportError as e:
+                print(f"[{datetime.now()}] GameAnalyticsApp: Trend scoring unavailable: {e}")
+        if dataset == "epic_free_games" and rows:
+            self.promotions.update(region_label, rows, fetched_at)
+        if dataset in APP_INFO_SEED_DATASETS and fresh:
+            self._seed_app_info(spec, rows)
+            self._record_prices(spec["cc"], rows, fetched_at)
+
+    # --- warm restart (see checkpoint.py) ---
+
+    def _checkpoint_entries(self) -> List[Tuple[str, str, str, Optional[str], float, List[Dict[str, Any]]]]:
+        entries = []
+        for key, _, _, rows in self.history.snapshots(latest_only=True):
+            status = self.dataset_status.get(key)
+            if not rows or not status or not status["lastSuccess"]:
+                continue
+            locale = key.split(":")[2]
+            entries.append(
+                (
+                    key,
+                    status["dataset"],
+                    status["region"],
+                    None if locale == "-" else locale,
+                    status["lastSuccess"],
+                    rows,
+                )
+            )
+        return entries
+
+    def _restore_checkpoint(self) -> None:
+        """
+        Loads the last checkpoint into the cache, history and indexes. A
+        snapshot keeps its original fetch time (tools report its age) and
+        stays servable for its remaining TTL, or CHECKPOINT_RESTORE_GRACE_SECONDS
+        when older, while refresh_restored() replaces it in the background.
+        """
+        now = time.time()
+        for key, dataset, region_label, locale, fetched_at, rows in self.checkpoints.load():
+            if dataset not in DATASET_REGIONAL or not rows:
+                continue
+            try:
+                spec = resolve_region(region_label if DATASET_REGIONAL[dataset] else None, locale)
+            except ValueError:
+                continue
+            age = now - fetched_at
+            if dataset == "epic_free_games":
+                # expiry_ttl counts from now (next promotion boundary); the
+                # safety TTL counts from the original fetch.
+                ttl = min(
+                    expiry_ttl(rows, self.promotion_safety_ttl, now=now),
+                    self.promotion_safety_ttl - age,
+                )
+            else:
+                ttl = self.cache.default_ttl - age
+            self.cache.restore(key, rows, fetched_at, max(ttl, self.restore_grace), stale=ttl <= 0)
+            self.history.record(key, rows)
+            self._record_dataset_status(
+                key, dataset, region_label, {"value": rows, "age": age}
+            )
+            # Fresh only for what was left of its TTL at checkpoint time.
+            self.dataset_status[key].update(restored=True, freshUntil=now + ttl)
+            self._index_snapshot(dataset, spec, region_label, rows, fetched_at, fresh=True)
+            self.restored_keys.append((dataset, region_label if DATASET_REGIONAL[dataset] else None, locale))
+        if self.restored_keys:
+            print(
+                f"[{datetime.now()}] GameAnalyticsApp: Restored {len(self.restored_keys)} snapshots from {self.checkpoints.path}"
+            )
+
+    async def refresh_restored(self) -> Dict[str, Any]:
+        """Refetches every restored snapshot once (the host rate limiter paces the requests)."""
+        restored, self.restored_keys = self.restored_keys, []
+        loaded = await asyncio.gather(
+            *(
+                self._load_dataset(dataset, region, locale, refresh=True)
+                for dataset, region, locale in restored
+            ),
+            return_exceptions=True,
+        )
+        refreshed = sum(
+            1 for result in loaded if not isinstance(result, BaseException) and not result["cached"]
+        )
+        print(
+            f"[{datetime.now()}] GameAnalyticsApp: Refreshed {refreshed}/{len(restored)} restored snapshots"
+        )
+        return {"restored": len(restored), "refreshed": refreshed}
+
+    def start_checkpoints(self) -> None:
+        """Starts periodic checkpoints and the background refresh of restored snapshots."""
+        self.checkpoints.start(self._checkpoint_entries)
+        if self.restored_keys and (self._restore_refresh is None or self._restore_refresh.done()):
+            self._restore_refresh = asyncio.get_running_loop().create_task(self.refresh_restored())
+
+    async def stop_checkpoints(self) -> None:
+        """Stops the background tasks and writes a final checkpoint."""
+        if self._restore_refresh is not None and not self._restore_refresh.done():
+            self._restore_refresh.cancel()
+            await asyncio.gather(self._restore_refresh, return_exceptions=True)
+        await self.checkpoints.stop(self._checkpoint_entries)
+
+    def _retained_snapshot(
+        self,
+        key: str,
+        dataset: str,
+        spec: Dict[str, str],
+        region_label: str,
+        stale_read: StaleRead,
+    ) -> Dict[str, Any]:
+        """
+        Degrade mode (see admission.py): the cached snapshot if it is still
+        fresh, else the last retained version marked stale. Never fetches.
+        """
+        entry = self.cache.get(key)
+        version = self.history.latest_version(key)
+        if entry is not None:
+            result = {
+                "value": entry["value"],
+                "cached": True,
+                "age": round(time.time() - entry["stored_at"], 3),
+                "stale": False,
+            }
+        elif version is not None:
+            last_success = self.dataset_status.get(key, {}).get("lastSuccess")
+            result = {
+                "value": self.history.get(key, version),
+                "cached": True,
+                "age": round(time.time() - last_success, 3) if last_success else None,
+                "stale": True,
+            }
+        else:
+            stale_read.missing.append(key)
+            raise LookupError(
+                f"Server is saturated and no snapshot of {dataset} ({region_label}) is retained yet"
+            )
+        stale_read.served.append(key)
+        return {
+            **result,
+            "degraded": True,
+            "key": key,
+            "version": version,
+            "region": region_label,
+            "locale": spec["locale"] if DATASET_REGIONAL[dataset] else None,
+        }
+
+    def _record_dataset_status(
+        self, key: str, dataset: str, region_label: str, result: Dict[str, Any]
+    ) -> None:
+        now = time.time()
+        status = self.dataset_status.setdefault(
+            key, {"dataset": dataset, "region": region_label, "lastSuccess": None}
+        )
+        status["lastAttempt"] = now
+        status["lastRows"] = len(result["value"])
+        entry = self.cache.get(key)
+        # Snapshots can have their own lifetime (Epic promotions), not just the
+        # default TTL; a restored one keeps the freshness set when it was restored.
+        if not (entry and entry.get("restored")):
+            status["freshUntil"] = entry["expires_at"] if entry else None
+        if result["value"]:
+            # The snapshot was fetched `age` seconds ago (0 for a fresh fetch).
+            status["lastSuccess"] = max(status["lastSuccess"] or 0, now - (result["age"] or 0))
+
+    def _dataset_freshness(self) -> List[Dict[str, Any]]:
+        now = time.time()
+        return [
+            {
+                "dataset": status["dataset"],
+                "region": status["region"],
+                "lastRows": status["lastRows"],
+                "lastAttempt": datetime.fromtimestamp(status["lastAttempt"]).isoformat(),
+                "lastSuccess": datetime.fromtimestamp(status["lastSuccess"]).isoformat()
+                if status["lastSuccess"]
+                else None,
+                "secondsSinceSuccess": round(now - status["lastSuccess"], 1)
+                if status["lastSuccess"]
+                else None,
+                "stale": status["lastSuccess"] is None
+                or now > (status.get("freshUntil") or status["lastSuccess"] + self.cache.default_ttl),
             }
-            html = None
-            try:
-                async with session.get(
-                    f"{self.store_browse_url}?sortBy=trending&sortDir=DESC&count=20",
-                    headers=headers,
-                    timeout=20,
-                ) as response:
-                    response.raise_for_status()
-                    html = await response.text()
-            except Exception as e:
-                print(
-                    f"[{datetime.now()}] EpicGamesService: Failed to fetch Epic trending browse page: {e}. Falling back to main page."
-                )
-                try:
-                    async with session.get(
-                        "https://store.epicgames.com/en-US/",
-                        headers=headers,
-                        timeout=15,
-                    ) as response_main:
-                        response_main.raise_for_status()
-                        html = await response_main.text()
-                except Exception as e_main:
-                    print(
-                        f"[{datetime.now()}] EpicGamesService: Failed to fetch Epic main page for trending: {e_main}"
-                    )
-                    return []
-            
-            if not html: return []
-
-            soup = BeautifulSoup(html, "lxml")
-            games = []
-            seen_names_or_urls = set()
-
-            # Common selectors for game cards on Epic Store
-            # These might need frequent updates due to website changes
-            card_selectors = [
-                'div[data-testid^="offer-card-"]',
-                'article[data-testid^="offer-card-"]',
-                '.css-1myhtyb', # Generic card class often used
-                '.css-1jx3eyg', # Another generic card class
-                'div[role="group"] > div[data-component="DiscoverCard"]', # For discover sections
-                'section[data-testid="section-wrapper"] li[data-testid="list-item"]' # For list items in sections
-            ]
-
-            game_cards = []
-            for selector in card_selectors:
-                game_cards.extend(soup.select(selector))
-                if len(game_cards) > 20 : break # Stop if we have enough candidates
-
-            for index, card in enumerate(game_cards[:25]): # Process up to 25 candidates
-                try:
-                    name, price, game_url, image = None, "N/A", None, None
-
-                    # Try to find a link first, as it's a good anchor
-                    link_elem = card.find("a", href=True)
-                    if link_elem:
-                        href_val = link_elem["href"]
-                        if href_val.startswith("/"):
-                            game_url = f"https://store.epicgames.com{href_val}"
-                        elif href_val.startswith("http"):
-                            game_url = href_val
-                        
-                        # Extract name from link's inner text or aria-label
-                        name_candidate_elems = link_elem.select('span[data-testid="offer-title-info-title"], div[data-testid="truncate-text-title"], .css-2ucwu, .css-uahz85, span[aria-label]')
-                        for elem in name_candidate_elems:
-                            if elem.text.strip(): name = elem.text.strip(); break
-                        if not name and link_elem.get('aria-label'): name = link_elem.get('aria-label')
-                        if not name and link_elem.text.strip(): name = link_elem.text.strip()
-
-
-                    # If name not found via link, try broader card search
-                    if not name:
-                        name_elems = card.select('span[data-testid="offer-title-info-title"], div[data-testid="truncate-text-title"], .css-2ucwu, .css-uahz85, h3')
-                        for elem in name_elems:
-                            if elem.text.strip(): name = elem.text.strip(); break
-                    
-                    # Image alt text as fallback for name
-                    if not name:
-                        img_alt_elem = card.select_one("img[alt]")
-                        if img_alt_elem and img_alt_elem["alt"].strip():
-                            name = img_alt_elem["alt"].strip().replace("Cover art for ", "").replace("Box art for ", "")
-
-                    if not name: continue # Skip if no name found
-
-                    # Deduplication based on name or URL
-                    dedup_key = game_url if game_url else name.lower()
-                    if dedup_key in seen_names_or_urls: continue
-                    seen_names_or_urls.add(dedup_key)
-
-                    price_elems = card.select('span[data-testid="offer-price"], .css-119zqif, .css-4f2d21, div[data-testid="purchase-price-items"] span')
-                    for elem in price_elems:
-                        if elem.text.strip(): price = elem.text.strip(); break
-                    
-                    img_elem = card.select_one("img[src]")
-                    if img_elem: image = img_elem["src"]
+            for status in self.dataset_status.values()
+        ]
 
-                    game_id = f"epic_trend_{index}"
-                    if game_url:
-                        match = re.search(r"/(?:p|store)/([^/?]+)", game_url)
-                        if match: game_id = match.group(1)
-                    elif name:
-                        game_id = f"epic_trend_{name.lower().replace(' ', '_').replace(':','')}"
+    @staticmethod
+    def _snapshot_fields(result: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "region": result["region"],
+            "locale": result["locale"],
+            "cached": result["cached"],
+            "stale": result["stale"],
+            "cacheAgeSeconds": result["age"],
+            "version": result["version"],
+            # Served from retained snapshots because the server was saturated.
+            **({"degraded": True} if result.get("degraded") else {}),
+            # Loaded from the on-disk checkpoint at startup; not refetched yet.
+            **({"restored": True} if result.get("restored") else {}),
+        }
 
+    def _seed_app_info(self, spec: Dict[str, str], games: List[Dict[str, Any]]) -> None:
+        for game in games:
+            appid = str(game.get("id") or "")
+            if game.get("platform") != "Steam" or not appid.isdigit():
+                continue
+            listing = {f: game[f] for f in APP_LISTING_FIELDS if game.get(f) is not None}
+            self.app_info.set(
+                f"details:{appid}:{spec['cc']}:{spec['steam_language']}",
+                {"id": appid, **listing},
+                level="listing",
+            )
+            reviews = _listing_reviews(game)
+            if reviews:
+                self.app_info.set(f"reviews:{appid}", reviews, level="listing")
+
+    def _record_prices(
+        self, region: str, games: List[Dict[str, Any]], observed_at: Optional[float] = None
+    ) -> None:
+        for game in games:
+            appid = str(game.get("id") or "")
+            amount = game.get("priceAmount")
+            if game.get("platform") != "Steam" or not appid.isdigit() or amount is None:
+                continue
+            original = game.get("originalPriceAmount")
+            discount = game.get("discount")
+            self.prices.observe(
+                appid,
+                region,
+                round(amount * 100),
+                round(original * 100) if original is not None else None,
+                discount if isinstance(discount, int) and discount > 0 else None,
+                game.get("currency"),
+                observed_at,
+            )
 
-                    games.append(
-                        {
-                            "id": game_id,
-                            "name": name,
-                            "price": price,
-                            "platform": "Epic Games",
-                            "url": game_url,
-                            "headerImage": image,
-                            "category": "Trending/Featured",
-                            "isTrending": True,
-                            "source": "epic_store_scrape"
-                        }
-                    )
-                    if len(games) >= 10: break # Limit to 10 distinct games
-                except Exception as e:
-                    print(
-                        f"[{datetime.now()}] EpicGamesService: Error parsing Epic game card: {e}"
+    async def _lookup_apps(
+        self,
+        app_ids: List[str],
+        key_for: Callable[[str], str],
+        fetch: Callable[[aiohttp.ClientSession, str], Any],
+        full: bool,
+    ) -> Dict[str, Any]:
+        """
+        Answers each id from the per-appid cache and fetches the rest
+        concurrently (the host rate limiter spaces them). A fetch may be
+        shared with concurrent callers of the same id (AppInfoCache), so each
+        one opens its own session: a cancelled caller cannot close it under
+        the others.
+        """
+
+        async def fetch_own_session(appid: str) -> Any:
+            # SSL doğrulamasını devre dışı bırak
+            ssl_context = ssl.create_default_context()
+            ssl_context.check_hostname = False
+            ssl_context.verify_mode = ssl.CERT_NONE
+
+            connector = aiohttp.TCPConnector(ssl=ssl_context)
+            async with aiohttp.ClientSession(connector=connector) as session:
+                return await fetch(session, appid)
+
+        min_level = "full" if full else None
+        found: Dict[str, Dict[str, Any]] = {}
+        not_found: List[str] = []
+        errors: Dict[str, str] = {}
+        missing = []
+        for appid in app_ids:
+            entry = self.app_info.get(key_for(appid), min_level)
+            if entry is None:
+                missing.append(appid)
+            elif entry["value"] is None:
+                not_found.append(appid)
+            else:
+                found[appid] = {**entry["value"], "detailLevel": entry["level"]}
+        if missing:
+            outcomes = await asyncio.gather(
+                *(
+                    self.app_info.get_or_fetch(
+                        key_for(appid), lambda appid=appid: fetch_own_session(appid), min_level
                     )
-                    continue
-            if not games:
-                print(
-                    f"[{datetime.now()}] EpicGamesService: No trending games found on Epic Games Store via scraping."
-                )
-            return games
+                    for appid in missing
+                ),
+                return_exceptions=True,
+            )
+            for appid, outcome in zip(missing, outcomes):
+                if isinstance(outcome, Exception):
+                    errors[appid] = str(outcome) or type(outcome).__name__
+                elif outcome[0] is None:
+                    not_found.append(appid)
+                else:
+                    found[appid] = {**outcome[0], "detailLevel": "full"}
+        return {
+            "success": bool(found) or not errors,
+            "count": len(found),
+            "data": [found[appid] for appid in app_ids if appid in found],
+            "notFound": not_found,
+            **({"errors": errors} if errors else {}),
+            "fromCache": len(app_ids) - len(missing),
+            "fetched": len(missing) - len(errors),
+        }
 
+    @traced("app.get_game_details")
+    async def get_game_details(
+        self,
+        app_ids: Any,
+        region: str = DEFAULT_REGION,
+        locale: Optional[str] = None,
+        full: bool = False,
+    ) -> dict:
+        try:
+            ids = normalize_app_ids(app_ids)
+            spec = resolve_region(region, locale)
+        except ValueError as e:
+            return {
+                "success": False,
+                "error": "Invalid request",
+                "message": str(e),
+                "timestamp": datetime.now().isoformat(),
+            }
 
-# --- The GameAnalyticsApp class that server.py expects ---
-class GameAnalyticsApp:
-    def __init__(self):
-        print(f"[{datetime.now()}] GameAnalyticsApp: Initializing services...")
-        self.steam_service = SteamService()
-        self.epic_service = EpicGamesService()
-        self.initialization_time = datetime.now()
-        print(f"[{datetime.now()}] GameAnalyticsApp: Services initialized.")
+        async def fetch_details(session: aiohttp.ClientSession, appid: str) -> Optional[Dict[str, Any]]:
+            record = await self.steam_service.fetch_app_details(session, appid, spec)
+            if record:
+                self._record_prices(spec["cc"], [record])
+            return record
+
+        result = await self._lookup_apps(
+            ids,
+            lambda appid: f"details:{appid}:{spec['cc']}:{spec['steam_language']}",
+            fetch_details,
+            full,
+        )
+        return {
+            **result,
+            "platform": "Steam",
+            "type": "Game Details",
+            "region": spec["cc"],
+            "locale": spec["locale"],
+            "timestamp": datetime.now().isoformat(),
+        }
+
+    @traced("app.get_game_reviews")
+    async def get_game_reviews(self, app_ids: Any, full: bool = False) -> dict:
+        try:
+            ids = normalize_app_ids(app_ids)
+        except ValueError as e:
+            return {
+                "success": False,
+                "error": "Invalid request",
+                "message": str(e),
+                "timestamp": datetime.now().isoformat(),
+            }
+        result = await self._lookup_apps(
+            ids,
+            lambda appid: f"reviews:{appid}",
+            self.steam_service.fetch_app_reviews,
+            full,
+        )
+        return {
+            **result,
+            "platform": "Steam",
+            "type": "Review Summaries",
+            "timestamp": datetime.now().isoformat(),
+        }
+
+    def get_price_history(
+        self,
+        app_ids: Any,
+        region: str = DEFAULT_REGION,
+        max_points: Optional[int] = None,
+    ) -> dict:
+        """
+        Current price vs. the lowest recorded one and the discount timeline
+        (change points only) per app. Only prices this process observed are
+        known: ranking datasets and detail lookups record them.
+        """
+        try:
+            ids = normalize_app_ids(app_ids)
+            cc = resolve_region(region)["cc"]
+        except ValueError as e:
+            return {
+                "success": False,
+                "error": "Invalid request",
+                "message": str(e),
+                "timestamp": datetime.now().isoformat(),
+            }
+        found = {appid: self.prices.history(appid, cc, max_points) for appid in ids}
+        return {
+            "success": True,
+            "platform": "Steam",
+            "type": "Price History",
+            "region": cc,
+            "count": sum(1 for history in found.values() if history),
+            "data": [history for history in found.values() if history],
+            "notTracked": [appid for appid, history in found.items() if not history],
+            "timestamp": datetime.now().isoformat(),
+        }
+
+    def get_historical_lows(
+        self,
+        region: str = DEFAULT_REGION,
+        min_discount: int = 1,
+        at_low_only: bool = True,
+        limit: int = 20,
+    ) -> dict:
+        """Tracked games by current discount, by default only those at their historical low."""
+        try:
+            cc = resolve_region(region)["cc"]
+        except ValueError as e:
+            return {
+                "success": False,
+                "error": "Invalid request",
+                "message": str(e),
+                "timestamp": datetime.now().isoformat(),
+            }
+        games = self.prices.lows(cc, min_discount, at_low_only, max(1, limit))
+        return {
+            "success": True,
+            "platform": "Steam",
+            "type": "Historical Lows" if at_low_only else "Current Discounts",
+            "region": cc,
+            "count": len(games),
+            "data": games,
+            "timestamp": datetime.now().isoformat(),
+        }
 
-    async def get_steam_trending_games(self) -> dict:
+    @traced("app.get_steam_trending_games")
+    async def get_steam_trending_games(
+        self,
+        region: str = DEFAULT_REGION,
+        locale: Optional[str] = None,
+    ) -> dict:
         print(
-            f"[{datetime.now()}] GameAnalyticsApp: Calling steam_service.get_trending_games"
+            f"[{datetime.now()}] GameAnalyticsApp: Calling steam_service.get_trending_games ({region})"
         )
         try:
-            games = await self.steam_service.get_trending_games()
+            result = await self._load_dataset("steam_trending", region, locale)
+            games = result["value"]
             return {
                 "success": True,
                 "platform": "Steam",
                 "type": "Trending Games",
                 "count": len(games),
                 "data": games,
-                "sources_consulted": [ # This is illustrative; actual sources are in game items
-                    "featured_home",
-                    "new_trending_api",
-                    "popular_new_releases_api",
-                    "steamcharts_top",
-                    "steam_global_stats_page",
-                ],
+                # Sources that contributed to the fused ranking (per game: sourceRanks).
+                "sources_consulted": sorted(
+                    {source for game in games for source in game.get("sourceRanks", {})}
+                ),
+                "ranking": {
+                    "method": "weighted reciprocal rank fusion",
+                    "k": self.steam_service.trending_fusion_k,
+                    "weights": self.steam_service.trending_weights,
+                },
+                **self._snapshot_fields(result),
                 "timestamp": datetime.now().isoformat(),
             }
         except Exception as e:
@@ -1048,12 +2460,18 @@ class GameAnalyticsApp:
                 "timestamp": datetime.now().isoformat(),
             }
 
-    async def get_steam_top_sellers(self) -> dict:
+    @traced("app.get_steam_top_sellers")
+    async def get_steam_top_sellers(
+        self,
+        region: str = DEFAULT_REGION,
+        locale: Optional[str] = None,
+    ) -> dict:
         print(
-            f"[{datetime.now()}] GameAnalyticsApp: Calling steam_service.get_top_sellers"
+            f"[{datetime.now()}] GameAnalyticsApp: Calling steam_service.get_top_sellers ({region})"
         )
         try:
-            games = await self.steam_service.get_top_sellers()
+            result = await self._load_dataset("steam_top_sellers", region, locale)
+            games = result["value"]
             return {
                 "success": True,
                 "platform": "Steam",
@@ -1061,6 +2479,7 @@ class GameAnalyticsApp:
                 "count": len(games),
                 "data": games,
                 "source_type": "top_sellers_api", # Illustrative
+                **self._snapshot_fields(result),
                 "timestamp": datetime.now().isoformat(),
             }
         except Exception as e:
@@ -1074,12 +2493,14 @@ class GameAnalyticsApp:
                 "timestamp": datetime.now().isoformat(),
             }
 
+    @traced("app.get_steam_most_played")
     async def get_steam_most_played(self) -> dict:
         print(
             f"[{datetime.now()}] GameAnalyticsApp: Calling steam_service.get_current_player_stats"
         )
         try:
-            games = await self.steam_service.get_current_player_stats()
+            result = await self._load_dataset("steam_most_played")
+            games = result["value"]
             return {
                 "success": True,
                 "platform": "Steam",
@@ -1087,6 +2508,7 @@ class GameAnalyticsApp:
                 "count": len(games),
                 "data": games,
                 "sources_consulted": ["steamcharts_live", "steam_stats_page_alt"], # Illustrative
+                **self._snapshot_fields(result),
                 "timestamp": datetime.now().isoformat(),
             }
         except Exception as e:
@@ -1100,12 +2522,18 @@ class GameAnalyticsApp:
                 "timestamp": datetime.now().isoformat(),
             }
 
-    async def get_epic_free_games(self) -> dict:
+    @traced("app.get_epic_free_games")
+    async def get_epic_free_games(
+        self,
+        region: str = DEFAULT_REGION,
+        locale: Optional[str] = None,
+    ) -> dict:
         print(
-            f"[{datetime.now()}] GameAnalyticsApp: Calling epic_service.get_free_games"
+            f"[{datetime.now()}] GameAnalyticsApp: Calling epic_service.get_free_games ({region})"
         )
         try:
-            games = await self.epic_service.get_free_games()
+            result = await self._load_dataset("epic_free_games", region, locale)
+            games = result["value"]
             return {
                 "success": True,
                 "platform": "Epic Games",
@@ -1113,6 +2541,7 @@ class GameAnalyticsApp:
                 "count": len(games),
                 "data": games,
                 "source_type": "epic_free_games_api", # Illustrative
+                **self._snapshot_fields(result),
                 "timestamp": datetime.now().isoformat(),
             }
         except Exception as e:
@@ -1126,19 +2555,66 @@ class GameAnalyticsApp:
                 "timestamp": datetime.now().isoformat(),
             }
 
-    async def get_epic_trending_games(self) -> dict:
+    def get_epic_free_games_at(
+        self, at: Optional[str] = None, region: str = DEFAULT_REGION
+    ) -> dict:
+        """
+        Epic games free at time `at` (ISO 8601, naive = UTC; default now),
+        answered from the promotion calendar of the last free-games fetch for
+        the region; never calls Epic.
+        """
+        try:
+            cc = resolve_region(region)["cc"]
+            moment = time.time() if at is None else parse_time(at)
+            if moment is None:
+                raise ValueError(f"Invalid time: {at!r} (expected ISO 8601, e.g. '2025-01-02T16:00:00Z')")
+        except ValueError as e:
+            return {
+                "success": False,
+                "error": "Invalid request",
+                "message": str(e),
+                "timestamp": datetime.now().isoformat(),
+            }
+        schedule = self.promotions.free_at(cc, moment)
+        if schedule is None:
+            return {
+                "success": False,
+                "error": "No promotion calendar",
+                "message": f"Epic free games for {cc} have not been fetched yet; call get_epic_free_games first",
+                "timestamp": datetime.now().isoformat(),
+            }
+        return {
+            "success": True,
+            "platform": "Epic Games",
+            "type": "Free Games At",
+            "region": cc,
+            "count": len(schedule["games"]),
+            "data": schedule.pop("games"),
+            **schedule,
+            "timestamp": datetime.now().isoformat(),
+        }
+
+    @traced("app.get_epic_trending_games")
+    async def get_epic_trending_games(
+        self,
+        region: str = DEFAULT_REGION,
+        locale: Optional[str] = None,
+    ) -> dict:
         print(
-            f"[{datetime.now()}] GameAnalyticsApp: Calling epic_service.get_trending_games"
+            f"[{datetime.now()}] GameAnalyticsApp: Calling epic_service.get_trending_games ({region})"
         )
         try:
-            games = await self.epic_service.get_trending_games()
+            result = await self._load_dataset("epic_trending_games", region, locale)
+            games = result["value"]
             return {
                 "success": True,
                 "platform": "Epic Games",
                 "type": "Trending Games",
                 "count": len(games),
                 "data": games,
-                "source_type": "epic_store_scrape", # Illustrative
+                # epic_catalog_api normally, epic_store_scrape when the HTML fallback ran
+                "source_type": games[0].get("source") if games else None,
+                **self._snapshot_fields(result),
                 "timestamp": datetime.now().isoformat(),
             }
         except Exception as e:
@@ -1152,20 +2628,25 @@ class GameAnalyticsApp:
                 "timestamp": datetime.now().isoformat(),
             }
 
-    async def get_all_trending_games(self) -> dict:
+    @traced("app.get_all_trending_games")
+    async def get_all_trending_games(
+        self,
+        region: str = DEFAULT_REGION,
+        locale: Optional[str] = None,
+    ) -> dict:
         print(
-            f"[{datetime.now()}] GameAnalyticsApp: Calling get_all_trending_games"
+            f"[{datetime.now()}] GameAnalyticsApp: Calling get_all_trending_games ({region})"
         )
         results_template = {
             "success": False, "data": [], "error": None, "message": None, "count": 0, "platform": None, "type": None
         }
         
         steam_trending_res, steam_top_sellers_res, steam_most_played_res, epic_free_res, epic_trending_res = await asyncio.gather(
-            self.get_steam_trending_games(),
-            self.get_steam_top_sellers(),
+            self.get_steam_trending_games(region, locale),
+            self.get_steam_top_sellers(region, locale),
             self.get_steam_most_played(),
-            self.get_epic_free_games(),
-            self.get_epic_trending_games(),
+            self.get_epic_free_games(region, locale),
+            self.get_epic_trending_games(region, locale),
             return_exceptions=True,
         )
         
@@ -1204,28 +2685,530 @@ class GameAnalyticsApp:
         return {
             "success": overall_success,
             "timestamp": datetime.now().isoformat(),
+            "region": region,
             "data": all_data,
             "partial_failures_occurred": partial_failures
         }
 
+    def _plan_section(self, dataset: str, spec: Dict[str, str], max_age: Optional[float]) -> Dict[str, Any]:
+        """
+        How a section will be answered: "cache" (cached snapshot within
+        max_age), "retained" (expired from the cache, but the last retained
+        snapshot is within max_age), "refresh" (cached but older than
+        max_age) or "fetch". Only the last two call an upstream.
+        """
+        key = (
+            self.cache.make_key(dataset, spec["cc"], spec["locale"])
+            if DATASET_REGIONAL[dataset]
+            else self.cache.make_key(dataset)
+        )
+        now = time.time()
+        entry = self.cache.get(key)
+        if entry is not None:
+            age = round(now - entry["stored_at"], 3)
+            if max_age is None or age <= max_age:
+                return {"action": "cache", "ageSeconds": age}
+            return {"action": "refresh", "ageSeconds": age}
+        last_success = self.dataset_status.get(key, {}).get("lastSuccess")
+        if (
+            max_age is not None
+            and last_success
+            and now - last_success <= max_age
+            and self.history.latest_version(key) is not None
+        ):
+            return {"action": "retained", "ageSeconds": round(now - last_success, 3), "key": key}
+        return {"action": "fetch", "ageSeconds": None}
+
+    async def _run_section(
+        self,
+        dataset: str,
+        spec: Dict[str, str],
+        plan: Dict[str, Any],
+    ) -> Dict[str, Any]:
+        region = spec["cc"] if DATASET_REGIONAL[dataset] else None
+        if plan["action"] == "retained":
+            key = plan["key"]
+            version = self.history.latest_version(key)
+            return {
+                "value": self.history.get(key, version),
+                "cached": True,
+                "age": plan["ageSeconds"],
+                "stale": True,
+                "key": key,
+                "version": version,
+                "region": region or "global",
+                "locale": spec["locale"] if region else None,
+            }
+        return await self._load_dataset(
+            dataset, region, spec["locale"], refresh=plan["action"] == "refresh"
+        )
+
+    @traced("app.get_trending_sections")
+    async def get_trending_sections(
+        self,
+        sections: Optional[List[str]] = None,
+        region: str = DEFAULT_REGION,
+        locale: Optional[str] = None,
+        limits: Optional[Dict[str, int]] = None,
+        max_ages: Optional[Dict[str, float]] = None,
+        plan_only: bool = False,
+    ) -> dict:
+        """
+        Selective get_all_trending_games: only the requested sections (default
+        DEFAULT_SECTIONS), each with its own row limit and maximum acceptable
+        age ("*" applies to every section). Sections are planned first (see
+        _plan_section) and everything that needs an upstream runs
+        concurrently; concurrent calls share in-flight fetches of the same
+        snapshot through the cache.
+        """
+        sections = list(dict.fromkeys(sections or DEFAULT_SECTIONS))
+        limits, max_ages = limits or {}, max_ages or {}
+        unknown = sorted(
+            {name for name in [*sections, *limits, *max_ages] if name not in DATASET_REGIONAL and name != "*"}
+        )
+        try:
+            if unknown:
+                raise ValueError(
+                    f"Unknown section: {', '.join(unknown)} (expected {', '.join(DATASET_REGIONAL)})"
+                )
+            spec = resolve_region(region, locale)
+        except ValueError as e:
+            return {
+                "success": False,
+                "error": "Invalid request",
+                "message": str(e),
+                "timestamp": datetime.now().isoformat(),
+            }
+        plans = {
+            dataset: self._plan_section(dataset, spec, max_ages.get(dataset, max_ages.get("*")))
+            for dataset in sections
+        }
+        upstream = [dataset for dataset, plan in plans.items() if plan["action"] in ("fetch", "refresh")]
+        plan_report = {
+            dataset: {k: v for k, v in plan.items() if k != "key"} for dataset, plan in plans.items()
+        }
+        if plan_only:
+            return {
+                "success": True,
+                "region": spec["cc"],
+                "plan": plan_report,
+                "upstreamSections": upstream,
+                "timestamp": datetime.now().isoformat(),
+            }
+
+        results = await asyncio.gather(
+            *(self._run_section(dataset, spec, plans[dataset]) for dataset in sections),
+            return_exceptions=True,
+        )
+        data = {}
+        partial_failures = False
+        for dataset, result in zip(sections, results):
+            platform, type_name = DATASET_LABELS[dataset]
+            if isinstance(result, Exception):
+                partial_failures = True
+                data[dataset] = {
+                    "success": False,
+                    "platform": platform,
+                    "type": type_name,
+                    "error": f"Failed to fetch {platform} {type_name}",
+                    "message": str(result),
+                }
+                continue
+            limit = limits.get(dataset, limits.get("*"))
+            rows = result["value"][: max(0, limit)] if limit is not None else result["value"]
+            data[dataset] = {
+                "success": True,
+                "platform": platform,
+                "type": type_name,
+                "count": len(rows),
+                "data": rows,
+                **self._snapshot_fields(result),
+            }
+        return {
+            "success": not partial_failures,
+            "region": spec["cc"],
+            "data": data,
+            "plan": plan_report,
+            "upstreamSections": upstream,
+            "partial_failures_occurred": partial_failures,
+            "timestamp": datetime.now().isoformat(),
+        }
+
+    async def get_dataset(
+        self, dataset: str, region: str = DEFAULT_REGION, locale: Optional[str] = None
+    ) -> dict:
+        """Returns the same payload as the dataset's own tool method."""
+        if dataset == "steam_most_played":
+            return await self.get_steam_most_played()
+        getters = {
+            "steam_trending": self.get_steam_trending_games,
+            "steam_top_sellers": self.get_steam_top_sellers,
+            "epic_free_games": self.get_epic_free_games,
+            "epic_trending_games": self.get_epic_trending_games,
+        }
+        if dataset not in getters:
+            return {
+                "success": False,
+                "error": f"Unknown dataset: {dataset}",
+                "message": f"Expected one of: {', '.join(DATASET_REGIONAL)}",
+                "timestamp": datetime.now().isoformat(),
+            }
+        return await getters[dataset](region, locale)
+
+    async def get_dataset_snapshot(
+        self, dataset: str, region: str = DEFAULT_REGION, locale: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Latest snapshot of a dataset for the /snapshots route: the stored rows
+        of the current version plus its content hash, so the rendered body is
+        identical for every request until the content changes (ETag and the
+        cached compressed variants are keyed by it).
+        """
+        if dataset not in DATASET_REGIONAL:
+            return {
+                "success": False,
+                "error": f"Unknown dataset: {dataset}",
+                "message": f"Expected one of: {', '.join(DATASET_REGIONAL)}",
+                "timestamp": datetime.now().isoformat(),
+            }
+        try:
+            result = await self._load_dataset(dataset, region, locale)
+        except Exception as e:
+            return {
+                "success": False,
+                "error": f"Failed to load {dataset}",
+                "message": str(e),
+                "timestamp": datetime.now().isoformat(),
+            }
+        key, version = result["key"], result["version"]
+        return {
+            "success": True,
+            "dataset": dataset,
+            "key": key,
+            "digest": self.history.latest_digest(key),
+            "rows": self.history.get(key, version) or result["value"],
+            **self._snapshot_fields(result),
+        }
+
+    @traced("app.get_dataset_changes")
+    async def get_dataset_changes(
+        self,
+        dataset: str,
+        since: Optional[str] = None,
+        region: str = DEFAULT_REGION,
+        locale: Optional[str] = None,
+    ) -> dict:
+        """
+        Delta variant of the single-dataset tools: returns only added/removed/
+        changed entries since the `since` cursor, "not_modified" when nothing
+        changed, or the full list when the cursor is absent or unknown.
+        """
+        print(
+            f"[{datetime.now()}] GameAnalyticsApp: Calling get_dataset_changes ({dataset}, since={since})"
+        )
+        if dataset not in DATASET_REGIONAL:
+            return {
+                "success": False,
+                "error": f"Unknown dataset: {dataset}",
+                "message": f"Expected one of: {', '.join(DATASET_REGIONAL)}",
+                "timestamp": datetime.now().isoformat(),
+            }
+        try:
+            result = await self._load_dataset(dataset, region, locale)
+            delta = self.history.changes_since(
+                result["key"], since, result["value"], result["version"]
+            )
+            return {
+                "success": True,
+                "dataset": dataset,
+                **self._snapshot_fields(result),
+                **delta,
+                "timestamp": datetime.now().isoformat(),
+            }
+        except Exception as e:
+            print(
+                f"[{datetime.now()}] GameAnalyticsApp: Error in get_dataset_changes: {e}"
+            )
+            return {
+                "success": False,
+                "error": f"Failed to compute changes for {dataset}",
+                "message": str(e),
+                "timestamp": datetime.now().isoformat(),
+            }
+
+    @traced("app.get_trending_movers", rows_attribute=False)
+    async def get_trending_movers(
+        self,
+        metric: str = "players",
+        region: str = DEFAULT_REGION,
+        limit: int = 20,
+        window: int = 12,
+        lookback: int = 1,
+    ) -> dict:
+        """
+        Top games by momentum from the retained player-count ("players") or
+        top-seller rank ("rank") series. The dataset is loaded first (usually
+        from the cache) so the latest snapshot is included.
+        """
+        print(
+            f"[{datetime.now()}] GameAnalyticsApp: Calling get_trending_movers ({metric}, {region})"
+        )
+        datasets = {metric_name: name for name, (metric_name, _) in TRACKED_DATASETS.items()}
+        if metric not in datasets:
+            return {
+                "success": False,
+                "error": f"Unknown metric: {metric}",
+                "message": f"Expected one of: {', '.join(datasets)}",
+                "timestamp": datetime.now().isoformat(),
+            }
+        dataset = datasets[metric]
+        try:
+            result = await self._load_dataset(dataset, region)
+            movers = await asyncio.to_thread(
+                self.trends.top_movers, metric, result["region"], limit, window, lookback
+            )
+        except Exception as e:
+            print(f"[{datetime.now()}] GameAnalyticsApp: Error in get_trending_movers: {e}")
+            return {
+                "success": False,
+                "error": f"Failed to score {metric} momentum",
+                "message": str(e),
+                "timestamp": datetime.now().isoformat(),
+            }
+        return {
+            "success": True,
+            "metric": metric,
+            "dataset": dataset,
+            "region": result["region"],
+            "window": window,
+            "lookback": lookback,
+            "count": len(movers["movers"]),
+            **{key: value for key, value in movers.items() if key != "movers"},
+            "data": movers["movers"],
+            **(
+                {"notes": "Needs at least two fresh fetches; one observation is added per cache refresh (CACHE_TTL_SECONDS)."}
+                if movers["snapshots"] < 2
+                else {}
+            ),
+            "timestamp": datetime.now().isoformat(),
+        }
+
+    @traced("app.export_snapshots", rows_attribute=False)
+    async def export_snapshots(
+        self,
+        fmt: str = "ndjson",
+        datasets: Optional[List[str]] = None,
+        include_history: bool = True,
+        refresh: bool = False,
+        regions: Optional[List[str]] = None,
+    ) -> dict:
+        """
+        Writes retained snapshots (every retained version, or only the latest
+        with include_history=False) to an NDJSON or Parquet file. refresh=True
+        first loads the requested datasets for `regions` through the cache.
+        """
+        print(f"[{datetime.now()}] GameAnalyticsApp: Calling export_snapshots ({fmt})")
+        unknown = [name for name in datasets or [] if name not in DATASET_REGIONAL]
+        if unknown or fmt not in EXPORT_FORMATS:
+            return {
+                "success": False,
+                "error": f"Unknown dataset: {', '.join(unknown)}" if unknown else f"Unknown format: {fmt}",
+                "message": f"Datasets: {', '.join(DATASET_REGIONAL)}; formats: {', '.join(EXPORT_FORMATS)}",
+                "timestamp": datetime.now().isoformat(),
+            }
+        wanted = set(datasets or DATASET_REGIONAL)
+        if refresh:
+            await asyncio.gather(
+                *(
+                    self._load_dataset(name, region)
+                    for name in wanted
+                    for region in ((regions or [DEFAULT_REGION]) if DATASET_REGIONAL[name] else [None])
+                ),
+                return_exceptions=True,
+            )
+        # Collected on the loop thread (references only); serialized in a worker thread.
+        snapshots = [
+            snapshot
+            for snapshot in self.history.snapshots(latest_only=not include_history)
+            if snapshot[0].split(":", 1)[0] in wanted
+        ]
+        try:
+            result = await asyncio.to_thread(self.exporter.export, fmt, snapshots)
+        except Exception as e:
+            print(f"[{datetime.now()}] GameAnalyticsApp: Error in export_snapshots: {e}")
+            return {
+                "success": False,
+                "error": "Failed to write export",
+                "message": str(e),
+                "timestamp": datetime.now().isoformat(),
+            }
+        return {
+            "success": True,
+            **result,
+            "datasets": sorted({snapshot[0].split(":", 1)[0] for snapshot in snapshots}),
+            "includeHistory": include_history,
+            "timestamp": datetime.now().isoformat(),
+        }
+
+    @traced("app.get_all_trending_changes")
+    async def get_all_trending_changes(
+        self,
+        since: Optional[str] = None,
+        region: str = DEFAULT_REGION,
+        locale: Optional[str] = None,
+    ) -> dict:
+        """
+        Delta variant of get_all_trending_games. The cursor bundles one cursor
+        per dataset; the response is "not_modified" only if no dataset changed.
+        """
+        datasets = list(DATASET_REGIONAL)
+        section_cursors = (since or "").split("+") if since else []
+        if len(section_cursors) != len(datasets):
+            section_cursors = [None] * len(datasets)
+
+        results = await asyncio.gather(
+            *(
+                self.get_dataset_changes(name, cursor, region, locale)
+                for name, cursor in zip(datasets, section_cursors)
+            )
+        )
+        sections = dict(zip(datasets, results))
+        statuses = {r.get("status") for r in results if r.get("success")}
+        all_ok = all(r.get("success") for r in results)
+        cursor = (
+            "+".join(r["cursor"] for r in results) if all_ok else None
+        )
+        return {
+            "success": all_ok,
+            "status": "not_modified" if all_ok and statuses == {"not_modified"} else "changed",
+            "cursor": cursor,
+            "since": since,
+            # Unchanged sections are reduced to their status marker.
+            "data": {
+                name: (
+                    {"status": "not_modified", "version": r["version"]}
+                    if r.get("status") == "not_modified"
+                    else r
+                )
+                for name, r in sections.items()
+            },
+            "partial_failures_occurred": not all_ok,
+            "timestamp": datetime.now().isoformat(),
+        }
+
+    @traced("app.get_multi_region_data")
+    async def get_multi_region_data(
+        self,
+        dataset: str,
+        regions: List[str],
+        locale: Optional[str] = None,
+    ) -> dict:
+        """
+        Fetches one dataset for several regions concurrently. Requests still go
+        through the shared per-host limiter, region-independent datasets are
+        fetched once, and game metadata is returned once in "sharedMetadata"
+        while each region only carries its storefront fields (price, rank...).
+        """
+        print(
+            f"[{datetime.now()}] GameAnalyticsApp: Calling get_multi_region_data ({dataset}, {regions})"
+        )
+        if dataset not in DATASET_REGIONAL:
+            return {
+                "success": False,
+                "error": f"Unknown dataset: {dataset}",
+                "message": f"Expected one of: {', '.join(DATASET_REGIONAL)}",
+                "timestamp": datetime.now().isoformat(),
+            }
+        requested = list(dict.fromkeys(r.strip().upper() for r in regions if r and r.strip()))
+        if not requested or len(requested) > MAX_BATCH_REGIONS:
+            return {
+                "success": False,
+                "error": "Invalid region list",
+                "message": f"Provide between 1 and {MAX_BATCH_REGIONS} region codes.",
+                "timestamp": datetime.now().isoformat(),
+            }
+
+        regional = DATASET_REGIONAL[dataset]
+        if regional:
+            results = await asyncio.gather(
+                *(self._load_dataset(dataset, r, locale) for r in requested),
+                return_exceptions=True,
+            )
+        else:
+            # Same upstream data for every region: fetch once and fan it out.
+            try:
+                shared = await self._load_dataset(dataset)
+                results = [shared] * len(requested)
+            except Exception as e:
+                results = [e] * len(requested)
+
+        shared_metadata: Dict[str, Dict[str, Any]] = {}
+        per_region = {}
+        partial_failures = False
+        for region, result in zip(requested, results):
+            if isinstance(result, Exception):
+                partial_failures = True
+                per_region[region] = {
+                    "success": False,
+                    "error": f"Failed to fetch {dataset} for {region}",
+                    "message": str(result),
+                }
+                continue
+            rows = []
+            for game in result["value"]:
+                row = {k: v for k, v in game.items() if k not in REGION_INDEPENDENT_FIELDS}
+                if game.get("id") is not None and str(game["id"]) not in shared_metadata:
+                    shared_metadata[str(game["id"])] = {
+                        f: game[f] for f in REGION_INDEPENDENT_FIELDS if f in game
+                    }
+                rows.append(row)
+            per_region[region] = {
+                "success": True,
+                "count": len(rows),
+                "data": rows,
+                **self._snapshot_fields(result),
+            }
+
+        return {
+            "success": not partial_failures,
+            "dataset": dataset,
+            "regionIndependent": not regional,
+            "regions": per_region,
+            "sharedMetadata": shared_metadata,
+            "partial_failures_occurred": partial_failures,
+            "timestamp": datetime.now().isoformat(),
+        }
+
 
     def get_api_health(self) -> dict:  # This can be synchronous
+        """
+        Reports cached health signals only (background probe results, loop
+        lag, in-flight counts, dataset freshness); nothing here touches an
+        upstream, so it is safe to poll from a load balancer.
+        """
         print(f"[{datetime.now()}] GameAnalyticsApp: Calling get_api_health")
+        health = self.health.summary(rate_limiter_stats=self.rate_limiter.stats())
         return {
-            "status": "healthy",
+            "status": health.pop("status"),
+            "ready": health.pop("ready"),
+            "reasons": health.pop("reasons"),
             "timestamp": datetime.now().isoformat(),
             "app_initialization_time": self.initialization_time.isoformat(),
-            "version": "2.2.1", # Version bump
+            "version": "2.3.0",
             "description": "Gaming Trend Analytics - GameAnalyticsApp Instance",
-            "services_status": {
-                "steam_service": "initialized"
-                if hasattr(self, "steam_service")
-                else "not_initialized",
-                "epic_service": "initialized"
-                if hasattr(self, "epic_service")
-                else "not_initialized",
-            },
-            "notes": "Health check for the GameAnalyticsApp instance. All tool logic is delegated from server.py to this app instance.",
+            **health,
+            "datasets": self._dataset_freshness(),
+            "trend_series": self.trends.stats(),
+            "cache": self.cache.stats(),
+            "app_info_cache": self.app_info.stats(),
+            "price_history": self.prices.stats(),
+            "epic_promotion_calendar": self.promotions.stats(),
+            "checkpoints": self.checkpoints.stats(),
+            "startup": STARTUP.report(),
+            "epic_trending_paths": self.epic_service.get_path_stats(),
+            "steam_streamed_sources": self.steam_service.stream_stats,
+            "tracing": TRACER.stats(),
+            "notes": "status/ready come from background upstream probes and event-loop lag; see /health/live and /health/ready for orchestrator checks.",
         }
 
-# No MCP instance or tool definitions here. This file is imported by server.py.
\ No newline at end of file
+# No MCP instance or tool definitions here. This file is imported by server.py.
@@ -0,0 +1,252 @@
+# benchmarks/bench_compression.py
+"""
+Measures response compression (compression.py): bytes on the wire and
+compression CPU per request for each available encoding.
+
+    python benchmarks/bench_compression.py                  # simulator + server.py, 20 requests per case
+    python benchmarks/bench_compression.py --requests 50 --levels 1,3,6,9
+
+Starts the upstream simulator and a server.py subprocess, then for every
+Accept-Encoding (identity and each codec the server has) measures:
+
+- the MCP transport: tools/call get_all_trending_games over a raw session
+  (server-sent events, compressed per chunk by CompressionMiddleware)
+- the snapshot route: GET /snapshots/steam_top_sellers/US (compressed once
+  per snapshot version, then served from the cache)
+
+Wire bytes are read with decompression off; compression time per request
+is taken from the server's get_api_health counters. A second table
+compresses the captured aggregate payload in-process at several levels
+(CPU time of one compression, median of --repeat) and shows the cost of a
+cached hit for comparison.
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+import zlib
+from typing import Any, Dict, List, Optional, Tuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+
+import aiohttp  # noqa: E402
+
+from compression import ResponseCompressor  # noqa: E402
+from load_test import wait_for_port  # noqa: E402
+from upstream_sim import start_simulator  # noqa: E402
+
+MCP_HEADERS = {"Accept": "application/json, text/event-stream", "Content-Type": "application/json"}
+
+
+def decode(body: bytes, encoding: Optional[str]) -> bytes:
+    if not encoding:
+        return body
+    if encoding == "gzip":
+        return zlib.decompress(body, 31)
+    if encoding == "br":
+        import brotli
+
+        return brotli.decompress(body)
+    if encoding == "zstd":
+        import zstandard
+
+        return zstandard.ZstdDecompressor().decompressobj().decompress(body)
+    raise ValueError(f"unknown encoding {encoding}")
+
+
+def sse_result(text: str) -> Dict[str, Any]:
+    """The JSON-RPC message of a single-event SSE body (or a plain JSON body)."""
+    for line in text.splitlines():
+        if line.startswith("data: "):
+            return json.loads(line[6:])
+    return json.loads(text)
+
+
+class McpSession:
+    """Minimal streamable-HTTP MCP session that keeps the raw response bytes."""
+
+    def __init__(self, http: aiohttp.ClientSession, url: str, accept_encoding: str):
+        self.http = http
+        self.url = url
+        self.headers = {**MCP_HEADERS, "Accept-Encoding": accept_encoding}
+        self.next_id = 1
+
+    async def _post(self, message: Dict[str, Any]) -> Tuple[Optional[Dict[str, Any]], int, int, Optional[str]]:
+        async with self.http.post(self.url, json=message, headers=self.headers) as resp:
+            wire = await resp.read()
+            if "mcp-session-id" in resp.headers:
+                self.headers["mcp-session-id"] = resp.headers["mcp-session-id"]
+            encoding = resp.headers.get("Content-Encoding")
+        if not wire:
+            return None, 0, 0, encoding
+        raw = decode(wire, encoding)
+        return sse_result(raw.decode()), len(wire), len(raw), encoding
+
+    async def request(self, method: str, params: Dict[str, Any]):
+        message = {"jsonrpc": "2.0", "id": self.next_id, "method": method, "params": params}
+        self.next_id += 1
+        return await self._post(message)
+
+    async def open(self) -> None:
+        await self.request(
+            "initialize",
+            {
+                "protocolVersion": "2025-06-18",
+                "capabilities": {},
+                "clientInfo": {"name": "bench_compression", "version": "1"},
+            },
+        )
+        await self._post({"jsonrpc": "2.0", "method": "notifications/initialized"})
+
+    async def call_tool(self, name: str, arguments: Dict[str, Any]):
+        return await self.request("tools/call", {"name": name, "arguments": arguments})
+
+
+async def compression_counters(session: McpSession) -> Dict[str, Dict[str, float]]:
+    message, _, _, _ = await session.call_tool("get_api_health", {})
+    return message["result"]["structuredContent"]["compression"]["byEncoding"]
+
+
+def counter_delta(before: Dict, after: Dict, encoding: Optional[str]) -> Tuple[float, int]:
+    """(compression seconds, compressed responses) between two health readings."""
+    if not encoding:
+        return 0.0, 0
+    old, new = before.get(encoding, {}), after.get(encoding, {})
+    seconds = new.get("compressSeconds", 0.0) - old.get("compressSeconds", 0.0)
+    responses = sum(new.get(k, 0) - old.get(k, 0) for k in ("responses", "streamedResponses"))
+    return seconds, responses
+
+
+def print_row(label: str, encoding: str, wire: List[int], raw: List[int], latencies: List[float], cpu_ms: float) -> None:
+    ratio = statistics.mean(wire) / statistics.mean(raw) if raw and statistics.mean(raw) else 1.0
+    print(
+        f"  {label:<28} {encoding:<9} wire={statistics.mean(wire):>9.0f} B  raw={statistics.mean(raw):>9.0f} B"
+        f"  ratio={ratio:.3f}  compress={cpu_ms:.3f} ms/req  p50={statistics.median(latencies):.1f} ms"
+    )
+
+
+async def wire_benchmark(base_url: str, encodings: List[str], requests: int) -> bytes:
+    """Runs the wire measurements; returns the aggregate payload for the in-process table."""
+    payload = b""
+    async with aiohttp.ClientSession(auto_decompress=False) as http:
+        probe = McpSession(http, f"{base_url}/mcp", "identity")
+        await probe.open()
+        # Warm the snapshot cache so every case compresses the same data.
+        message, _, _, _ = await probe.call_tool("get_all_trending_games", {})
+        payload = json.dumps(message["result"]["structuredContent"]).encode()
+        await http.get(f"{base_url}/snapshots/steam_top_sellers/US")
+        for accept in ["identity", *encodings]:
+            session = McpSession(http, f"{base_url}/mcp", accept)
+            await session.open()
+            before = await compression_counters(probe)
+            wire, raw, latencies, served = [], [], [], None
+            for _ in range(requests):
+                started = time.perf_counter()
+                message, wire_bytes, raw_bytes, served = await session.call_tool("get_all_trending_games", {})
+                if not message["result"]["structuredContent"].get("success"):
+                    raise RuntimeError(f"get_all_trending_games failed: {message['result']['structuredContent']}")
+                latencies.append((time.perf_counter() - started) * 1000)
+                wire.append(wire_bytes)
+                raw.append(raw_bytes)
+            seconds, responses = counter_delta(before, await compression_counters(probe), served)
+            print_row("mcp get_all_trending_games", served or "identity", wire, raw, latencies,
+                      1000 * seconds / max(1, responses))
+
+            before = await compression_counters(probe)
+            wire, raw, latencies, served = [], [], [], None
+            for _ in range(requests):
+                started = time.perf_counter()
+                async with http.get(
+                    f"{base_url}/snapshots/steam_top_sellers/US", headers={"Accept-Encoding": accept}
+                ) as resp:
+                    body = await resp.read()
+                    served = resp.headers.get("Content-Encoding")
+                latencies.append((time.perf_counter() - started) * 1000)
+                wire.append(len(body))
+                raw.append(len(decode(body, served)))
+            seconds, responses = counter_delta(before, await compression_counters(probe), served)
+            print_row("GET /snapshots (cached)", served or "identity", wire, raw, latencies,
+                      1000 * seconds / max(1, responses))
+    return payload
+
+
+def cpu_ms(fn, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        started = time.process_time()
+        fn()
+        samples.append((time.process_time() - started) * 1000)
+    return statistics.median(samples)
+
+
+def codec_benchmark(payload: bytes, compressor: ResponseCompressor, levels: List[int], repeat: int) -> None:
+    print(f"\nin-process, aggregate payload of {len(payload)} bytes (CPU ms per compression):")
+    limits = {"gzip": 9, "br": 11, "zstd": 22}
+    for name, codec in compressor.codecs.items():
+        for level in sorted({min(level, limits[name]) for level in levels}):
+            compressed = codec.compress(payload, level)
+            print(
+                f"  {name:<5} level={level:<3} size={len(compressed):>8} B  ratio={len(compressed) / len(payload):.3f}"
+                f"  compress={cpu_ms(lambda: codec.compress(payload, level), repeat):.3f} ms"
+                f"  decompress={cpu_ms(lambda: decode(compressed, name), repeat):.3f} ms"
+            )
+    encoding = next(iter(compressor.codecs))
+    asyncio.run(compressor.compress_body(encoding, payload))
+    hit = cpu_ms(lambda: asyncio.run(compressor.compress_body(encoding, payload)), repeat)
+    print(f"  cached hit ({encoding}, includes body digest and event-loop setup): {hit:.3f} ms")
+
+
+async def main_async(args: argparse.Namespace, encodings: List[str]) -> bytes:
+    simulator, runner = await start_simulator("127.0.0.1", args.sim_port, {}, args.seed)
+    env = {
+        **os.environ,
+        "UPSTREAM_SIMULATOR_URL": f"http://127.0.0.1:{args.sim_port}",
+        "HOST": "127.0.0.1",
+        "PORT": str(args.server_port),
+        "HEALTH_PROBE_INTERVAL": "0",
+        "CHECKPOINT_INTERVAL_SECONDS": "0",
+        "QUOTA_CLIENT_PER_MINUTE": "100000",
+        "QUOTA_CLIENT_BURST": "100000",
+        "QUOTA_TOOL_LIMITS": "get_all_trending_games=100000/100000",
+    }
+    server = subprocess.Popen(
+        [sys.executable, os.path.join(ROOT, "server.py")],
+        env=env,
+        stdout=subprocess.DEVNULL if not args.server_logs else None,
+        stderr=subprocess.DEVNULL if not args.server_logs else None,
+    )
+    try:
+        await wait_for_port("127.0.0.1", args.server_port, 30)
+        base_url = f"http://127.0.0.1:{args.server_port}"
+        print(f"{args.requests} requests per case against {base_url}:")
+        return await wire_benchmark(base_url, encodings, args.requests)
+    finally:
+        server.terminate()
+        server.wait(timeout=10)
+        await runner.cleanup()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--requests", type=int, default=20, help="requests per encoding and path")
+    parser.add_argument("--levels", default="1,3,6,9", help="levels for the in-process table")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--sim-port", type=int, default=8900)
+    parser.add_argument("--server-port", type=int, default=8902)
+    parser.add_argument("--server-logs", action="store_true")
+    args = parser.parse_args()
+
+    compressor = ResponseCompressor(cache_bytes=64 * 1024 * 1024)
+    payload = asyncio.run(main_async(args, list(compressor.codecs)))
+    codec_benchmark(payload, compressor, [int(level) for level in args.levels.split(",")], args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+# benchmarks/bench_epic_trending.py
+"""
+Compares the two Epic trending data paths: the catalog search JSON backend
+("catalog_api") and the browse-page HTML scrape ("html_scrape").
+
+    python benchmarks/bench_epic_trending.py            # parse recorded fixtures
+    python benchmarks/bench_epic_trending.py --live     # fetch from Epic as well
+
+Fixture mode measures payload bytes and parse time on the files in
+benchmarks/fixtures/ (a catalog response and a browse page with the same
+cards; the page's inline state script is synthetic filler standing in for
+the real page weight). Live mode calls each path against the store and
+reports the service's per-path latency/bytes counters.
+"""
+import argparse
+import asyncio
+import json
+import os
+import ssl
+import statistics
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from app import EpicGamesService, resolve_region  # noqa: E402
+
+FIXTURES = os.path.join(ROOT, "benchmarks", "fixtures")
+
+
+def _time_calls(fn, repeat: int):
+    timings = []
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        timings.append((time.perf_counter() - started) * 1000)
+    return result, timings
+
+
+def bench_fixtures(service: EpicGamesService, repeat: int) -> None:
+    spec = resolve_region("US")
+    with open(os.path.join(FIXTURES, "epic_catalog_trending.json"), "rb") as f:
+        catalog_body = f.read()
+    with open(os.path.join(FIXTURES, "epic_browse_trending.html"), "rb") as f:
+        html_body = f.read()
+
+    catalog_games, catalog_ms = _time_calls(
+        lambda: service._parse_catalog_trending(json.loads(catalog_body), spec, 10), repeat
+    )
+    html_games, html_ms = _time_calls(
+        lambda: service._parse_trending_html(html_body.decode()), repeat
+    )
+
+    print(f"{'path':<14}{'bytes':>10}{'rows':>6}{'parse p50 ms':>14}{'parse max ms':>14}")
+    for name, body, games, timings in (
+        ("catalog_api", catalog_body, catalog_games, catalog_ms),
+        ("html_scrape", html_body, html_games, html_ms),
+    ):
+        print(
+            f"{name:<14}{len(body):>10}{len(games):>6}"
+            f"{statistics.median(timings):>14.2f}{max(timings):>14.2f}"
+        )
+    print(
+        f"catalog_api is {len(html_body) / len(catalog_body):.1f}x smaller and "
+        f"{statistics.median(html_ms) / statistics.median(catalog_ms):.1f}x faster to parse"
+    )
+
+
+async def bench_live(service: EpicGamesService, repeat: int) -> None:
+    import aiohttp
+
+    spec = resolve_region("US")
+    ssl_context = ssl.create_default_context()
+    ssl_context.check_hostname = False
+    ssl_context.verify_mode = ssl.CERT_NONE
+    async with aiohttp.ClientSession(connector=aiohttp.TCPConnector(ssl=ssl_context)) as session:
+        for _ in range(repeat):
+            await service._get_trending_from_catalog(session, spec, 10)
+            await service._get_trending_from_html(session, spec)
+    print(json.dumps(service.get_path_stats(), indent=2))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--live", action="store_true", help="also fetch both paths from Epic")
+    args = parser.parse_args()
+
+    service = EpicGamesService()
+    bench_fixtures(service, args.repeat)
+    if args.live:
+        asyncio.run(bench_live(service, max(1, args.repeat // 10)))
+
+
+if __name__ == "__main__":
+    main()
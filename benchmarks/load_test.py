@@ -0,0 +1,275 @@
+# benchmarks/load_test.py
+"""
+Drives concurrent MCP sessions against the HTTP server and reports
+throughput, latency percentiles and error rates per tool.
+
+    python benchmarks/load_test.py --spawn --profile benchmarks/profiles/degraded.json
+    python benchmarks/load_test.py --url http://127.0.0.1:8080/mcp --clients 50
+
+--spawn starts the upstream simulator (benchmarks/upstream_sim.py) and a
+server.py subprocess pointed at it, so the run never touches the real stores;
+without it the target server is used as-is. Each client opens its own MCP
+session (with its own bearer token, so per-client quotas apply per
+session) and calls tools from the weighted mix back to back until the
+duration elapses. The spawned server maps those tokens to clients
+(QUOTA_CLIENT_TOKENS) and gets --quota-per-minute as the client and tool
+quotas, so the defaults do not throttle the run; a server started
+separately only tells the sessions apart if it lists the same tokens. A
+call counts as:
+
+    error   transport failure, timeout or MCP tool error
+    failed  the tool answered with success=false
+    empty   success but no rows (all upstream sources degraded)
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+
+from quotas import DEFAULT_TOOL_QUOTAS  # noqa: E402
+from upstream_sim import load_profile, start_simulator  # noqa: E402
+
+# tool name -> (weight, arguments)
+DEFAULT_MIX: Dict[str, Tuple[int, Dict[str, Any]]] = {
+    "get_steam_top_sellers": (4, {"region": "US"}),
+    "get_steam_trending_games": (3, {"region": "US"}),
+    "get_steam_most_played": (3, {}),
+    "get_epic_free_games": (3, {"region": "US"}),
+    "get_epic_trending_games": (2, {"region": "US"}),
+    "get_all_trending_games": (1, {"region": "US", "compact": True}),
+    "get_dataset_changes": (2, {"dataset": "steam_most_played"}),
+    "get_api_health": (1, {}),
+}
+
+
+def percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+class ToolStats:
+    def __init__(self):
+        self.latencies: List[float] = []
+        self.outcomes: Dict[str, int] = {"ok": 0, "empty": 0, "failed": 0, "error": 0}
+
+    def record(self, outcome: str, latency_ms: float) -> None:
+        self.outcomes[outcome] += 1
+        self.latencies.append(latency_ms)
+
+    @property
+    def calls(self) -> int:
+        return len(self.latencies)
+
+
+def classify(result: Any) -> str:
+    if result.is_error:
+        return "error"
+    payload = result.structured_content or {}
+    if isinstance(payload.get("result"), dict):
+        payload = payload["result"]
+    if payload.get("success") is False:
+        return "failed"
+    data = payload.get("data")
+    if isinstance(data, list) and not data:
+        return "empty"
+    if isinstance(data, dict) and "rows" in data and not data["rows"]:
+        return "empty"
+    return "ok"
+
+
+def session_token(i: int) -> str:
+    return f"load-test-token-{i}"
+
+
+async def run_client(
+    url: str,
+    mix: Dict[str, Tuple[int, Dict[str, Any]]],
+    deadline: float,
+    stats: Dict[str, ToolStats],
+    timeout: float,
+    token: str,
+) -> None:
+    from fastmcp import Client
+    from fastmcp.client.transports import StreamableHttpTransport
+
+    names = list(mix)
+    weights = [mix[name][0] for name in names]
+    try:
+        transport = StreamableHttpTransport(url, headers={"Authorization": f"Bearer {token}"})
+        async with Client(transport, timeout=timeout) as client:
+            while time.monotonic() < deadline:
+                name = random.choices(names, weights)[0]
+                started = time.perf_counter()
+                try:
+                    result = await client.call_tool(name, mix[name][1], raise_on_error=False)
+                    outcome = classify(result)
+                except Exception:
+                    outcome = "error"
+                stats.setdefault(name, ToolStats()).record(
+                    outcome, (time.perf_counter() - started) * 1000
+                )
+    except Exception as e:
+        stats.setdefault("<session>", ToolStats()).record("error", 0.0)
+        print(f"session failed: {e}", file=sys.stderr)
+
+
+def print_report(stats: Dict[str, ToolStats], elapsed: float) -> Dict[str, Any]:
+    header = (
+        f"{'tool':<28}{'calls':>7}{'rps':>8}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}"
+        f"{'err%':>7}{'fail%':>7}{'empty%':>8}"
+    )
+    print(header)
+    print("-" * len(header))
+    report = {}
+    combined = ToolStats()
+    for name in sorted(stats):
+        s = stats[name]
+        combined.latencies.extend(s.latencies)
+        for key, count in s.outcomes.items():
+            combined.outcomes[key] += count
+    for name, s in [*sorted(stats.items()), ("TOTAL", combined)]:
+        row = {
+            "calls": s.calls,
+            "rps": s.calls / elapsed if elapsed else 0.0,
+            "p50_ms": percentile(s.latencies, 50),
+            "p95_ms": percentile(s.latencies, 95),
+            "p99_ms": percentile(s.latencies, 99),
+            "mean_ms": statistics.fmean(s.latencies) if s.latencies else 0.0,
+            **{f"{k}_rate": (v / s.calls if s.calls else 0.0) for k, v in s.outcomes.items()},
+        }
+        report[name] = row
+        print(
+            f"{name:<28}{row['calls']:>7}{row['rps']:>8.1f}{row['p50_ms']:>9.0f}"
+            f"{row['p95_ms']:>9.0f}{row['p99_ms']:>9.0f}{row['error_rate'] * 100:>7.1f}"
+            f"{row['failed_rate'] * 100:>7.1f}{row['empty_rate'] * 100:>8.1f}"
+        )
+    return report
+
+
+async def wait_for_port(host: str, port: int, timeout: float) -> None:
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            _, writer = await asyncio.open_connection(host, port)
+            writer.close()
+            return
+        except OSError:
+            if time.monotonic() > deadline:
+                raise RuntimeError(f"server did not start listening on {host}:{port}")
+            await asyncio.sleep(0.2)
+
+
+async def main_async(args: argparse.Namespace) -> None:
+    server: Optional[subprocess.Popen] = None
+    runner = None
+    simulator = None
+    url = args.url
+    if args.spawn:
+        simulator, runner = await start_simulator(
+            "127.0.0.1", args.sim_port, load_profile(args.profile), args.seed
+        )
+        env = {
+            **os.environ,
+            "UPSTREAM_SIMULATOR_URL": f"http://127.0.0.1:{args.sim_port}",
+            "HOST": "127.0.0.1",
+            "PORT": str(args.server_port),
+            "CACHE_TTL_SECONDS": str(args.cache_ttl),
+            "QUOTA_CLIENT_TOKENS": ",".join(
+                f"{session_token(i)}=load-test-{i}" for i in range(args.clients)
+            ),
+            "QUOTA_CLIENT_PER_MINUTE": str(args.quota_per_minute),
+            "QUOTA_CLIENT_BURST": str(int(args.quota_per_minute)),
+            "QUOTA_TOOL_LIMITS": ",".join(
+                f"{tool}={args.quota_per_minute}/{int(args.quota_per_minute)}" for tool in DEFAULT_TOOL_QUOTAS
+            ),
+        }
+        server = subprocess.Popen(
+            [sys.executable, os.path.join(ROOT, "server.py")],
+            env=env,
+            stdout=subprocess.DEVNULL if not args.server_logs else None,
+            stderr=subprocess.DEVNULL if not args.server_logs else None,
+        )
+        await wait_for_port("127.0.0.1", args.server_port, 30)
+        url = f"http://127.0.0.1:{args.server_port}/mcp"
+
+    mix = DEFAULT_MIX
+    if args.tools:
+        mix = {name: DEFAULT_MIX.get(name, (1, {})) for name in args.tools.split(",")}
+
+    stats: Dict[str, ToolStats] = {}
+    print(f"{args.clients} clients x {args.duration}s against {url}")
+    started = time.monotonic()
+    deadline = started + args.duration
+    try:
+        await asyncio.gather(
+            *(
+                run_client(url, mix, deadline, stats, args.timeout, session_token(i))
+                for i in range(args.clients)
+            )
+        )
+        elapsed = time.monotonic() - started
+        report = print_report(stats, elapsed)
+        if simulator is not None:
+            print("\nupstream simulator:")
+            for source, counters in simulator.stats.items():
+                print(f"  {source:<14}" + "  ".join(f"{k}={v}" for k, v in counters.items()))
+        if args.json:
+            with open(args.json, "w") as f:
+                json.dump(
+                    {
+                        "clients": args.clients,
+                        "duration": elapsed,
+                        "tools": report,
+                        "upstream": simulator.stats if simulator else None,
+                    },
+                    f,
+                    indent=2,
+                )
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait(timeout=10)
+        if runner is not None:
+            await runner.cleanup()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--url", default="http://127.0.0.1:8080/mcp")
+    parser.add_argument("--clients", type=int, default=20)
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds")
+    parser.add_argument("--timeout", type=float, default=60.0, help="per-call timeout (s)")
+    parser.add_argument("--tools", help="comma-separated subset of the default tool mix")
+    parser.add_argument("--spawn", action="store_true", help="start simulator + server.py")
+    parser.add_argument("--profile", help="fault profile for the simulator (JSON)")
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--sim-port", type=int, default=8900)
+    parser.add_argument("--server-port", type=int, default=8901)
+    parser.add_argument(
+        "--cache-ttl", type=float, default=5.0,
+        help="snapshot TTL for the spawned server; low values keep upstream paths busy",
+    )
+    parser.add_argument(
+        "--quota-per-minute", type=float, default=100000.0,
+        help="client and tool quotas (calls/minute and burst) for the spawned server",
+    )
+    parser.add_argument("--server-logs", action="store_true")
+    parser.add_argument("--json", help="also write the report to this file")
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,372 @@
+# benchmarks/upstream_sim.py
+"""
+Local stand-in for the Steam, SteamCharts and Epic endpoints the services
+scrape, with per-source fault injection.
+
+    python benchmarks/upstream_sim.py --port 8900 --profile benchmarks/profiles/degraded.json
+    UPSTREAM_SIMULATOR_URL=http://127.0.0.1:8900 python server.py
+
+Requests arrive as /<upstream host>/<path> (see app.upstream_url) and are
+mapped to a source: steam_home, steam_search, steam_stats, steam_api
+(appdetails / appreviews JSON), steamcharts, epic_free, epic_catalog,
+epic_browse. A profile maps source names (or "*" for
+all) to faults:
+
+    {
+      "*":           {"latency_ms": {"p50": 40, "p99": 250}},
+      "steam_search": {"error_rate": 0.05, "error_statuses": [500, 503]},
+      "steamcharts":  {"burst": {"every": 30, "duration": 5, "status": 429}},
+      "epic_catalog": {"truncate_rate": 0.1, "markup_change_rate": 0.2}
+    }
+
+latency_ms is lognormal with the given median and 99th percentile (or
+{"fixed": ms}); burst fails every request during `duration` seconds out of
+every `every`; truncated bodies are cut in half; markup changes rename the
+classes/keys the parsers look for. GET /_sim/stats returns per-source request
+and fault counts; POST /_sim/profile replaces the profile at runtime.
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import time
+from typing import Any, Dict, List, Optional
+
+from aiohttp import web
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+SOURCES = (
+    "steam_home",
+    "steam_search",
+    "steam_stats",
+    "steam_api",
+    "steamcharts",
+    "epic_free",
+    "epic_catalog",
+    "epic_browse",
+)
+
+# What a "markup change" renames in each kind of body.
+HTML_MARKUP_CHANGES = {
+    "search_result_row": "search_result_row_v2",
+    "store_capsule": "store_capsule_v2",
+    "top-games": "top-games-v2",
+    "player_count_row": "player_count_row_v2",
+    "data-testid=\"offer-card-": "data-testid=\"card-",
+    "data-testid=\"list-item\"": "data-testid=\"grid-item\"",
+}
+JSON_MARKUP_CHANGES = {
+    "\"results_html\"": "\"resultsHtml\"",
+    "\"searchStore\"": "\"search\"",
+    "\"elements\"": "\"items\"",
+}
+
+GAME_NAMES = [
+    "Stellar Drift", "Ironbound", "Hollow Pines", "Neon Courier", "Ashfall Keep",
+    "Tidecaller", "Quiet Orbit", "Rust & Ruin", "Lantern Road", "Glass Frontier",
+    "Paper Legion", "Emberline", "Vault 12", "Skyward Mile", "Grim Harvest",
+    "Cinder Rally", "Moss Temple", "Overclocked", "Salt Kingdom", "Night Ferry",
+    "Brass Hearts", "Polar Signal", "Echo Harbor", "Wild Meridian", "Last Lighthouse",
+]
+
+
+def _catalog_games() -> List[Dict[str, Any]]:
+    return [
+        {"appid": str(400000 + i * 10), "name": name, "base_players": 250000 // (i + 1)}
+        for i, name in enumerate(GAME_NAMES)
+    ]
+
+
+class FaultProfile:
+    def __init__(self, config: Optional[Dict[str, Any]] = None):
+        self.config = config or {}
+
+    def for_source(self, source: str) -> Dict[str, Any]:
+        return {**self.config.get("*", {}), **self.config.get(source, {})}
+
+
+def _utc(epoch: int) -> str:
+    return time.strftime("%Y-%m-%dT%H:%M:%S.000Z", time.gmtime(epoch))
+
+
+def _sample_latency(spec: Optional[Dict[str, Any]]) -> float:
+    """Seconds to wait before responding."""
+    if not spec:
+        return 0.0
+    if "fixed" in spec:
+        return spec["fixed"] / 1000
+    median = spec.get("p50", 50)
+    p99 = max(spec.get("p99", median), median)
+    sigma = math.log(p99 / median) / 2.326 if median > 0 else 0.0
+    return random.lognormvariate(math.log(max(median, 0.001)), sigma) / 1000
+
+
+class UpstreamSimulator:
+    def __init__(self, profile: Optional[Dict[str, Any]] = None, seed: Optional[int] = None):
+        self.profile = FaultProfile(profile)
+        self.random = random.Random(seed)
+        self.started = time.monotonic()
+        self.games = _catalog_games()
+        self.stats: Dict[str, Dict[str, int]] = {
+            source: {"requests": 0, "errors": 0, "burst": 0, "truncated": 0, "markup_changed": 0}
+            for source in SOURCES
+        }
+        with open(os.path.join(FIXTURES, "epic_catalog_trending.json"), "rb") as f:
+            self.epic_catalog_body = f.read()
+        with open(os.path.join(FIXTURES, "epic_browse_trending.html"), "rb") as f:
+            self.epic_browse_body = f.read()
+
+    # --- routing ---
+
+    @staticmethod
+    def source_for(host: str, path: str) -> Optional[str]:
+        if host == "store.steampowered.com":
+            if path.startswith("search/results"):
+                return "steam_search"
+            if path.startswith("stats/"):
+                return "steam_stats"
+            if path.startswith(("api/appdetails", "appreviews/")):
+                return "steam_api"
+            return "steam_home"
+        if host == "steamcharts.com":
+            return "steamcharts"
+        if host == "store-site-backend-static.ak.epicgames.com":
+            return "epic_free"
+        if host == "store.epicgames.com":
+            return "epic_catalog" if path.startswith("graphql") else "epic_browse"
+        return None
+
+    def make_app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_get("/_sim/stats", self.handle_stats)
+        app.router.add_post("/_sim/profile", self.handle_profile)
+        app.router.add_route("*", "/{host}/{path:.*}", self.handle_upstream)
+        return app
+
+    async def handle_stats(self, request: web.Request) -> web.Response:
+        return web.json_response({"uptime": time.monotonic() - self.started, "sources": self.stats})
+
+    async def handle_profile(self, request: web.Request) -> web.Response:
+        self.profile = FaultProfile(await request.json())
+        return web.json_response({"ok": True, "profile": self.profile.config})
+
+    async def handle_upstream(self, request: web.Request) -> web.Response:
+        source = self.source_for(request.match_info["host"], request.match_info["path"])
+        if source is None:
+            return web.Response(status=404, text="unknown upstream")
+        faults = self.profile.for_source(source)
+        counters = self.stats[source]
+        counters["requests"] += 1
+
+        await asyncio.sleep(_sample_latency(faults.get("latency_ms")))
+
+        burst = faults.get("burst")
+        if burst and (time.monotonic() - self.started) % burst["every"] < burst["duration"]:
+            counters["burst"] += 1
+            return web.Response(status=burst.get("status", 429), text="rate limited")
+        if self.random.random() < faults.get("error_rate", 0.0):
+            counters["errors"] += 1
+            status = self.random.choice(faults.get("error_statuses", [500, 502, 503]))
+            return web.Response(status=status, text="upstream error")
+
+        body, content_type = self.render(source, request)
+        if self.random.random() < faults.get("markup_change_rate", 0.0):
+            counters["markup_changed"] += 1
+            changes = JSON_MARKUP_CHANGES if content_type == "application/json" else HTML_MARKUP_CHANGES
+            text = body.decode()
+            for old, new in changes.items():
+                text = text.replace(old, new)
+            body = text.encode()
+        if self.random.random() < faults.get("truncate_rate", 0.0):
+            counters["truncated"] += 1
+            body = body[: len(body) // 2]
+        return web.Response(body=body, content_type=content_type)
+
+    # --- bodies ---
+
+    def _players(self, game: Dict[str, Any]) -> int:
+        return int(game["base_players"] * self.random.uniform(0.9, 1.1))
+
+    def _price(self, game: Dict[str, Any]) -> str:
+        return f"${(int(game['appid']) % 50) + 9}.99"
+
+    def render(self, source: str, request: web.Request):
+        if source == "steam_search":
+            count = int(request.query.get("count", 20))
+            rows = "".join(self._search_row(game) for game in self.games[:count])
+            return json.dumps({"success": 1, "results_html": rows}).encode(), "application/json"
+        if source == "steam_home":
+            capsules = "".join(
+                f'<div class="store_capsule"><a href="https://store.steampowered.com/app/{g["appid"]}/">'
+                f'<img src="https://cdn.example/{g["appid"]}.jpg" alt="{g["name"]}"></a>'
+                f'<div class="store_capsule_name">{g["name"]}</div>'
+                f'<div class="discount_final_price">{self._price(g)}</div></div>'
+                for g in self.games[:10]
+            )
+            return f'<html><body><div class="carousel_items">{capsules}</div></body></html>'.encode(), "text/html"
+        if source == "steam_stats":
+            rows = "".join(
+                f'<tr class="player_count_row"><td><span class="currentServers">{self._players(g):,}</span></td>'
+                f'<td><a class="gameLink" href="https://store.steampowered.com/app/{g["appid"]}/">{g["name"]}</a></td></tr>'
+                for g in self.games[:20]
+            )
+            return f"<html><body><table>{rows}</table></body></html>".encode(), "text/html"
+        if source == "steam_api":
+            return json.dumps(self._steam_api(request)).encode(), "application/json"
+        if source == "steamcharts":
+            rows = "".join(
+                f'<tr><td>{i + 1}.</td><td><a href="/app/{g["appid"]}">{g["name"]}</a></td>'
+                f'<td>{self._players(g):,}</td><td>{g["base_players"] * 2:,}</td><td>-</td></tr>'
+                for i, g in enumerate(self.games[:20])
+            )
+            # SteamCharts ranks are plain integers.
+            rows = rows.replace(".</td>", "</td>")
+            return (
+                f'<html><body><table id="top-games"><tbody>{rows}</tbody></table></body></html>'.encode(),
+                "text/html",
+            )
+        if source == "epic_free":
+            return json.dumps(self._epic_free()).encode(), "application/json"
+        if source == "epic_catalog":
+            return self.epic_catalog_body, "application/json"
+        return self.epic_browse_body, "text/html"
+
+    def _search_row(self, game: Dict[str, Any]) -> str:
+        appid = game["appid"]
+        return (
+            f'<a class="search_result_row" data-ds-appid="{appid}" href="https://store.steampowered.com/app/{appid}/">'
+            f'<div class="search_capsule"><img src="https://cdn.example/{appid}.jpg"></div>'
+            f'<span class="title">{game["name"]}</span>'
+            f'<div class="search_released">1 Jan, 2026</div>'
+            f'<div class="search_review_summary"><span data-tooltip-html="Very Positive&lt;br&gt;'
+            f'91% of the 12,345 user reviews for this game are positive."></span></div>'
+            f'<div class="search_discount"><span>-{int(appid) % 4 * 10}%</span></div>'
+            f'<div class="search_price">{self._price(game)}</div>'
+            f'<span class="search_tag">Indie</span></a>'
+        )
+
+    def _steam_api(self, request: web.Request) -> Dict[str, Any]:
+        games = {game["appid"]: game for game in self.games}
+        if request.match_info["path"].startswith("appreviews/"):
+            game = games.get(request.match_info["path"].split("/")[1])
+            if game is None:
+                return {"success": 1, "query_summary": {"num_reviews": 0, "total_reviews": 0}}
+            total = game["base_players"] // 10
+            positive = total * 91 // 100
+            return {
+                "success": 1,
+                "query_summary": {
+                    "num_reviews": 0,
+                    "review_score": 8,
+                    "review_score_desc": "Very Positive",
+                    "total_positive": positive,
+                    "total_negative": total - positive,
+                    "total_reviews": total,
+                },
+            }
+        appid = request.query.get("appids", "")
+        game = games.get(appid)
+        if game is None:
+            return {appid: {"success": False}}
+        cents = ((int(appid) % 50) + 9) * 100 + 99
+        discount = int(appid) % 4 * 10
+        final = cents * (100 - discount) // 100
+        return {
+            appid: {
+                "success": True,
+                "data": {
+                    "type": "game",
+                    "name": game["name"],
+                    "steam_appid": int(appid),
+                    "is_free": False,
+                    "short_description": f"{game['name']} description",
+                    "developers": ["Sim Studio"],
+                    "publishers": ["Sim Publishing"],
+                    "genres": [{"id": "23", "description": "Indie"}],
+                    "release_date": {"coming_soon": False, "date": "1 Jan, 2026"},
+                    "header_image": f"https://cdn.example/{appid}.jpg",
+                    "price_overview": {
+                        "currency": "USD",
+                        "initial": cents,
+                        "final": final,
+                        "discount_percent": discount,
+                        "initial_formatted": f"${cents / 100:.2f}" if discount else "",
+                        "final_formatted": f"${final / 100:.2f}",
+                    },
+                },
+            }
+        }
+
+    def _epic_free(self) -> Dict[str, Any]:
+        elements = []
+        # Weekly windows on the hour: current ones end in six days, upcoming
+        # ones follow, so promotion boundaries are always in the future.
+        week_start = int(time.time()) // 3600 * 3600 - 86400
+        for i, game in enumerate(self.games[:4]):
+            current = i < 2
+            start = week_start if current else week_start + 7 * 86400
+            offer = {
+                "startDate": _utc(start),
+                "endDate": _utc(start + 7 * 86400),
+                "discountSetting": {"discountType": "PERCENTAGE", "discountPercentage": 0},
+            }
+            elements.append(
+                {
+                    "id": f"epic{game['appid']}",
+                    "namespace": f"ns{game['appid']}",
+                    "title": game["name"],
+                    "description": f"{game['name']} description",
+                    "productSlug": game["name"].lower().replace(" ", "-"),
+                    "keyImages": [{"type": "Thumbnail", "url": f"https://cdn.example/e{game['appid']}.jpg"}],
+                    "tags": [{"id": "1", "name": "Action"}],
+                    "price": {
+                        "totalPrice": {
+                            "discountPrice": 0,
+                            "fmtPrice": {"originalPrice": self._price(game), "discountPrice": "0"},
+                        }
+                    },
+                    "promotions": {
+                        "promotionalOffers": [{"promotionalOffers": [offer]}] if current else [],
+                        "upcomingPromotionalOffers": [] if current else [{"promotionalOffers": [offer]}],
+                    },
+                }
+            )
+        return {"data": {"Catalog": {"searchStore": {"elements": elements}}}}
+
+
+def load_profile(path: Optional[str]) -> Dict[str, Any]:
+    if not path:
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+async def start_simulator(
+    host: str, port: int, profile: Optional[Dict[str, Any]] = None, seed: Optional[int] = None
+):
+    """Starts the simulator on the running loop; returns (simulator, runner)."""
+    simulator = UpstreamSimulator(profile, seed)
+    runner = web.AppRunner(simulator.make_app(), access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    return simulator, runner
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--profile", help="JSON fault profile (see module docstring)")
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args()
+
+    simulator = UpstreamSimulator(load_profile(args.profile), args.seed)
+    print(f"Upstream simulator on http://{args.host}:{args.port} (set UPSTREAM_SIMULATOR_URL)")
+    web.run_app(simulator.make_app(), host=args.host, port=args.port, access_log=None, print=None)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,330 @@
+# cache.py
+import asyncio
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple, Union
+
+from cache_backends import CacheBackend, make_worker_id
+
+# Seconds, or a function of the value being stored that returns them.
+Ttl = Union[float, Callable[[Any], float]]
+
+
+def _share(inflight: Dict[str, "asyncio.Task"], key: str, work: Awaitable[Any]) -> "asyncio.Task":
+    """
+    Runs work as a task registered under key until it finishes. Callers
+    await it through asyncio.shield, so cancelling the caller that started
+    it neither cancels the fetch nor strands the others waiting on it.
+    """
+    task = asyncio.ensure_future(work)
+    inflight[key] = task
+
+    def done(finished: "asyncio.Task") -> None:
+        if inflight.get(key) is finished:
+            del inflight[key]
+        if not finished.cancelled():
+            finished.exception()  # retrieved: no "never retrieved" log if every caller left
+
+    task.add_done_callback(done)
+    return task
+
+
+class SnapshotCache:
+    """
+    In-process TTL cache for dataset snapshots.
+
+    Keys are built with make_key() so that the same dataset fetched for
+    different regions/locales never collides. Concurrent callers asking for
+    the same missing key share a single in-flight fetch.
+
+    With a shared backend (see cache_backends.py) the local dict acts as a
+    first level in front of storage shared by all worker processes. On a miss
+    only the worker that wins the per-key refresh lock calls the upstream;
+    the others serve the previous (stale) snapshot if there is one, or wait
+    briefly for the leader's result before falling back to fetching themselves.
+    """
+
+    def __init__(
+        self,
+        default_ttl: float = 300.0,
+        backend: Optional[CacheBackend] = None,
+        worker_id: Optional[str] = None,
+        stale_grace: float = 600.0,
+        lock_ttl: float = 60.0,
+        follower_wait: float = 10.0,
+    ):
+        self.default_ttl = default_ttl
+        self.backend = backend
+        self.worker_id = worker_id or make_worker_id()
+        self.stale_grace = stale_grace
+        self.lock_ttl = lock_ttl
+        self.follower_wait = follower_wait
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self.hits = 0
+        self.misses = 0
+        self.shared_hits = 0
+        self.leader_refreshes = 0
+        self.stale_served = 0
+        self.backend_errors = 0
+
+    @staticmethod
+    def make_key(
+        dataset: str, region: Optional[str] = None, locale: Optional[str] = None
+    ) -> str:
+        # Region-independent datasets pass region=None and share one entry.
+        return f"{dataset}:{region or 'global'}:{locale or '-'}"
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry["expires_at"] <= time.time():
+            self._entries.pop(key, None)
+            return None
+        return entry
+
+    def set(self, key: str, value: Any, ttl: Optional[Ttl] = None) -> Dict[str, Any]:
+        if callable(ttl):
+            ttl = ttl(value)
+        now = time.time()
+        entry = {
+            "value": value,
+            "stored_at": now,
+            "expires_at": now + (self.default_ttl if ttl is None else ttl),
+        }
+        self._entries[key] = entry
+        return entry
+
+    def restore(self, key: str, value: Any, stored_at: float, ttl: float, stale: bool) -> None:
+        """Puts a snapshot from a checkpoint back, keeping its original fetch time (and age)."""
+        self._entries[key] = {
+            "value": value,
+            "stored_at": stored_at,
+            "expires_at": time.time() + ttl,
+            "restored": True,
+            "stale": stale,
+        }
+
+    def invalidate(self, key: str) -> None:
+        self._entries.pop(key, None)
+
+    async def _backend_call(self, method: str, *args: Any) -> Any:
+        # A broken shared backend must never take the tools down with it.
+        try:
+            return await getattr(self.backend, method)(*args)
+        except Exception as e:
+            self.backend_errors += 1
+            print(f"[{datetime.now()}] SnapshotCache: {self.backend.name} {method} failed: {e}")
+            return None
+
+    async def _store(self, key: str, value: Any, ttl: Optional[Ttl]) -> None:
+        if callable(ttl):
+            ttl = ttl(value)
+        entry = self.set(key, value, ttl)
+        if self.backend is not None:
+            ttl = self.default_ttl if ttl is None else ttl
+            # Keep the record past expiry so followers can serve it while the leader refreshes.
+            await self._backend_call("set", key, entry, ttl + self.stale_grace)
+
+    async def _fetch_shared(
+        self,
+        key: str,
+        fetch: Callable[[], Awaitable[Any]],
+        ttl: Optional[Ttl],
+        cache_empty: bool,
+        force: bool = False,
+    ) -> Tuple[Any, bool, float, bool]:
+        """
+        Returns (value, cached, age, stale) using the shared backend and leader
+        lock. force=True skips a fresh shared record and refetches if this
+        worker gets the lock (otherwise the holder is already refreshing it).
+        """
+        record = await self._backend_call("get", key)
+        now = time.time()
+        if record and record["expires_at"] > now and not force:
+            self.shared_hits += 1
+            self._entries[key] = record
+            return record["value"], True, now - record["stored_at"], False
+
+        lock_name = f"refresh:{key}"
+        acquired = await self._backend_call(
+            "acquire_lock", lock_name, self.worker_id, self.lock_ttl
+        )
+        # None means the backend errored: refresh locally instead of waiting on it.
+        if acquired is not False:
+            self.leader_refreshes += 1
+            try:
+                value = await fetch()
+                if value or cache_empty:
+                    await self._store(key, value, ttl)
+                return value, False, 0.0, False
+            finally:
+                await self._backend_call("release_lock", lock_name, self.worker_id)
+
+        if record:
+            # Another worker is refreshing; the previous snapshot is good enough.
+            self.stale_served += 1
+            return record["value"], True, now - record["stored_at"], True
+
+        deadline = now + self.follower_wait
+        while time.time() < deadline:
+            await asyncio.sleep(0.25)
+            record = await self._backend_call("get", key)
+            if record and record["expires_at"] > time.time():
+                self.shared_hits += 1
+                self._entries[key] = record
+                return record["value"], True, time.time() - record["stored_at"], False
+
+        # Leader is slow or gone; do the work rather than fail the call.
+        value = await fetch()
+        if value or cache_empty:
+            await self._store(key, value, ttl)
+        return value, False, 0.0, False
+
+    async def get_or_fetch(
+        self,
+        key: str,
+        fetch: Callable[[], Awaitable[Any]],
+        ttl: Optional[Ttl] = None,
+        cache_empty: bool = False,
+        force: bool = False,
+    ) -> Dict[str, Any]:
+        """
+        Returns {"value", "cached", "age", "stale"} for key, calling fetch() on
+        a miss. Empty results are not cached by default since the services
+        return [] when an upstream fails. `ttl` may be a function of the
+        fetched value (e.g. data that is valid until a known time). force=True
+        fetches even if the key is cached; the old entry is served to other
+        callers until the new value replaces it.
+        """
+        entry = None if force else self.get(key)
+        if entry is not None:
+            self.hits += 1
+            return {
+                "value": entry["value"],
+                "cached": True,
+                "age": round(time.time() - entry["stored_at"], 3),
+                "stale": entry.get("stale", False),
+                **({"restored": True} if entry.get("restored") else {}),
+            }
+
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            value, _, _, _ = await asyncio.shield(inflight)
+            return {"value": value, "cached": True, "age": 0.0, "stale": False}
+
+        self.misses += 1
+        value, cached, age, stale = await asyncio.shield(
+            _share(self._inflight, key, self._load(key, fetch, ttl, cache_empty, force))
+        )
+        return {"value": value, "cached": cached, "age": round(age, 3), "stale": stale}
+
+    async def _load(
+        self,
+        key: str,
+        fetch: Callable[[], Awaitable[Any]],
+        ttl: Optional[Ttl],
+        cache_empty: bool,
+        force: bool = False,
+    ) -> Tuple[Any, bool, float, bool]:
+        if self.backend is not None:
+            return await self._fetch_shared(key, fetch, ttl, cache_empty, force)
+        value = await fetch()
+        if value or cache_empty:
+            self.set(key, value, ttl)
+        return value, False, 0.0, False
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "default_ttl": self.default_ttl,
+            "shared_backend": self.backend.describe() if self.backend else None,
+            "worker_id": self.worker_id,
+            "shared_hits": self.shared_hits,
+            "leader_refreshes": self.leader_refreshes,
+            "stale_served": self.stale_served,
+            "backend_errors": self.backend_errors,
+            "checked_at": datetime.now().isoformat(),
+        }
+
+
+class AppInfoCache:
+    """
+    Per-appid LRU cache with a TTL, process-local.
+
+    Holds store details and review summaries for single games, keyed like
+    "details:<appid>:<cc>:<language>" or "reviews:<appid>". List tools seed
+    it with what their rows already carry (level "listing"); lookups that
+    need the full record ignore those. Concurrent misses for the same key
+    share one fetch. Failed lookups are cached for negative_ttl seconds.
+    """
+
+    def __init__(self, max_entries: int = 5000, ttl: float = 3600.0, negative_ttl: float = 300.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: str, min_level: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """The live entry for key ({"value", "level", "stored_at"}), or None."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry["expires_at"] <= time.time():
+            del self._entries[key]
+            return None
+        if min_level == "full" and entry["level"] != "full":
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry
+
+    def set(self, key: str, value: Any, level: str = "full", ttl: Optional[float] = None) -> None:
+        known = self._entries.get(key)
+        if level != "full" and known is not None and known["level"] == "full" and known["value"]:
+            if known["expires_at"] > time.time():
+                return  # a listing row never replaces a live full record
+        now = time.time()
+        if ttl is None:
+            ttl = self.ttl if value is not None else self.negative_ttl
+        self._entries[key] = {"value": value, "level": level, "stored_at": now, "expires_at": now + ttl}
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    async def get_or_fetch(
+        self, key: str, fetch: Callable[[], Awaitable[Any]], min_level: Optional[str] = None
+    ) -> Tuple[Any, bool]:
+        """(value, cached); value is None for lookups that found nothing."""
+        entry = self.get(key, min_level)
+        if entry is not None:
+            return entry["value"], True
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            return await asyncio.shield(inflight), True
+        self.misses += 1
+        return await asyncio.shield(_share(self._inflight, key, self._load(key, fetch))), False
+
+    async def _load(self, key: str, fetch: Callable[[], Awaitable[Any]]) -> Any:
+        value = await fetch()
+        self.set(key, value)
+        return value
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
@@ -0,0 +1,354 @@
+# cache_backends.py
+"""
+Shared storage backends for SnapshotCache.
+
+Each backend stores JSON-serializable snapshot records and provides a simple
+expiring lock used for leader election: the worker holding the lock for a
+dataset refreshes it, the others read what the leader writes.
+
+    memory                      -> MemoryBackend (single process, default)
+    sqlite:////var/lib/gta.db   -> SQLiteBackend (processes on one host; a path
+                                   under /dev/shm gives RAM-backed shared storage)
+    redis://host:6379/0         -> RedisBackend (any Redis-protocol server)
+"""
+import asyncio
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Optional
+from urllib.parse import unquote, urlparse
+
+
+def make_worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+class CacheBackend(ABC):
+    """Interface shared by all backends. Records are plain dicts."""
+
+    name = "base"
+
+    @abstractmethod
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        ...
+
+    @abstractmethod
+    async def set(self, key: str, record: Dict[str, Any], ttl: float) -> None:
+        ...
+
+    @abstractmethod
+    async def delete(self, key: str) -> None:
+        ...
+
+    @abstractmethod
+    async def acquire_lock(self, name: str, owner: str, ttl: float) -> bool:
+        ...
+
+    @abstractmethod
+    async def release_lock(self, name: str, owner: str) -> None:
+        ...
+
+    async def close(self) -> None:
+        pass
+
+    def describe(self) -> Dict[str, Any]:
+        return {"backend": self.name}
+
+
+class MemoryBackend(CacheBackend):
+    """Process-local backend; leader election degenerates to an in-process lock."""
+
+    name = "memory"
+
+    def __init__(self):
+        self._records: Dict[str, tuple] = {}
+        self._locks: Dict[str, tuple] = {}
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        item = self._records.get(key)
+        if item is None:
+            return None
+        record, expires_at = item
+        if expires_at <= time.time():
+            self._records.pop(key, None)
+            return None
+        return record
+
+    async def set(self, key: str, record: Dict[str, Any], ttl: float) -> None:
+        self._records[key] = (record, time.time() + ttl)
+
+    async def delete(self, key: str) -> None:
+        self._records.pop(key, None)
+
+    async def acquire_lock(self, name: str, owner: str, ttl: float) -> bool:
+        now = time.time()
+        holder = self._locks.get(name)
+        if holder and holder[0] != owner and holder[1] > now:
+            return False
+        self._locks[name] = (owner, now + ttl)
+        return True
+
+    async def release_lock(self, name: str, owner: str) -> None:
+        holder = self._locks.get(name)
+        if holder and holder[0] == owner:
+            self._locks.pop(name, None)
+
+
+class SQLiteBackend(CacheBackend):
+    """
+    Backend for several worker processes on one host sharing a SQLite file.
+    Blocking sqlite3 calls run in a worker thread so the event loop is not stalled.
+    """
+
+    name = "sqlite"
+
+    def __init__(self, path: str):
+        self.path = path
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(
+            path, timeout=5.0, isolation_level=None, check_same_thread=False
+        )
+        self._mutex = threading.Lock()
+        self._writes = 0
+        with self._mutex:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS snapshots ("
+                "key TEXT PRIMARY KEY, record TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS locks ("
+                "name TEXT PRIMARY KEY, owner TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+
+    def _run(self, fn, *args):
+        def locked():
+            with self._mutex:
+                return fn(*args)
+
+        return asyncio.to_thread(locked)
+
+    def _get(self, key: str):
+        row = self._conn.execute(
+            "SELECT record FROM snapshots WHERE key = ? AND expires_at > ?",
+            (key, time.time()),
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def _set(self, key: str, payload: str, ttl: float):
+        now = time.time()
+        self._conn.execute(
+            "INSERT INTO snapshots(key, record, expires_at) VALUES (?, ?, ?) "
+            "ON CONFLICT(key) DO UPDATE SET record = excluded.record, expires_at = excluded.expires_at",
+            (key, payload, now + ttl),
+        )
+        self._writes += 1
+        if self._writes % 100 == 0:
+            self._conn.execute("DELETE FROM snapshots WHERE expires_at <= ?", (now,))
+
+    def _acquire(self, name: str, owner: str, ttl: float) -> bool:
+        now = time.time()
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            self._conn.execute(
+                "INSERT INTO locks(name, owner, expires_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(name) DO UPDATE SET owner = excluded.owner, expires_at = excluded.expires_at "
+                "WHERE locks.expires_at <= ? OR locks.owner = excluded.owner",
+                (name, owner, now + ttl, now),
+            )
+            row = self._conn.execute(
+                "SELECT owner FROM locks WHERE name = ?", (name,)
+            ).fetchone()
+            self._conn.execute("COMMIT")
+        except Exception:
+            self._conn.execute("ROLLBACK")
+            raise
+        return bool(row and row[0] == owner)
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        return await self._run(self._get, key)
+
+    async def set(self, key: str, record: Dict[str, Any], ttl: float) -> None:
+        await self._run(self._set, key, json.dumps(record), ttl)
+
+    async def delete(self, key: str) -> None:
+        await self._run(
+            self._conn.execute, "DELETE FROM snapshots WHERE key = ?", (key,)
+        )
+
+    async def acquire_lock(self, name: str, owner: str, ttl: float) -> bool:
+        return await self._run(self._acquire, name, owner, ttl)
+
+    async def release_lock(self, name: str, owner: str) -> None:
+        await self._run(
+            self._conn.execute,
+            "DELETE FROM locks WHERE name = ? AND owner = ?",
+            (name, owner),
+        )
+
+    async def close(self) -> None:
+        await self._run(self._conn.close)
+
+    def describe(self) -> Dict[str, Any]:
+        return {"backend": self.name, "path": self.path}
+
+
+class RedisError(Exception):
+    pass
+
+
+class RedisBackend(CacheBackend):
+    """
+    Minimal RESP2 client (GET/SET/DEL/EVAL) over one asyncio connection.
+    Works against Redis or any server speaking the Redis protocol, so it can be
+    exercised against a local stand-in without extra dependencies.
+    """
+
+    name = "redis"
+
+    # Compare-and-delete so a worker never releases a lock another worker took over.
+    _RELEASE_SCRIPT = (
+        "if redis.call('get', KEYS[1]) == ARGV[1] then "
+        "return redis.call('del', KEYS[1]) else return 0 end"
+    )
+
+    def __init__(self, url: str, prefix: str = "gta:"):
+        parsed = urlparse(url)
+        self.host = parsed.hostname or "127.0.0.1"
+        self.port = parsed.port or 6379
+        self.db = int(parsed.path.lstrip("/") or 0)
+        self.username = unquote(parsed.username) if parsed.username else None
+        self.password = unquote(parsed.password) if parsed.password else None
+        self.prefix = prefix
+        self._reader: Optional[asyncio.StreamReader] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._lock = asyncio.Lock()
+
+    @staticmethod
+    def _encode(*args: Any) -> bytes:
+        parts = [f"*{len(args)}\r\n".encode()]
+        for arg in args:
+            data = arg if isinstance(arg, bytes) else str(arg).encode()
+            parts.append(f"${len(data)}\r\n".encode() + data + b"\r\n")
+        return b"".join(parts)
+
+    async def _read_reply(self) -> Any:
+        line = await self._reader.readline()
+        if not line:
+            raise ConnectionError("Redis connection closed")
+        kind, payload = line[:1], line[1:-2]
+        if kind == b"+":
+            return payload.decode()
+        if kind == b"-":
+            raise RedisError(payload.decode())
+        if kind == b":":
+            return int(payload)
+        if kind == b"$":
+            length = int(payload)
+            if length == -1:
+                return None
+            data = await self._reader.readexactly(length + 2)
+            return data[:-2]
+        if kind == b"*":
+            count = int(payload)
+            if count == -1:
+                return None
+            return [await self._read_reply() for _ in range(count)]
+        # Unparseable reply: the stream position is unknown, so reconnect.
+        raise ConnectionError(f"Unexpected Redis reply type: {line!r}")
+
+    async def _connect(self) -> None:
+        self._reader, self._writer = await asyncio.open_connection(self.host, self.port)
+        if self.password:
+            if self.username:
+                await self._send("AUTH", self.username, self.password)  # Redis 6 ACL user
+            else:
+                await self._send("AUTH", self.password)
+        if self.db:
+            await self._send("SELECT", self.db)
+
+    async def _send(self, *args: Any) -> Any:
+        try:
+            self._writer.write(self._encode(*args))
+            await self._writer.drain()
+            return await self._read_reply()
+        except RedisError:
+            raise  # error reply: the connection is still in sync
+        except BaseException:
+            # Interrupted (e.g. cancelled) between write and reply: the reply
+            # would be read by the next command, so drop the connection.
+            self._writer.close()
+            self._writer = None
+            raise
+
+    async def command(self, *args: Any) -> Any:
+        async with self._lock:
+            for attempt in range(2):
+                try:
+                    if self._writer is None or self._writer.is_closing():
+                        await self._connect()
+                    return await self._send(*args)
+                except (ConnectionError, OSError, asyncio.IncompleteReadError):
+                    self._writer = None
+                    if attempt:
+                        raise
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        data = await self.command("GET", self.prefix + key)
+        return json.loads(data) if data else None
+
+    async def set(self, key: str, record: Dict[str, Any], ttl: float) -> None:
+        await self.command(
+            "SET", self.prefix + key, json.dumps(record), "PX", max(1, int(ttl * 1000))
+        )
+
+    async def delete(self, key: str) -> None:
+        await self.command("DEL", self.prefix + key)
+
+    async def acquire_lock(self, name: str, owner: str, ttl: float) -> bool:
+        reply = await self.command(
+            "SET", self.prefix + "lock:" + name, owner, "NX", "PX", max(1, int(ttl * 1000))
+        )
+        return reply == "OK"
+
+    async def release_lock(self, name: str, owner: str) -> None:
+        key = self.prefix + "lock:" + name
+        try:
+            await self.command("EVAL", self._RELEASE_SCRIPT, 1, key, owner)
+        except RedisError:
+            # Stand-ins without scripting: best-effort check-then-delete.
+            holder = await self.command("GET", key)
+            if holder is not None and holder.decode() == owner:
+                await self.command("DEL", key)
+
+    async def close(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+    def describe(self) -> Dict[str, Any]:
+        return {"backend": self.name, "host": self.host, "port": self.port, "db": self.db}
+
+
+def create_cache_backend(url: Optional[str] = None) -> CacheBackend:
+    """Builds a backend from a URL such as the CACHE_BACKEND_URL environment variable."""
+    if not url or url == "memory":
+        return MemoryBackend()
+    if url.startswith("sqlite://"):
+        # SQLAlchemy-style: sqlite:///relative.db, sqlite:////absolute/path.db
+        path = url[len("sqlite://"):]
+        if path.startswith("/"):
+            path = path[1:]
+        return SQLiteBackend(path or "cache.db")
+    if url.startswith(("redis://", "rediss://")):
+        if url.startswith("rediss://"):
+            raise ValueError("TLS Redis URLs (rediss://) are not supported")
+        return RedisBackend(url)
+    raise ValueError(f"Unsupported cache backend URL: {url}")
@@ -0,0 +1,208 @@
+# checkpoint.py
+"""
+On-disk checkpoints of the latest dataset snapshots, for warm restarts.
+
+GameAnalyticsApp saves the latest snapshot of every dataset/region every
+CHECKPOINT_INTERVAL_SECONDS (and on shutdown) and restores them when it is
+constructed, so the first calls after a deploy or crash are answered from
+the checkpoint (with their age) instead of all going to the upstreams.
+
+File format: a fixed header (magic, marshal format, Python version, CRC32
+and length of the payload) followed by a marshal payload:
+
+    {"savedAt": epoch, "entries": [(key, dataset, region, locale, fetched_at, rows), ...]}
+
+marshal only encodes plain data (no code runs on load) and is the fastest
+stdlib decoder, but its format is tied to the Python version; a checkpoint
+written by another version, or truncated/corrupt, is ignored (cold start).
+
+Saves are atomic: the file is written to a temporary name in the same
+directory, fsynced and renamed over the previous checkpoint. Encoding and
+I/O run in a worker thread; snapshot row lists are never modified after
+they are stored, so they can be encoded while the loop keeps running.
+"""
+import asyncio
+import marshal
+import os
+import struct
+import sys
+import tempfile
+import time
+import zlib
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+MAGIC = b"GTACKPT1"
+# magic, marshal format version, Python major, minor, CRC32, payload length
+_HEADER = struct.Struct("<8sBBBxIQ")
+
+# (cache key, dataset, region label, locale, fetched_at, rows)
+Entry = Tuple[str, str, str, Optional[str], float, List[Dict[str, Any]]]
+
+
+def default_checkpoint_path() -> str:
+    return os.path.join(tempfile.gettempdir(), "gaming-trend-analytics", "snapshots.ckpt")
+
+
+class CheckpointStore:
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        interval: float = 60.0,
+        max_age: float = 86400.0,
+    ):
+        self.path = path or default_checkpoint_path()
+        self.interval = interval
+        self.max_age = max_age
+        self._task: Optional[asyncio.Task] = None
+        self._last_signature: Optional[Tuple] = None
+        self.saves = 0
+        self.failures = 0
+        self.last_saved_at: Optional[float] = None
+        self.last_bytes = 0
+        self.last_duration_ms: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self.restored: Dict[str, Any] = {}
+
+    # --- encoding ---
+
+    @staticmethod
+    def _header(payload: bytes) -> bytes:
+        return _HEADER.pack(
+            MAGIC, marshal.version, sys.version_info[0], sys.version_info[1],
+            zlib.crc32(payload), len(payload),
+        )
+
+    def load(self) -> List[Entry]:
+        """Entries of the checkpoint younger than max_age; [] if there is none or it is unusable."""
+        start = time.perf_counter()
+        try:
+            with open(self.path, "rb") as f:
+                header = f.read(_HEADER.size)
+                payload = f.read()
+        except FileNotFoundError:
+            self.restored = {"status": "none"}
+            return []
+        except OSError as e:
+            self.restored = {"status": "error", "error": str(e)}
+            print(f"[{datetime.now()}] CheckpointStore: Cannot read {self.path}: {e}")
+            return []
+        reason = None
+        if len(header) < _HEADER.size:
+            reason = "truncated header"
+        else:
+            magic, marshal_version, major, minor, crc, length = _HEADER.unpack(header)
+            if magic != MAGIC:
+                reason = "not a checkpoint file"
+            elif (marshal_version, major, minor) != (marshal.version, *sys.version_info[:2]):
+                reason = f"written by Python {major}.{minor} (marshal v{marshal_version})"
+            elif length != len(payload) or zlib.crc32(payload) != crc:
+                reason = "truncated or corrupt payload"
+        if reason is None:
+            try:
+                data = marshal.loads(payload)
+                entries = data["entries"]
+            except (EOFError, ValueError, TypeError, KeyError) as e:
+                reason = f"undecodable payload: {e}"
+        if reason is not None:
+            self.restored = {"status": "ignored", "reason": reason}
+            print(f"[{datetime.now()}] CheckpointStore: Ignoring {self.path}: {reason}")
+            return []
+        now = time.time()
+        usable = [entry for entry in entries if now - entry[4] <= self.max_age]
+        self.restored = {
+            "status": "loaded",
+            "savedAt": datetime.fromtimestamp(data["savedAt"]).isoformat(),
+            "entries": len(usable),
+            "skippedTooOld": len(entries) - len(usable),
+            "bytes": _HEADER.size + len(payload),
+            "loadMs": round((time.perf_counter() - start) * 1000, 2),
+        }
+        return usable
+
+    def _write(self, entries: List[Entry]) -> int:
+        """Encodes and atomically replaces the checkpoint file (runs in a worker thread)."""
+        payload = marshal.dumps({"savedAt": time.time(), "entries": entries})
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".snapshots-", suffix=".part")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(self._header(payload))
+                f.write(payload)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+            raise
+        try:
+            # Make the rename itself durable.
+            dir_fd = os.open(directory, os.O_RDONLY)
+            try:
+                os.fsync(dir_fd)
+            finally:
+                os.close(dir_fd)
+        except OSError:
+            pass  # not supported on every platform/filesystem
+        return _HEADER.size + len(payload)
+
+    async def save(self, entries: List[Entry]) -> bool:
+        """Writes a checkpoint unless nothing changed since the last one; True if written."""
+        signature = tuple((entry[0], entry[4], len(entry[5])) for entry in entries)
+        if signature == self._last_signature:
+            return False
+        start = time.perf_counter()
+        try:
+            self.last_bytes = await asyncio.to_thread(self._write, entries)
+        except Exception as e:
+            self.failures += 1
+            self.last_error = str(e)
+            print(f"[{datetime.now()}] CheckpointStore: Saving {self.path} failed: {e}")
+            return False
+        self._last_signature = signature
+        self.saves += 1
+        self.last_saved_at = time.time()
+        self.last_duration_ms = round((time.perf_counter() - start) * 1000, 2)
+        return True
+
+    # --- background task ---
+
+    def start(self, collect: Callable[[], List[Entry]]) -> None:
+        """Saves collect() every `interval` seconds on the running loop (idempotent; interval <= 0 disables)."""
+        if self.interval <= 0 or (self._task and not self._task.done()):
+            return
+        self._task = asyncio.get_running_loop().create_task(self._loop(collect))
+
+    async def _loop(self, collect: Callable[[], List[Entry]]) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            await self.save(collect())
+
+    async def stop(self, collect: Optional[Callable[[], List[Entry]]] = None) -> None:
+        """Stops the periodic task and, given collect, writes a final checkpoint."""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        if collect is not None and self.interval > 0:
+            await self.save(collect())
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "path": self.path,
+            "intervalSeconds": self.interval,
+            "maxAgeSeconds": self.max_age,
+            "saves": self.saves,
+            "failures": self.failures,
+            "lastSavedAt": datetime.fromtimestamp(self.last_saved_at).isoformat()
+            if self.last_saved_at
+            else None,
+            "lastBytes": self.last_bytes,
+            "lastDurationMs": self.last_duration_ms,
+            "lastError": self.last_error,
+            "restored": self.restored,
+        }
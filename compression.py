@@ -0,0 +1,390 @@
+# compression.py
+"""
+Negotiated response compression for the HTTP server.
+
+- negotiate():           picks the client's best accepted encoding (q-values,
+                         "*", "identity;q=0") among the ones enabled here
+- ResponseCompressor:    codecs, size threshold, a byte-bounded LRU of
+                         compressed bodies and counters (bytes in/out and
+                         compression time per encoding)
+- CompressionMiddleware: ASGI middleware for every HTTP response.
+                         Single-body responses at least `minimum_size` long
+                         are compressed whole, and bodies seen before are
+                         served from the LRU (keyed by a digest of the
+                         body). Streamed responses (the MCP transport's
+                         server-sent events) are compressed chunk by chunk
+                         with a flush after each chunk, so events are not
+                         held back
+
+Encodings: gzip (zlib) is always available; br and zstd need the optional
+brotli / zstandard packages and are skipped when they are not installed.
+Responses that already have a Content-Encoding, or whose type is not
+text-like (e.g. Parquet exports), pass through unchanged. Snapshot routes
+compress their bodies themselves via ResponseCompressor.cached() so a
+snapshot version is compressed once per encoding.
+"""
+import asyncio
+import hashlib
+import time
+import zlib
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+DEFAULT_ENCODINGS = ("zstd", "br", "gzip")  # server preference on equal q
+# Per-response levels (fast) and levels for cached variants (compressed once).
+DEFAULT_LEVELS = {"gzip": 6, "br": 4, "zstd": 3}
+CACHED_LEVELS = {"gzip": 9, "br": 9, "zstd": 12}
+COMPRESSIBLE_TYPES = (
+    "text/",
+    "application/json",
+    "application/x-ndjson",
+    "application/javascript",
+    "application/xml",
+)
+# Bodies at least this large are compressed in a worker thread.
+THREAD_THRESHOLD = 256 * 1024
+
+
+class _GzipStream:
+    def __init__(self, level: int):
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def chunk(self, data: bytes) -> bytes:
+        return self._compressor.compress(data) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush()
+
+
+class _BrotliStream:
+    def __init__(self, brotli: Any, level: int):
+        self._compressor = brotli.Compressor(quality=level)
+
+    def chunk(self, data: bytes) -> bytes:
+        return self._compressor.process(data) + self._compressor.flush()
+
+    def finish(self) -> bytes:
+        return self._compressor.finish()
+
+
+class _ZstdStream:
+    def __init__(self, zstandard: Any, level: int):
+        self._flush_block = zstandard.COMPRESSOBJ_FLUSH_BLOCK
+        self._compressor = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def chunk(self, data: bytes) -> bytes:
+        return self._compressor.compress(data) + self._compressor.flush(self._flush_block)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush()
+
+
+class Codec:
+    def __init__(self, name: str, compress: Callable[[bytes, int], bytes], stream: Callable[[int], Any]):
+        self.name = name
+        self.compress = compress
+        self.stream = stream
+
+
+def _load_codec(name: str) -> Optional[Codec]:
+    if name == "gzip":
+        return Codec(
+            "gzip",
+            lambda data, level: _gzip_compress(data, level),
+            _GzipStream,
+        )
+    try:
+        if name == "br":
+            import brotli
+
+            return Codec(
+                "br",
+                lambda data, level: brotli.compress(data, quality=level),
+                lambda level: _BrotliStream(brotli, level),
+            )
+        if name == "zstd":
+            import zstandard
+
+            return Codec(
+                "zstd",
+                lambda data, level: zstandard.ZstdCompressor(level=level).compress(data),
+                lambda level: _ZstdStream(zstandard, level),
+            )
+    except ImportError:
+        return None
+    return None
+
+
+def _gzip_compress(data: bytes, level: int) -> bytes:
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    return compressor.compress(data) + compressor.flush()
+
+
+def parse_encodings(spec: Optional[str]) -> Tuple[str, ...]:
+    """'zstd,br,gzip' -> ("zstd", "br", "gzip"); empty -> DEFAULT_ENCODINGS."""
+    names = tuple(name.strip().lower() for name in (spec or "").split(",") if name.strip())
+    return names or DEFAULT_ENCODINGS
+
+
+def negotiate(accept_encoding: Optional[str], available: Iterable[str]) -> Optional[str]:
+    """Best encoding for an Accept-Encoding header, or None for identity."""
+    available = list(available)
+    if not accept_encoding:
+        return None
+    weights: Dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        weights[name] = q
+    wildcard = weights.get("*")
+    best, best_q = None, 0.0
+    for name in available:  # in server preference order
+        q = weights.get(name, wildcard if wildcard is not None else 0.0)
+        if q > best_q:
+            best, best_q = name, q
+    return best
+
+
+def compressible(content_type: str) -> bool:
+    content_type = content_type.lower()
+    return any(content_type.startswith(prefix) for prefix in COMPRESSIBLE_TYPES)
+
+
+class ResponseCompressor:
+    def __init__(
+        self,
+        encodings: Iterable[str] = DEFAULT_ENCODINGS,
+        minimum_size: int = 1024,
+        cache_bytes: int = 32 * 1024 * 1024,
+        levels: Optional[Dict[str, int]] = None,
+        cached_levels: Optional[Dict[str, int]] = None,
+    ):
+        self.codecs: Dict[str, Codec] = {}
+        self.unavailable: List[str] = []
+        for name in encodings:
+            codec = _load_codec(name)
+            if codec is None:
+                self.unavailable.append(name)
+            else:
+                self.codecs[name] = codec
+        if self.unavailable:
+            print(
+                f"[{datetime.now()}] ResponseCompressor: {', '.join(self.unavailable)} not available "
+                f"(install brotli / zstandard); using {', '.join(self.codecs) or 'no compression'}"
+            )
+        self.minimum_size = minimum_size
+        self.levels = {**DEFAULT_LEVELS, **(levels or {})}
+        self.cached_levels = {**CACHED_LEVELS, **(cached_levels or {})}
+        self.cache_bytes = cache_bytes
+        # (key, encoding) -> compressed body, least recently used first
+        self._cache: "OrderedDict[Tuple[str, str], bytes]" = OrderedDict()
+        self._cached_total = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.counters: Dict[str, Dict[str, float]] = {}
+
+    def negotiate(self, accept_encoding: Optional[str]) -> Optional[str]:
+        return negotiate(accept_encoding, self.codecs)
+
+    def _count(self, encoding: str, raw: int, compressed: int, seconds: float, streamed: bool = False) -> None:
+        counts = self.counters.setdefault(
+            encoding,
+            {"responses": 0, "streamedResponses": 0, "bytesIn": 0, "bytesOut": 0, "compressSeconds": 0.0},
+        )
+        counts["streamedResponses" if streamed else "responses"] += 1
+        counts["bytesIn"] += raw
+        counts["bytesOut"] += compressed
+        counts["compressSeconds"] += seconds
+
+    def record_stream_chunk(self, encoding: str, raw: int, compressed: int, seconds: float) -> None:
+        counts = self.counters.setdefault(
+            encoding,
+            {"responses": 0, "streamedResponses": 0, "bytesIn": 0, "bytesOut": 0, "compressSeconds": 0.0},
+        )
+        counts["bytesIn"] += raw
+        counts["bytesOut"] += compressed
+        counts["compressSeconds"] += seconds
+
+    def _cache_get(self, key: Tuple[str, str]) -> Optional[bytes]:
+        body = self._cache.get(key)
+        if body is not None:
+            self._cache.move_to_end(key)
+            self.cache_hits += 1
+        return body
+
+    def _cache_put(self, key: Tuple[str, str], body: bytes) -> None:
+        if len(body) > self.cache_bytes // 4:
+            return  # one huge body would flush everything else
+        previous = self._cache.pop(key, None)
+        if previous is not None:
+            self._cached_total -= len(previous)
+        self._cache[key] = body
+        self._cached_total += len(body)
+        while self._cached_total > self.cache_bytes:
+            _, evicted = self._cache.popitem(last=False)
+            self._cached_total -= len(evicted)
+
+    async def _compress(self, encoding: str, data: bytes, level: int) -> bytes:
+        codec = self.codecs[encoding]
+        if len(data) >= THREAD_THRESHOLD:
+            return await asyncio.to_thread(codec.compress, data, level)
+        return codec.compress(data, level)
+
+    async def compress_body(self, encoding: str, body: bytes) -> bytes:
+        """Whole-body compression, served from the LRU for bodies seen before."""
+        key = (hashlib.blake2b(body, digest_size=16).hexdigest(), encoding)
+        cached = self._cache_get(key)
+        if cached is not None:
+            self._count(encoding, len(body), len(cached), 0.0)
+            return cached
+        self.cache_misses += 1
+        start = time.perf_counter()
+        compressed = await self._compress(encoding, body, self.levels[encoding])
+        self._count(encoding, len(body), len(compressed), time.perf_counter() - start)
+        self._cache_put(key, compressed)
+        return compressed
+
+    async def cached(
+        self, key: str, encoding: Optional[str], render: Callable[[], bytes]
+    ) -> Tuple[bytes, Optional[str]]:
+        """
+        Body for a versioned resource (e.g. "snapshot:<key>:<version>"):
+        rendered and compressed once per encoding (at the cached levels),
+        then served from the LRU. Returns (body, applied encoding or None).
+        """
+        raw = self._cache_get((key, "identity"))
+        if raw is None:
+            self.cache_misses += 1
+            raw = render()
+            self._cache_put((key, "identity"), raw)
+        if encoding is None or len(raw) < self.minimum_size:
+            return raw, None
+        compressed = self._cache_get((key, encoding))
+        if compressed is not None:
+            self._count(encoding, len(raw), len(compressed), 0.0)
+            return compressed, encoding
+        self.cache_misses += 1
+        start = time.perf_counter()
+        compressed = await self._compress(encoding, raw, self.cached_levels[encoding])
+        self._count(encoding, len(raw), len(compressed), time.perf_counter() - start)
+        self._cache_put((key, encoding), compressed)
+        return compressed, encoding
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "encodings": list(self.codecs),
+            "unavailable": self.unavailable,
+            "minimumSize": self.minimum_size,
+            "cache": {
+                "entries": len(self._cache),
+                "bytes": self._cached_total,
+                "maxBytes": self.cache_bytes,
+                "hits": self.cache_hits,
+                "misses": self.cache_misses,
+            },
+            "byEncoding": {
+                encoding: {
+                    **{k: round(v, 4) if isinstance(v, float) else v for k, v in counts.items()},
+                    "ratio": round(counts["bytesOut"] / counts["bytesIn"], 4) if counts["bytesIn"] else None,
+                }
+                for encoding, counts in self.counters.items()
+            },
+        }
+
+
+def _header(headers: List[Tuple[bytes, bytes]], name: bytes) -> Optional[str]:
+    for key, value in headers:
+        if key.lower() == name:
+            return value.decode("latin-1")
+    return None
+
+
+def _without(headers: List[Tuple[bytes, bytes]], *names: bytes) -> List[Tuple[bytes, bytes]]:
+    return [(key, value) for key, value in headers if key.lower() not in names]
+
+
+def _add_vary(headers: List[Tuple[bytes, bytes]]) -> List[Tuple[bytes, bytes]]:
+    vary = _header(headers, b"vary")
+    if vary and "accept-encoding" in vary.lower():
+        return headers
+    value = f"{vary}, Accept-Encoding" if vary else "Accept-Encoding"
+    return _without(headers, b"vary") + [(b"vary", value.encode("latin-1"))]
+
+
+class CompressionMiddleware:
+    def __init__(self, app: Any, compressor: ResponseCompressor):
+        self.app = app
+        self.compressor = compressor
+
+    async def __call__(self, scope: Dict[str, Any], receive: Callable, send: Callable) -> None:
+        if scope["type"] != "http" or scope.get("method") == "HEAD":
+            await self.app(scope, receive, send)
+            return
+        request_headers = dict(
+            (key.lower(), value) for key, value in scope.get("headers", [])
+        )
+        encoding = self.compressor.negotiate(
+            request_headers.get(b"accept-encoding", b"").decode("latin-1")
+        )
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        compressor = self.compressor
+        start_message: Optional[Dict[str, Any]] = None
+        mode = None  # None (undecided), "passthrough", "stream"
+        stream = None
+
+        async def send_wrapper(message: Dict[str, Any]) -> None:
+            nonlocal start_message, mode, stream
+            if message["type"] == "http.response.start":
+                start_message = message
+                return
+            if message["type"] != "http.response.body" or mode == "passthrough":
+                await send(message)
+                return
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if mode is None:
+                headers = list(start_message.get("headers", []))
+                eligible = (
+                    start_message["status"] not in (204, 206, 304)
+                    and _header(headers, b"content-encoding") is None
+                    and compressible(_header(headers, b"content-type") or "")
+                )
+                if not eligible or (not more_body and len(body) < compressor.minimum_size):
+                    mode = "passthrough"
+                    await send(start_message)
+                    await send(message)
+                    return
+                headers = _add_vary(_without(headers, b"content-length"))
+                headers.append((b"content-encoding", encoding.encode("latin-1")))
+                if not more_body:
+                    compressed = await compressor.compress_body(encoding, body)
+                    headers.append((b"content-length", str(len(compressed)).encode("latin-1")))
+                    await send({**start_message, "headers": headers})
+                    await send({"type": "http.response.body", "body": compressed})
+                    return
+                mode = "stream"
+                stream = compressor.codecs[encoding].stream(compressor.levels[encoding])
+                compressor._count(encoding, 0, 0, 0.0, streamed=True)
+                await send({**start_message, "headers": headers})
+            started = time.perf_counter()
+            output = stream.chunk(body) if body else b""
+            if not more_body:
+                output += stream.finish()
+            compressor.record_stream_chunk(encoding, len(body), len(output), time.perf_counter() - started)
+            if output or not more_body:
+                await send({"type": "http.response.body", "body": output, "more_body": more_body})
+
+        await self.app(scope, receive, send_wrapper)
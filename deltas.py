@@ -0,0 +1,210 @@
+# deltas.py
+"""
+Snapshot versioning and ranking diffs for delta feeds.
+
+Every time a dataset's content changes, SnapshotHistory assigns it the next
+version number for that dataset key and keeps the last few versions. Clients
+receive an opaque cursor (the snapshot's content hash); passing it back as
+`since` returns only what changed. Version numbers are local to a process, but
+the content hash is not: any worker (or a restarted one) that still retains
+the snapshot a cursor names can diff against it, and any other cursor triggers
+a full resync instead of a wrong diff.
+"""
+import hashlib
+import json
+import time
+from collections import OrderedDict, deque
+from typing import Any, Deque, Dict, Iterator, List, Optional, Tuple
+
+# Fields compared between versions, besides rank/position.
+TRACKED_FIELDS = (
+    "price",
+    "discount",
+    "originalPrice",
+    "discountPrice",
+    "currentPlayers",
+    "peakPlayers",
+    "change24h",
+    "isFreeNow",
+    "isUpcomingFree",
+    "promotionDetails",
+)
+NUMERIC_FIELDS = ("currentPlayers", "peakPlayers", "discount")
+
+
+def content_hash(rows: List[Dict[str, Any]]) -> str:
+    # lastUpdated changes on every SteamCharts fetch and is not content.
+    stripped = [{k: v for k, v in row.items() if k != "lastUpdated"} for row in rows]
+    payload = json.dumps(stripped, sort_keys=True, default=str).encode()
+    return hashlib.blake2b(payload, digest_size=16).hexdigest()
+
+
+def _row_key(row: Dict[str, Any]) -> str:
+    return str(row.get("id") or row.get("url") or row.get("name"))
+
+
+def _rank_of(row: Dict[str, Any], position: int) -> int:
+    # Datasets without an explicit rank (trending lists) are ranked by position.
+    rank = row.get("rank")
+    return rank if isinstance(rank, int) else position + 1
+
+
+def diff_snapshots(
+    old_rows: List[Dict[str, Any]], new_rows: List[Dict[str, Any]]
+) -> Dict[str, List[Any]]:
+    """Returns added rows, removed ids, and per-game field changes (rank moves, price, players)."""
+    old_index = {_row_key(r): (i, r) for i, r in enumerate(old_rows)}
+    new_index = {_row_key(r): (i, r) for i, r in enumerate(new_rows)}
+
+    added = [row for key, (_, row) in new_index.items() if key not in old_index]
+    removed = [
+        {"id": row.get("id"), "name": row.get("name"), "lastRank": _rank_of(row, i)}
+        for key, (i, row) in old_index.items()
+        if key not in new_index
+    ]
+
+    changed = []
+    for key, (new_pos, new_row) in new_index.items():
+        if key not in old_index:
+            continue
+        old_pos, old_row = old_index[key]
+        fields: Dict[str, Any] = {}
+        old_rank, new_rank = _rank_of(old_row, old_pos), _rank_of(new_row, new_pos)
+        if old_rank != new_rank:
+            fields["rank"] = {"from": old_rank, "to": new_rank, "moved": old_rank - new_rank}
+        for field in TRACKED_FIELDS:
+            before, after = old_row.get(field), new_row.get(field)
+            if before == after:
+                continue
+            change = {"from": before, "to": after}
+            if field in NUMERIC_FIELDS and isinstance(before, int) and isinstance(after, int):
+                change["delta"] = after - before
+            fields[field] = change
+        if fields:
+            changed.append({"id": new_row.get("id"), "name": new_row.get("name"), **fields})
+
+    return {"added": added, "removed": removed, "changed": changed}
+
+
+# Changes in these fields always matter to subscribers; player counts only
+# matter when they move by more than a relative threshold.
+MATERIAL_FIELDS = (
+    "rank",
+    "price",
+    "discount",
+    "originalPrice",
+    "discountPrice",
+    "isFreeNow",
+    "isUpcomingFree",
+    "promotionDetails",
+)
+
+
+def is_material_change(
+    changes: Dict[str, List[Any]], player_threshold: float = 0.05
+) -> bool:
+    if changes["added"] or changes["removed"]:
+        return True
+    for entry in changes["changed"]:
+        if any(field in entry for field in MATERIAL_FIELDS):
+            return True
+        for field in ("currentPlayers", "peakPlayers"):
+            change = entry.get(field)
+            if change and change.get("from") and "delta" in change:
+                if abs(change["delta"]) / change["from"] >= player_threshold:
+                    return True
+    return False
+
+
+class SnapshotHistory:
+    def __init__(self, max_versions: int = 10, max_keys: int = 500):
+        self.max_versions = max_versions
+        self.max_keys = max_keys
+        # key -> deque of (version, hash, rows, recorded_at), oldest first
+        self._versions: "OrderedDict[str, Deque[Tuple[int, str, List[Dict[str, Any]], float]]]" = OrderedDict()
+
+    def make_cursor(self, key: str, version: int) -> Optional[str]:
+        for stored_version, digest, _, _ in self._versions.get(key, ()):
+            if stored_version == version:
+                return digest
+        return None
+
+    def parse_cursor(self, key: str, cursor: Optional[str]) -> Optional[int]:
+        """Returns the retained version of key whose content the cursor names, else None."""
+        if not cursor:
+            return None
+        for stored_version, digest, _, _ in reversed(self._versions.get(key, ())):
+            if digest == cursor:
+                return stored_version
+        return None
+
+    def record(self, key: str, rows: List[Dict[str, Any]]) -> int:
+        """Stores rows as the latest snapshot for key, returning its version."""
+        digest = content_hash(rows)
+        versions = self._versions.get(key)
+        if versions is None:
+            versions = self._versions[key] = deque(maxlen=self.max_versions)
+            while len(self._versions) > self.max_keys:
+                self._versions.popitem(last=False)
+        self._versions.move_to_end(key)
+        if versions and versions[-1][1] == digest:
+            return versions[-1][0]
+        version = versions[-1][0] + 1 if versions else 1
+        versions.append((version, digest, rows, time.time()))
+        return version
+
+    def latest_version(self, key: str) -> Optional[int]:
+        versions = self._versions.get(key)
+        return versions[-1][0] if versions else None
+
+    def latest_digest(self, key: str) -> Optional[str]:
+        """Content hash of the latest version; unlike the version, stable across restarts."""
+        versions = self._versions.get(key)
+        return versions[-1][1] if versions else None
+
+    def get(self, key: str, version: int) -> Optional[List[Dict[str, Any]]]:
+        for stored_version, _, rows, _ in self._versions.get(key, ()):
+            if stored_version == version:
+                return rows
+        return None
+
+    def snapshots(
+        self, latest_only: bool = False
+    ) -> Iterator[Tuple[str, int, float, List[Dict[str, Any]]]]:
+        """Yields (key, version, recorded_at, rows) for retained versions, oldest first per key."""
+        for key, versions in list(self._versions.items()):
+            for version, _, rows, recorded_at in list(versions)[-1:] if latest_only else list(versions):
+                yield key, version, recorded_at, rows
+
+    def changes_since(
+        self, key: str, since: Optional[str], rows: List[Dict[str, Any]], version: int
+    ) -> Dict[str, Any]:
+        """
+        Builds a delta payload for rows (already recorded as `version`).
+        status is "not_modified", "delta", or "full" when the cursor is
+        missing, unknown, or too old to diff against.
+        """
+        since_version = self.parse_cursor(key, since)
+        base = {
+            "version": version,
+            "cursor": self.make_cursor(key, version) or content_hash(rows),
+            "since": since,
+        }
+        if since is not None and since == base["cursor"]:
+            return {**base, "status": "not_modified"}
+        old_rows = self.get(key, since_version) if since_version is not None else None
+        if old_rows is None:
+            return {
+                **base,
+                "status": "full",
+                "reason": "no cursor" if since is None else "cursor unknown or expired",
+                "count": len(rows),
+                "data": rows,
+            }
+        changes = diff_snapshots(old_rows, rows)
+        return {
+            **base,
+            "status": "delta",
+            "counts": {name: len(items) for name, items in changes.items()},
+            "changes": changes,
+        }
@@ -0,0 +1,210 @@
+# export.py
+"""
+Bulk export of dataset snapshots for offline analytics.
+
+Writes the snapshots retained in SnapshotHistory (the latest version of each
+dataset/region, or every retained version) as one flat record per game:
+
+- ndjson:  one JSON object per line (snapshot fields plus the row as-is)
+- parquet: columnar, via pyarrow (optional dependency, imported on first
+           use); one row group per EXPORT_BATCH_ROWS rows
+
+Files are written one snapshot at a time to "<name>.part" and renamed when
+complete, so a reader never sees a half-written export, and only the row
+lists themselves (already held by the history) stay in memory. In Parquet,
+fields outside the fixed schema are kept as a JSON string in "extra" so the
+schema stays stable across sources. The newest EXPORT_KEEP_FILES
+exports are kept; older ones are deleted when a new one is written.
+"""
+import json
+import os
+import re
+import tempfile
+import time
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+EXPORT_FORMATS = ("ndjson", "parquet")
+EXPORT_BATCH_ROWS = 10_000
+EXPORT_CHUNK_BYTES = 64 * 1024
+_EXPORT_NAME = re.compile(r"^snapshots-\d{8}-\d{6}-\d+-\d+\.(ndjson|parquet)$")
+
+# Parquet (column, kind): "int"/"bool" keep only values of that type, "str"
+# stores anything else as JSON text.
+META_COLUMNS = (
+    ("dataset", "str"),
+    ("region", "str"),
+    ("locale", "str"),
+    ("version", "int"),
+    ("recordedAt", "str"),
+    ("position", "int"),
+)
+ROW_COLUMNS = (
+    ("id", "str"),
+    ("platform", "str"),
+    ("name", "str"),
+    ("url", "str"),
+    ("rank", "int"),
+    ("price", "str"),
+    ("originalPrice", "str"),
+    ("discountPrice", "str"),
+    ("discount", "str"),
+    ("currentPlayers", "int"),
+    ("peakPlayers", "int"),
+    ("isFreeNow", "bool"),
+    ("isUpcomingFree", "bool"),
+    ("releaseDate", "str"),
+    ("source", "str"),
+)
+_FIXED_COLUMN_NAMES = {name for name, _ in META_COLUMNS + ROW_COLUMNS}
+
+Snapshot = Tuple[str, int, float, List[Dict[str, Any]]]
+
+
+def _as_int(value: Any) -> Optional[int]:
+    return value if isinstance(value, int) and not isinstance(value, bool) else None
+
+
+def _as_bool(value: Any) -> Optional[bool]:
+    return value if isinstance(value, bool) else None
+
+
+def _as_str(value: Any) -> Optional[str]:
+    if value is None or isinstance(value, str):
+        return value
+    return json.dumps(value, default=str)
+
+
+def _parquet_modules():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError as e:
+        raise RuntimeError("Parquet export requires pyarrow (pip install pyarrow)") from e
+    return pyarrow, pyarrow.parquet
+
+
+def snapshot_records(snapshot: Snapshot) -> Iterator[Dict[str, Any]]:
+    """One record per row of a (key, version, recorded_at, rows) snapshot."""
+    key, version, recorded_at, rows = snapshot
+    dataset, region, locale = (key.split(":") + ["", "", ""])[:3]
+    meta = {
+        "dataset": dataset,
+        "region": region,
+        "locale": None if locale == "-" else locale,
+        "version": version,
+        "recordedAt": datetime.fromtimestamp(recorded_at).isoformat(),
+    }
+    for position, row in enumerate(rows):
+        yield {**meta, "position": position + 1, **row}
+
+
+_CONVERTERS = {"int": _as_int, "bool": _as_bool, "str": _as_str}
+
+
+def parquet_record(record: Dict[str, Any]) -> Dict[str, Any]:
+    """Maps a snapshot record onto the fixed Parquet columns plus "extra"."""
+    flat = {
+        name: _CONVERTERS[kind](record.get(name)) for name, kind in META_COLUMNS + ROW_COLUMNS
+    }
+    extra = {k: v for k, v in record.items() if k not in _FIXED_COLUMN_NAMES}
+    flat["extra"] = json.dumps(extra, default=str) if extra else None
+    return flat
+
+
+class SnapshotExporter:
+    def __init__(self, output_dir: Optional[str] = None, keep_files: int = 20):
+        self.output_dir = output_dir or os.path.join(tempfile.gettempdir(), "gaming-trend-exports")
+        self.keep_files = keep_files
+        self._sequence = 0
+
+    def export(self, fmt: str, snapshots: List[Snapshot]) -> Dict[str, Any]:
+        """Writes snapshots to a new file; blocking, run it in a worker thread."""
+        if fmt not in EXPORT_FORMATS:
+            raise ValueError(f"Unknown export format {fmt!r}; expected one of {', '.join(EXPORT_FORMATS)}")
+        os.makedirs(self.output_dir, exist_ok=True)
+        self._sequence += 1
+        name = f"snapshots-{datetime.now():%Y%m%d-%H%M%S}-{os.getpid()}-{self._sequence}.{fmt}"
+        path = os.path.join(self.output_dir, name)
+        started = time.perf_counter()
+        try:
+            writer = self._write_parquet if fmt == "parquet" else self._write_ndjson
+            rows = writer(path + ".part", snapshots)
+            os.replace(path + ".part", path)
+        except BaseException:
+            if os.path.exists(path + ".part"):
+                os.remove(path + ".part")
+            raise
+        self._prune()
+        return {
+            "name": name,
+            "file": path,
+            "format": fmt,
+            "snapshots": len(snapshots),
+            "rows": rows,
+            "bytes": os.path.getsize(path),
+            "durationMs": round((time.perf_counter() - started) * 1000, 1),
+        }
+
+    @staticmethod
+    def _write_ndjson(path: str, snapshots: List[Snapshot]) -> int:
+        rows = 0
+        with open(path, "w", encoding="utf-8") as f:
+            for snapshot in snapshots:
+                for record in snapshot_records(snapshot):
+                    f.write(
+                        json.dumps(record, ensure_ascii=False, separators=(",", ":"), default=str)
+                    )
+                    f.write("\n")
+                    rows += 1
+        return rows
+
+    @staticmethod
+    def _write_parquet(path: str, snapshots: List[Snapshot]) -> int:
+        pa, pq = _parquet_modules()
+        types = {"int": pa.int64(), "bool": pa.bool_(), "str": pa.string()}
+        schema = pa.schema(
+            [(name, types[kind]) for name, kind in META_COLUMNS + ROW_COLUMNS]
+            + [("extra", pa.string())]
+        )
+        rows = 0
+        batch: List[Dict[str, Any]] = []
+        with pq.ParquetWriter(path, schema, compression="zstd") as writer:
+            for snapshot in snapshots:
+                for record in snapshot_records(snapshot):
+                    batch.append(parquet_record(record))
+                    if len(batch) >= EXPORT_BATCH_ROWS:
+                        writer.write_batch(pa.RecordBatch.from_pylist(batch, schema=schema))
+                        rows += len(batch)
+                        batch = []
+            if batch:
+                writer.write_batch(pa.RecordBatch.from_pylist(batch, schema=schema))
+                rows += len(batch)
+        return rows
+
+    def _prune(self) -> None:
+        exports = sorted(
+            (entry for entry in os.scandir(self.output_dir) if _EXPORT_NAME.match(entry.name)),
+            key=lambda entry: entry.stat().st_mtime,
+        )
+        for entry in exports[: max(0, len(exports) - self.keep_files)]:
+            try:
+                os.remove(entry.path)
+            except OSError:
+                pass
+
+    def resolve(self, name: str) -> Optional[str]:
+        """Path of a finished export by file name, or None (never outside output_dir)."""
+        if not _EXPORT_NAME.match(name):
+            return None
+        path = os.path.join(self.output_dir, name)
+        return path if os.path.isfile(path) else None
+
+    @staticmethod
+    def iter_chunks(path: str, chunk_size: int = EXPORT_CHUNK_BYTES) -> Iterator[bytes]:
+        with open(path, "rb") as f:
+            while True:
+                chunk = f.read(chunk_size)
+                if not chunk:
+                    return
+                yield chunk
@@ -0,0 +1,93 @@
+# fusion.py
+"""
+Weighted reciprocal rank fusion (RRF) for lists that rank the same games.
+
+Each source contributes weight / (k + rank) to every game it lists (rank is
+the 1-based position in that source), and games are ordered by the summed
+score. A game listed near the top by several sources beats one listed
+first by a single source; k damps the difference between adjacent ranks
+(60 is the usual choice). Sources can be added one at a time as they
+complete, and ranked() is valid after every add, so partial results are
+already in fused order. add_record() takes one record at a time for
+sources that are consumed as streams.
+"""
+from typing import Any, Dict, List, Optional
+
+DEFAULT_K = 60
+
+
+def parse_weights(spec: Optional[str]) -> Dict[str, float]:
+    """'featured_home=1,new_trending_api=0.5' -> {"featured_home": 1.0, ...}"""
+    weights = {}
+    for part in (spec or "").split(","):
+        name, _, value = part.partition("=")
+        if name.strip() and value.strip():
+            weights[name.strip()] = float(value)
+    return weights
+
+
+class RankFusion:
+    def __init__(self, weights: Optional[Dict[str, float]] = None, k: int = DEFAULT_K):
+        self.weights = weights or {}
+        self.k = k
+        self._scores: Dict[str, float] = {}
+        self._rows: Dict[str, Dict[str, Any]] = {}
+        self._ranks: Dict[str, Dict[str, int]] = {}
+        self._first_seen: Dict[str, int] = {}
+        self._next_rank: Dict[str, int] = {}
+        self.sources: List[str] = []
+
+    def weight(self, source: str) -> float:
+        return self.weights.get(source, 1.0)
+
+    def _register(self, source: str) -> None:
+        if source not in self._next_rank:
+            self._next_rank[source] = 1
+            self.sources.append(source)
+
+    def add(self, source: str, rows: List[Dict[str, Any]]) -> None:
+        """Adds one source's ranking (rows in rank order; rows without an id are ignored)."""
+        self._register(source)
+        for row in rows:
+            self.add_record(source, row)
+
+    def add_record(self, source: str, row: Dict[str, Any]) -> None:
+        """Adds the source's next-ranked row."""
+        self._register(source)
+        game_id = row.get("id")
+        if not game_id:
+            return
+        game_id = str(game_id)
+        ranks = self._ranks.setdefault(game_id, {})
+        if source in ranks:
+            return  # a source listing a game twice only counts its best rank
+        rank = self._next_rank[source]
+        self._next_rank[source] = rank + 1
+        ranks[source] = rank
+        self._scores[game_id] = self._scores.get(game_id, 0.0) + self.weight(source) / (self.k + rank)
+        known = self._rows.get(game_id)
+        if known is None:
+            self._rows[game_id] = dict(row)
+            self._first_seen[game_id] = len(self._first_seen)
+        else:
+            # Fill fields the first source did not have (e.g. price from the search API).
+            for field, value in row.items():
+                if known.get(field) is None and value is not None:
+                    known[field] = value
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def ranked(self, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Rows by fused score (ties keep first-seen order) with fusionScore and sourceRanks."""
+        order = sorted(self._scores, key=lambda game_id: (-self._scores[game_id], self._first_seen[game_id]))
+        if limit is not None:
+            order = order[:limit]
+        return [
+            {
+                **self._rows[game_id],
+                "fusionScore": round(self._scores[game_id], 6),
+                "sourceRanks": dict(self._ranks[game_id]),
+            }
+            for game_id in order
+        ]
@@ -0,0 +1,230 @@
+# health.py
+"""
+Background health monitoring: upstream probes, event-loop lag and in-flight
+work, summarized into liveness and readiness.
+
+Probes run on their own schedule (every `probe_interval` seconds, all
+upstreams concurrently, through the shared rate limiter) and only their
+cached results are read by get_api_health and the /health endpoints, so a
+health check never waits on an upstream. Each probe fetches a small page or
+API response and reads at most PROBE_READ_BYTES of it.
+
+- live:  the event loop is still ticking (the lag sampler ran recently)
+- ready: live, loop lag below `max_loop_lag`, and no more than
+         `max_failing_fraction` of upstreams failing their latest probe
+"""
+import asyncio
+import ssl
+import statistics
+import time
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Deque, Dict, List, Optional
+
+import aiohttp
+
+PROBE_READ_BYTES = 4096
+PROBE_TIMEOUT_SECONDS = 10.0
+
+
+def _percentiles(values: List[float]) -> Dict[str, Optional[float]]:
+    if not values:
+        return {"p50": None, "p95": None, "max": None}
+    ordered = sorted(values)
+    return {
+        "p50": round(statistics.median(ordered), 1),
+        "p95": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))], 1),
+        "max": round(ordered[-1], 1),
+    }
+
+
+class UpstreamProbe:
+    def __init__(self, name: str, url: str, history: int = 50):
+        self.name = name
+        self.url = url
+        self.latencies_ms: Deque[float] = deque(maxlen=history)
+        self.last_ok: Optional[bool] = None
+        self.last_status: Optional[int] = None
+        self.last_error: Optional[str] = None
+        self.last_checked: Optional[datetime] = None
+        self.last_success: Optional[datetime] = None
+        self.consecutive_failures = 0
+
+    def record(self, ok: bool, latency_ms: float, status: Optional[int], error: Optional[str]) -> None:
+        self.last_ok = ok
+        self.last_status = status
+        self.last_error = error
+        self.last_checked = datetime.now()
+        self.latencies_ms.append(latency_ms)
+        if ok:
+            self.last_success = self.last_checked
+            self.consecutive_failures = 0
+        else:
+            self.consecutive_failures += 1
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "state": "unknown" if self.last_ok is None else ("up" if self.last_ok else "down"),
+            "lastStatus": self.last_status,
+            "lastError": self.last_error,
+            "lastChecked": self.last_checked.isoformat() if self.last_checked else None,
+            "lastSuccess": self.last_success.isoformat() if self.last_success else None,
+            "consecutiveFailures": self.consecutive_failures,
+            "latencyMs": _percentiles(list(self.latencies_ms)),
+        }
+
+
+class HealthMonitor:
+    def __init__(
+        self,
+        probes: Dict[str, str],
+        rate_limiter: Any = None,
+        url_rewriter: Any = None,
+        probe_interval: float = 60.0,
+        lag_interval: float = 0.5,
+        max_loop_lag: float = 1.0,
+        max_failing_fraction: float = 0.5,
+    ):
+        self.probes = {name: UpstreamProbe(name, url) for name, url in probes.items()}
+        self.rate_limiter = rate_limiter
+        self.url_rewriter = url_rewriter or (lambda url: url)
+        self.probe_interval = probe_interval
+        self.lag_interval = lag_interval
+        self.max_loop_lag = max_loop_lag
+        self.max_failing_fraction = max_failing_fraction
+        self.loop_lag_ms: Deque[float] = deque(maxlen=120)
+        self.last_tick: Optional[float] = None
+        self.tool_calls_in_flight = 0
+        self._tasks: List[asyncio.Task] = []
+        self.started_at: Optional[datetime] = None
+
+    # --- background tasks ---
+
+    def start(self) -> None:
+        """Starts the lag sampler and probe loop on the running event loop (idempotent)."""
+        if self._tasks and not all(task.done() for task in self._tasks):
+            return
+        loop = asyncio.get_running_loop()
+        self._tasks = [loop.create_task(self._lag_loop())]
+        if self.probe_interval > 0:
+            self._tasks.append(loop.create_task(self._probe_loop()))
+        self.started_at = datetime.now()
+        print(
+            f"[{datetime.now()}] HealthMonitor: started ({len(self.probes)} upstream probes every {self.probe_interval:.0f}s)"
+        )
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def _lag_loop(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            started = loop.time()
+            await asyncio.sleep(self.lag_interval)
+            self.loop_lag_ms.append(max(0.0, loop.time() - started - self.lag_interval) * 1000)
+            self.last_tick = time.monotonic()
+
+    async def _probe_loop(self) -> None:
+        ssl_context = ssl.create_default_context()
+        ssl_context.check_hostname = False
+        ssl_context.verify_mode = ssl.CERT_NONE
+        timeout = aiohttp.ClientTimeout(total=PROBE_TIMEOUT_SECONDS)
+        async with aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(ssl=ssl_context), timeout=timeout
+        ) as session:
+            while True:
+                await asyncio.gather(
+                    *(self._probe(session, probe) for probe in self.probes.values())
+                )
+                await asyncio.sleep(self.probe_interval)
+
+    async def _probe(self, session: aiohttp.ClientSession, probe: UpstreamProbe) -> None:
+        started = time.perf_counter()
+        status = None
+        try:
+            if self.rate_limiter is not None:
+                async with self.rate_limiter.slot(probe.url):
+                    started = time.perf_counter()  # don't count our own throttling
+                    status = await self._fetch_head_of(session, probe.url)
+            else:
+                status = await self._fetch_head_of(session, probe.url)
+            ok, error = status < 400, None if status < 400 else f"HTTP {status}"
+        except Exception as e:
+            ok, error = False, f"{type(e).__name__}: {e}"
+        probe.record(ok, (time.perf_counter() - started) * 1000, status, error)
+
+    async def _fetch_head_of(self, session: aiohttp.ClientSession, url: str) -> int:
+        async with session.get(
+            self.url_rewriter(url), headers={"User-Agent": "Mozilla/5.0 (health probe)"}
+        ) as response:
+            await response.content.read(PROBE_READ_BYTES)
+            response.close()
+            return response.status
+
+    # --- in-flight tracking ---
+
+    @contextmanager
+    def track_tool_call(self):
+        self.tool_calls_in_flight += 1
+        try:
+            yield
+        finally:
+            self.tool_calls_in_flight -= 1
+
+    # --- status ---
+
+    def liveness(self) -> Dict[str, Any]:
+        if self.last_tick is None:
+            # Not started (no lifespan); a process that answers is alive.
+            return {"live": True, "reason": "monitor not started"}
+        silent_for = time.monotonic() - self.last_tick
+        live = silent_for < max(5.0, self.lag_interval * 10)
+        return {
+            "live": live,
+            "secondsSinceLastLoopTick": round(silent_for, 2),
+        }
+
+    def readiness(self) -> Dict[str, Any]:
+        reasons = []
+        liveness = self.liveness()
+        if not liveness["live"]:
+            reasons.append("event loop stalled")
+        recent_lag = list(self.loop_lag_ms)[-10:]
+        if recent_lag and max(recent_lag) / 1000 > self.max_loop_lag:
+            reasons.append(f"event loop lag {max(recent_lag):.0f}ms > {self.max_loop_lag * 1000:.0f}ms")
+        checked = [p for p in self.probes.values() if p.last_ok is not None]
+        failing = [p.name for p in checked if not p.last_ok]
+        if checked and len(failing) / len(checked) > self.max_failing_fraction:
+            reasons.append(f"upstreams down: {', '.join(failing)}")
+        if reasons:
+            status = "unhealthy"
+        elif failing:
+            status = "degraded"
+        elif not checked and self.probe_interval > 0:
+            status = "starting"
+        else:
+            status = "healthy"
+        return {
+            "ready": not reasons and status != "starting",
+            "status": status,
+            "reasons": reasons,
+            "failingUpstreams": failing,
+        }
+
+    def summary(self, rate_limiter_stats: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        return {
+            **self.readiness(),
+            "liveness": self.liveness(),
+            "monitorStartedAt": self.started_at.isoformat() if self.started_at else None,
+            "probeIntervalSeconds": self.probe_interval,
+            "upstreams": {name: probe.summary() for name, probe in self.probes.items()},
+            "eventLoopLagMs": _percentiles(list(self.loop_lag_ms)),
+            "inFlight": {
+                "toolCalls": self.tool_calls_in_flight,
+                **({"upstreamRequests": rate_limiter_stats} if rate_limiter_stats is not None else {}),
+            },
+        }
@@ -0,0 +1,111 @@
+# memprofile.py
+"""
+tracemalloc-based memory diagnostics per tool call.
+
+Off by default; enable with MEMORY_PROFILE=1 or the get_memory_profile admin
+tool. While enabled, every tool call records the traced memory at start and
+end, the peak reached during the call and the source lines that allocated
+the most between the two. tracemalloc is process-wide, so with overlapping
+calls the peak is that of the whole process during the call (the report
+says how many other calls were in flight). Tracing itself slows allocation
+and adds memory, so leave it off in normal operation.
+"""
+import time
+import tracemalloc
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Deque, Dict, List, Optional
+
+TOP_ALLOCATION_SITES = 10
+
+
+class MemoryProfiler:
+    def __init__(self, max_reports: int = 50, frames: int = 5):
+        self.max_reports = max_reports
+        self.frames = frames
+        self.reports: Deque[Dict[str, Any]] = deque(maxlen=max_reports)
+        self.active_calls = 0
+
+    @property
+    def enabled(self) -> bool:
+        return tracemalloc.is_tracing()
+
+    def enable(self) -> None:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.frames)
+            print(f"[{datetime.now()}] MemoryProfiler: tracemalloc started ({self.frames} frames)")
+
+    def disable(self) -> None:
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+            print(f"[{datetime.now()}] MemoryProfiler: tracemalloc stopped")
+
+    @contextmanager
+    def profile(self, name: str):
+        """Records a report for the enclosed block when profiling is enabled."""
+        if not self.enabled:
+            yield
+            return
+        overlapping = self.active_calls
+        if overlapping == 0:
+            # Only reset when nothing else is measuring, or their peak would be lost.
+            tracemalloc.reset_peak()
+        self.active_calls += 1
+        before = tracemalloc.take_snapshot()
+        current_before, _ = tracemalloc.get_traced_memory()
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.active_calls -= 1
+            if tracemalloc.is_tracing():
+                current_after, peak = tracemalloc.get_traced_memory()
+                after = tracemalloc.take_snapshot()
+                self.reports.append(
+                    {
+                        "name": name,
+                        "timestamp": datetime.now().isoformat(),
+                        "durationMs": round((time.perf_counter() - started) * 1000, 1),
+                        "startKiB": current_before // 1024,
+                        "endKiB": current_after // 1024,
+                        "peakKiB": peak // 1024,
+                        "peakAboveStartKiB": max(0, peak - current_before) // 1024,
+                        "overlappingCalls": overlapping,
+                        "topAllocations": self._top_allocations(before, after),
+                    }
+                )
+
+    @staticmethod
+    def _top_allocations(
+        before: tracemalloc.Snapshot, after: tracemalloc.Snapshot
+    ) -> List[Dict[str, Any]]:
+        filters = [
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, __file__),
+        ]
+        diff = after.filter_traces(filters).compare_to(before.filter_traces(filters), "lineno")
+        return [
+            {
+                "site": f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}",
+                "sizeDiffKiB": round(stat.size_diff / 1024, 1),
+                "countDiff": stat.count_diff,
+            }
+            for stat in diff[:TOP_ALLOCATION_SITES]
+            if stat.size_diff
+        ]
+
+    def summary(self, last: Optional[int] = None) -> Dict[str, Any]:
+        reports = list(self.reports)
+        if last is not None:
+            reports = reports[-last:] if last > 0 else []
+        current, peak = tracemalloc.get_traced_memory() if self.enabled else (0, 0)
+        return {
+            "enabled": self.enabled,
+            "tracedCurrentKiB": current // 1024,
+            "tracedPeakKiB": peak // 1024,
+            "reports": reports,
+        }
+
+
+MEMORY_PROFILER = MemoryProfiler()
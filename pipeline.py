@@ -0,0 +1,106 @@
+# pipeline.py
+"""
+Pull-based source pipelines.
+
+Sources are async generators that yield records while they are being
+fetched and parsed. Consumers pull only as many records as they need;
+closing a source (leaving `async with aclosing(...)` or aclose()) unwinds
+its pending fetch, which drops the connection and stops the download.
+
+- merge():       runs several sources concurrently and yields
+                 (source, record) in arrival order; a failing source ends
+                 on its own without affecting the others; closing the
+                 merge cancels whatever is still running
+- head():        the first `limit` records of a source, then closes it
+- take_unique(): pulls records until `limit` distinct keys were seen,
+                 then closes the source
+- unique_records(): the same de-duplication for synchronous parsers
+                 (combine with itertools.islice to stop early)
+"""
+import asyncio
+from contextlib import aclosing
+from datetime import datetime
+from typing import Any, AsyncIterator, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+_DONE = object()
+
+
+def record_id(record: Dict[str, Any]) -> Optional[str]:
+    game_id = record.get("id")
+    return str(game_id) if game_id else None
+
+
+async def merge(sources: Dict[str, AsyncIterator[Any]]) -> AsyncIterator[Tuple[str, Any]]:
+    # maxsize=1: a source runs at most one record ahead of the consumer.
+    queue: "asyncio.Queue[Tuple[str, Any]]" = asyncio.Queue(maxsize=1)
+
+    async def pump(name: str, source: AsyncIterator[Any]) -> None:
+        try:
+            async with aclosing(source):
+                async for record in source:
+                    await queue.put((name, record))
+        except Exception as e:
+            print(f"[{datetime.now()}] Pipeline: source {name} failed: {e}")
+        await queue.put((name, _DONE))
+
+    tasks = [asyncio.create_task(pump(name, source)) for name, source in sources.items()]
+    running = len(tasks)
+    try:
+        while running:
+            name, record = await queue.get()
+            if record is _DONE:
+                running -= 1
+                continue
+            yield name, record
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+async def head(source: AsyncIterator[Any], limit: int) -> AsyncIterator[Any]:
+    async with aclosing(source):
+        if limit <= 0:
+            return
+        count = 0
+        async for record in source:
+            yield record
+            count += 1
+            if count >= limit:
+                return
+
+
+async def take_unique(
+    source: AsyncIterator[Dict[str, Any]],
+    limit: int,
+    key: Callable[[Dict[str, Any]], Optional[str]] = record_id,
+) -> List[Dict[str, Any]]:
+    """First `limit` records with distinct, non-empty keys; the rest is never produced."""
+    records: List[Dict[str, Any]] = []
+    seen = set()
+    if limit <= 0:
+        await source.aclose()
+        return records
+    async with aclosing(source):
+        async for record in source:
+            record_key = key(record)
+            if not record_key or record_key in seen:
+                continue
+            seen.add(record_key)
+            records.append(record)
+            if len(records) >= limit:
+                break
+    return records
+
+
+def unique_records(
+    records: Iterable[Dict[str, Any]],
+    key: Callable[[Dict[str, Any]], Optional[str]] = record_id,
+) -> Iterator[Dict[str, Any]]:
+    seen = set()
+    for record in records:
+        record_key = key(record)
+        if not record_key or record_key in seen:
+            continue
+        seen.add(record_key)
+        yield record
@@ -0,0 +1,337 @@
+# prices.py
+"""
+Price parsing and per-game price history.
+
+Store rows carry prices as display strings ("$19.99", "19,99€", "Free";
+Steam's .search_price holds original and discounted price concatenated,
+e.g. "$29.99$14.99"). annotate_prices() adds numeric fields to such rows:
+
+- priceAmount          current price (0.0 for free games)
+- originalPriceAmount  pre-discount price, when the row shows one
+- currency             ISO code from the symbol, or the region's currency
+
+PriceHistory keeps one series per (app id, region) and stores only change
+points: an observation equal to the previous one just moves lastSeen. Values
+are integer hundredths in array columns. Two per-region indexes are kept up
+to date on every observation, so cross-game queries never scan all series:
+
+- games whose current price equals their lowest recorded price
+- games by current discount percentage (one bucket per percent)
+"""
+import re
+import time
+from array import array
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+
+# Store region -> currency Steam prices it in; used when the symbol is ambiguous.
+REGION_CURRENCIES = {
+    "US": "USD",
+    "GB": "GBP",
+    "CA": "CAD",
+    "AU": "AUD",
+    "DE": "EUR",
+    "FR": "EUR",
+    "ES": "EUR",
+    "IT": "EUR",
+    "PL": "PLN",
+    "TR": "USD",
+    "BR": "BRL",
+    "JP": "JPY",
+    "KR": "KRW",
+    "CN": "CNY",
+    "RU": "RUB",
+}
+# Symbol as shown by the stores -> ISO code; None means "ask the region".
+CURRENCY_SYMBOLS = {
+    "$": None,
+    "¥": None,
+    "US$": "USD",
+    "CDN$": "CAD",
+    "C$": "CAD",
+    "A$": "AUD",
+    "AU$": "AUD",
+    "R$": "BRL",
+    "Mex$": "MXN",
+    "€": "EUR",
+    "£": "GBP",
+    "₩": "KRW",
+    "₺": "TRY",
+    "TL": "TRY",
+    "zł": "PLN",
+    "₽": "RUB",
+    "руб.": "RUB",
+    "pуб.": "RUB",
+}
+
+_NUMBER = re.compile(r"\d(?:[\d.,'\s ]*\d)?")
+_DECIMALS = re.compile(r"^(.*?)(?:[.,](\d{1,2}))?$")
+
+
+def _to_minor(number: str) -> Optional[int]:
+    """'1.234,56' / '1,234.56' -> 123456; '1,980' -> 198000 (hundredths)."""
+    digits = re.sub(r"[\s ']", "", number)
+    whole, fraction = _DECIMALS.match(digits).groups()
+    whole = whole.replace(",", "").replace(".", "")
+    if not whole.isdigit():
+        return None
+    return int(whole) * 100 + (int(fraction.ljust(2, "0")) if fraction else 0)
+
+
+def _currency(symbol: str, region: Optional[str]) -> Optional[str]:
+    symbol = symbol.strip()
+    if symbol in CURRENCY_SYMBOLS:
+        return CURRENCY_SYMBOLS[symbol] or REGION_CURRENCIES.get((region or "").upper())
+    if re.fullmatch(r"[A-Z]{3}", symbol):
+        return symbol
+    return REGION_CURRENCIES.get((region or "").upper()) if not symbol else None
+
+
+def parse_prices(text: Any, region: Optional[str] = None) -> List[Tuple[str, int, Optional[str]]]:
+    """
+    Every price in a display string as (display, hundredths, currency), in
+    order. "Free"/"Free to Play" -> [(text, 0, None)]; unparseable -> [].
+    """
+    if not isinstance(text, str):
+        return []
+    text = text.strip()
+    if text.lower().startswith("free"):
+        return [(text, 0, None)]
+    matches = list(_NUMBER.finditer(text))
+    prices = []
+    suffix_style = bool(matches) and matches[0].start() == 0
+    for index, match in enumerate(matches):
+        if suffix_style:
+            end = matches[index + 1].start() if index + 1 < len(matches) else len(text)
+            display, symbol = text[match.start():end], text[match.end():end]
+        else:
+            start = matches[index - 1].end() if index else 0
+            display, symbol = text[start:match.end()], text[start:match.start()]
+        amount = _to_minor(match.group())
+        if amount is not None:
+            prices.append((display.strip(), amount, _currency(symbol, region)))
+    return prices
+
+
+def annotate_prices(rows: List[Dict[str, Any]], region: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Adds priceAmount/originalPriceAmount/currency to rows in place (see module docstring)."""
+    for row in rows:
+        prices = parse_prices(row.get("price"), region)
+        if not prices:
+            continue
+        display, final, currency = prices[-1]
+        currency = currency or next((c for _, _, c in prices if c), None) or REGION_CURRENCIES.get(
+            (region or "").upper()
+        )
+        row["priceAmount"] = final / 100
+        row["currency"] = currency
+        if len(prices) > 1:
+            original_display, original, _ = prices[0]
+            row["price"] = display
+            row["originalPrice"] = original_display
+            row["originalPriceAmount"] = original / 100
+            if not row.get("discount") and original > final:
+                row["discount"] = round(100 * (original - final) / original)
+        else:
+            original = parse_prices(row.get("originalPrice"), region)
+            if original and original[-1][1] > final:
+                row["originalPriceAmount"] = original[-1][1] / 100
+    return rows
+
+
+class PriceSeries:
+    """Change points of one game's price in one region (hundredths, epoch seconds)."""
+
+    __slots__ = (
+        "currency", "times", "finals", "originals", "discounts",
+        "first_seen", "last_seen", "observations", "low", "low_since",
+    )
+
+    def __init__(self, currency: Optional[str]):
+        self.currency = currency
+        self.times = array("q")
+        self.finals = array("q")
+        self.originals = array("q")
+        self.discounts = array("b")
+        self.first_seen = 0
+        self.last_seen = 0
+        self.observations = 0
+        self.low: Optional[int] = None
+        self.low_since = 0
+
+    def add(self, at: int, final: int, original: int, discount: int) -> bool:
+        """Records an observation; False if it only confirmed the current value."""
+        self.observations += 1
+        self.last_seen = max(self.last_seen, at)
+        if not self.first_seen:
+            self.first_seen = at
+        if self.finals and (self.finals[-1], self.originals[-1], self.discounts[-1]) == (
+            final, original, discount
+        ):
+            return False
+        self.times.append(at)
+        self.finals.append(final)
+        self.originals.append(original)
+        self.discounts.append(discount)
+        if self.low is None or final < self.low:
+            self.low, self.low_since = final, at
+        return True
+
+    def trim(self, max_points: int) -> None:
+        # The historical low is kept even when its change point is dropped.
+        excess = len(self.times) - max_points
+        if excess > 0:
+            for column in (self.times, self.finals, self.originals, self.discounts):
+                del column[:excess]
+
+    @property
+    def current(self) -> int:
+        return self.finals[-1]
+
+    @property
+    def at_low(self) -> bool:
+        return self.current <= self.low
+
+
+def _money(hundredths: Optional[int]) -> Optional[float]:
+    return None if hundredths is None else hundredths / 100
+
+
+def _iso(epoch: int) -> Optional[str]:
+    return datetime.fromtimestamp(epoch).isoformat() if epoch else None
+
+
+class PriceHistory:
+    def __init__(self, max_series: int = 50_000, max_points: int = 500):
+        self.max_series = max_series
+        self.max_points = max_points
+        # (region, appid) -> series, least recently observed first
+        self._series: "OrderedDict[Tuple[str, str], PriceSeries]" = OrderedDict()
+        # region -> appids currently at their lowest recorded price
+        self._at_low: Dict[str, Set[str]] = {}
+        # region -> 101 buckets of appids by current discount percent
+        self._by_discount: Dict[str, List[Set[str]]] = {}
+        self.change_points = 0
+
+    def _unindex(self, region: str, appid: str, series: PriceSeries) -> None:
+        self._at_low.get(region, set()).discard(appid)
+        self._by_discount[region][series.discounts[-1]].discard(appid)
+
+    def _index(self, region: str, appid: str, series: PriceSeries) -> None:
+        if series.at_low:
+            self._at_low.setdefault(region, set()).add(appid)
+        self._by_discount.setdefault(region, [set() for _ in range(101)])[
+            series.discounts[-1]
+        ].add(appid)
+
+    def observe(
+        self,
+        appid: str,
+        region: str,
+        final: int,
+        original: Optional[int] = None,
+        discount: Optional[int] = None,
+        currency: Optional[str] = None,
+        at: Optional[float] = None,
+    ) -> bool:
+        """Records one observed price (hundredths); True if it changed the series."""
+        at = int(at or time.time())
+        original = final if original is None or original < final else original
+        if discount is None:
+            discount = round(100 * (original - final) / original) if original else 0
+        discount = max(0, min(100, int(discount)))
+        key = (region, appid)
+        series = self._series.get(key)
+        if series is None:
+            series = self._series[key] = PriceSeries(currency)
+            while len(self._series) > self.max_series:
+                (old_region, old_appid), old = self._series.popitem(last=False)
+                self._unindex(old_region, old_appid, old)
+                self.change_points -= len(old.times)
+        else:
+            self._series.move_to_end(key)
+            if currency and series.currency and currency != series.currency:
+                # The store switched the region's currency: start over.
+                self._unindex(region, appid, series)
+                self.change_points -= len(series.times)
+                series = self._series[key] = PriceSeries(currency)
+            else:
+                self._unindex(region, appid, series)
+        points = len(series.times)
+        changed = series.add(at, final, original, discount)
+        series.trim(self.max_points)
+        self.change_points += len(series.times) - points
+        self._index(region, appid, series)
+        return changed
+
+    def history(self, appid: str, region: str, max_points: Optional[int] = None) -> Optional[Dict[str, Any]]:
+        series = self._series.get((region, appid))
+        if series is None:
+            return None
+        timeline = [
+            {
+                "at": _iso(series.times[i]),
+                "price": _money(series.finals[i]),
+                "originalPrice": _money(series.originals[i]),
+                "discount": series.discounts[i],
+            }
+            for i in range(len(series.times))
+        ]
+        if max_points is not None:
+            timeline = timeline[-max(1, max_points):]
+        return {
+            **self._summary(appid, region, series),
+            "firstSeen": _iso(series.first_seen),
+            "observations": series.observations,
+            "timeline": timeline,
+        }
+
+    @staticmethod
+    def _summary(appid: str, region: str, series: PriceSeries) -> Dict[str, Any]:
+        current = series.current
+        return {
+            "id": appid,
+            "region": region,
+            "currency": series.currency,
+            "price": _money(current),
+            "originalPrice": _money(series.originals[-1]),
+            "discount": series.discounts[-1],
+            "historicalLow": _money(series.low),
+            "historicalLowSince": _iso(series.low_since),
+            "atHistoricalLow": series.at_low,
+            "percentAboveLow": round(100 * (current - series.low) / series.low, 1)
+            if series.low
+            else None,
+            "lastSeen": _iso(series.last_seen),
+        }
+
+    def _by_discount_desc(self, region: str, min_discount: int) -> Iterator[str]:
+        buckets = self._by_discount.get(region)
+        if not buckets:
+            return
+        for discount in range(100, max(0, min_discount) - 1, -1):
+            yield from sorted(buckets[discount])
+
+    def lows(
+        self, region: str, min_discount: int = 0, at_low_only: bool = True, limit: int = 20
+    ) -> List[Dict[str, Any]]:
+        """Games by current discount (highest first), optionally only those at their historical low."""
+        at_low = self._at_low.get(region, set())
+        results = []
+        for appid in self._by_discount_desc(region, min_discount):
+            if at_low_only and appid not in at_low:
+                continue
+            results.append(self._summary(appid, region, self._series[(region, appid)]))
+            if len(results) >= limit:
+                break
+        return results
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "series": len(self._series),
+            "changePoints": self.change_points,
+            "atLowByRegion": {region: len(appids) for region, appids in self._at_low.items()},
+            "maxSeries": self.max_series,
+            "maxPointsPerSeries": self.max_points,
+        }
@@ -0,0 +1,179 @@
+# profiler.py
+"""
+On-demand sampling CPU profiler for a live server.
+
+A daemon thread wakes every `interval` seconds, reads every other thread's
+current stack via sys._current_frames() and counts identical stacks. Nothing
+is hooked into the interpreter, so the cost while running is one stack walk
+per thread per sample, and zero while stopped (the default). A run ends
+after a time window, after the next N tool calls, or on stop(), and writes
+a collapsed-stack file ("frame;frame;frame count" per line) that
+flamegraph.pl, speedscope or inferno can render directly.
+"""
+import os
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+MAX_WINDOW_SECONDS = 600.0
+MIN_INTERVAL_SECONDS = 0.001
+# Innermost frames of threads that are waiting rather than running.
+IDLE_FRAMES = ("select (selectors.py", "wait (threading.py", "_worker (thread.py", "get (queue.py")
+PROJECT_FILES = {
+    name
+    for name in os.listdir(os.path.dirname(os.path.abspath(__file__)))
+    if name.endswith(".py")
+}
+
+
+def _frame_label(code) -> str:
+    filename = os.path.basename(code.co_filename)
+    return f"{code.co_name} ({filename}:{code.co_firstlineno})".replace(";", ":")
+
+
+class SamplingProfiler:
+    def __init__(self, output_dir: Optional[str] = None):
+        self.output_dir = output_dir or tempfile.gettempdir()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._stacks: Counter = Counter()
+        self._samples = 0
+        self._started_at: Optional[float] = None
+        self._deadline: Optional[float] = None
+        self._remaining_calls: Optional[int] = None
+        self._interval = 0.01
+        self.last_result: Optional[Dict[str, Any]] = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(
+        self,
+        duration: Optional[float] = None,
+        tool_calls: Optional[int] = None,
+        interval: float = 0.01,
+    ) -> Dict[str, Any]:
+        """Starts sampling for `duration` seconds or the next `tool_calls` calls."""
+        with self._lock:
+            if self.running:
+                raise RuntimeError("a profile is already running")
+            window = min(duration or MAX_WINDOW_SECONDS, MAX_WINDOW_SECONDS)
+            self._interval = max(interval, MIN_INTERVAL_SECONDS)
+            self._stacks = Counter()
+            self._samples = 0
+            self._started_at = time.monotonic()
+            self._deadline = self._started_at + window
+            self._remaining_calls = tool_calls if tool_calls and tool_calls > 0 else None
+            self._stop.clear()
+            self._thread = threading.Thread(
+                target=self._run, name="sampling-profiler", daemon=True
+            )
+            self._thread.start()
+        print(
+            f"[{datetime.now()}] SamplingProfiler: started (window {window:.0f}s, "
+            f"tool calls {self._remaining_calls or '-'}, interval {self._interval * 1000:.0f}ms)"
+        )
+        return self.status()
+
+    def stop(self) -> Optional[Dict[str, Any]]:
+        thread = self._thread
+        if thread is None:
+            return self.last_result
+        self._stop.set()
+        if thread is not threading.current_thread():
+            thread.join(timeout=10)
+        return self.last_result
+
+    def on_tool_call_finished(self) -> None:
+        """Counts down a "next N tool calls" run; called by the server middleware."""
+        if self._remaining_calls is None or not self.running:
+            return
+        self._remaining_calls -= 1
+        if self._remaining_calls <= 0:
+            self._stop.set()
+
+    def _run(self) -> None:
+        own_id = threading.get_ident()
+        names = {}
+        while not self._stop.wait(self._interval):
+            if time.monotonic() >= self._deadline:
+                break
+            if len(names) != threading.active_count():
+                names = {t.ident: t.name for t in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(_frame_label(frame.f_code))
+                    frame = frame.f_back
+                stack.append(names.get(thread_id, f"thread-{thread_id}"))
+                self._stacks[";".join(reversed(stack))] += 1
+            self._samples += 1
+        self._write()
+
+    def _write(self) -> None:
+        elapsed = time.monotonic() - (self._started_at or time.monotonic())
+        path = os.path.join(
+            self.output_dir, f"cpu-profile-{datetime.now():%Y%m%d-%H%M%S}-{os.getpid()}.collapsed"
+        )
+        try:
+            os.makedirs(self.output_dir, exist_ok=True)
+            with open(path, "w", encoding="utf-8") as f:
+                for stack, count in self._stacks.most_common():
+                    f.write(f"{stack} {count}\n")
+        except OSError as e:
+            print(f"[{datetime.now()}] SamplingProfiler: could not write {path}: {e}")
+            path = None
+        self.last_result = {
+            "file": path,
+            "format": "collapsed stacks (flamegraph.pl / speedscope)",
+            "durationSeconds": round(elapsed, 2),
+            "samples": self._samples,
+            "distinctStacks": len(self._stacks),
+            "hottestFrames": self._hottest_frames(),
+            "finishedAt": datetime.now().isoformat(),
+        }
+        print(f"[{datetime.now()}] SamplingProfiler: {self._samples} samples written to {path}")
+
+    def _hottest_frames(self, top: int = 15) -> Dict[str, Dict[str, int]]:
+        """
+        "self": samples per innermost frame; "project": samples with each of
+        this project's functions anywhere on the stack. Idle waits (event loop
+        select, parked threads) are excluded from both.
+        """
+        self_time: Counter = Counter()
+        inclusive: Counter = Counter()
+        for stack, count in self._stacks.items():
+            frames = stack.split(";")[1:]
+            if not frames or frames[-1].startswith(IDLE_FRAMES):
+                continue
+            self_time[frames[-1]] += count
+            for frame in set(frames):
+                if frame.rsplit("(", 1)[-1].split(":")[0] in PROJECT_FILES:
+                    inclusive[frame] += count
+        return {
+            "self": dict(self_time.most_common(top)),
+            "project": dict(inclusive.most_common(top)),
+        }
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "running": self.running,
+            "elapsedSeconds": round(time.monotonic() - self._started_at, 2)
+            if self.running and self._started_at
+            else None,
+            "samples": self._samples if self.running else None,
+            "remainingToolCalls": self._remaining_calls if self.running else None,
+            "outputDir": self.output_dir,
+            "lastResult": self.last_result,
+        }
+
+
+CPU_PROFILER = SamplingProfiler(os.getenv("PROFILE_OUTPUT_DIR"))
@@ -0,0 +1,93 @@
+# projection.py
+"""
+Field projection, limits and compact encoding for tool responses.
+
+apply_projection() walks a tool payload and rewrites every list of game rows
+(under "data", and "added" in delta payloads):
+
+- fields:  keep only these keys per row ("id" is always kept)
+- limit:   keep only the first N rows of each "data" list
+- compact: encode row lists column-wise as {"columns": [...], "rows": [[...]]}
+           and drop illustrative envelope keys
+
+Projection only rewrites the response: datasets are always fetched and
+cached as full snapshots, so every field set shares one cache entry.
+"""
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional, Union
+
+ALWAYS_INCLUDED = ("id",)
+ROW_LIST_KEYS = ("data", "added")
+VERBOSE_KEYS = ("sources_consulted", "source_type", "notes")
+
+
+def normalize_fields(fields: Union[None, str, Iterable[str]]) -> Optional[FrozenSet[str]]:
+    """Accepts a list or a comma-separated string; None/empty means all fields."""
+    if not fields:
+        return None
+    if isinstance(fields, str):
+        fields = fields.split(",")
+    names = {f.strip() for f in fields if f and f.strip()}
+    return frozenset(names | set(ALWAYS_INCLUDED)) if names else None
+
+
+def project_rows(
+    rows: List[Dict[str, Any]], fields: Optional[FrozenSet[str]], limit: Optional[int] = None
+) -> List[Dict[str, Any]]:
+    if limit is not None:
+        rows = rows[: max(0, limit)]
+    if fields is None:
+        return rows
+    return [{k: v for k, v in row.items() if k in fields} for row in rows]
+
+
+def encode_columnar(rows: List[Dict[str, Any]]) -> Dict[str, Any]:
+    columns: List[str] = []
+    seen = set()
+    for row in rows:
+        for key in row:
+            if key not in seen:
+                seen.add(key)
+                columns.append(key)
+    return {"columns": columns, "rows": [[row.get(c) for c in columns] for row in rows]}
+
+
+def _is_row_list(value: Any) -> bool:
+    return isinstance(value, list) and all(isinstance(item, dict) for item in value)
+
+
+def apply_projection(
+    payload: Any,
+    fields: Union[None, str, Iterable[str]] = None,
+    limit: Optional[int] = None,
+    compact: bool = False,
+) -> Any:
+    fields = normalize_fields(fields)
+    if fields is None and limit is None and not compact:
+        return payload
+
+    def visit(node: Any) -> Any:
+        if isinstance(node, list):
+            return [visit(item) for item in node]
+        if not isinstance(node, dict):
+            return node
+        out: Dict[str, Any] = {}
+        for key, value in node.items():
+            if compact and key in VERBOSE_KEYS:
+                continue
+            if key in ROW_LIST_KEYS and _is_row_list(value):
+                rows = project_rows(value, fields, limit if key == "data" else None)
+                if key == "data" and len(rows) < len(value):
+                    out["truncatedFrom"] = len(value)
+                out[key] = encode_columnar(rows) if compact else rows
+            elif key == "sharedMetadata" and isinstance(value, dict) and fields is not None:
+                out[key] = {
+                    game_id: {k: v for k, v in meta.items() if k in fields}
+                    for game_id, meta in value.items()
+                }
+            else:
+                out[key] = visit(value)
+        if "count" in out and isinstance(out.get("data"), (list, dict)) and "truncatedFrom" in out:
+            out["count"] = len(out["data"]["rows"] if compact else out["data"])
+        return out
+
+    return visit(payload)
@@ -0,0 +1,133 @@
+# promotions.py
+"""
+Epic free-game promotion calendar.
+
+Epic's free-games list only changes when a promotion starts or ends, and
+every row carries its window (promotionDetails.startDate / endDate):
+
+- expiry_ttl():      cache lifetime for a fetched list: until the earliest
+                     upcoming start or end, capped by a safety TTL (new
+                     promotions can be announced at any time). A list that
+                     still shows a window which should already have started
+                     or ended (the API lags the boundary a little) is
+                     retried after `retry_ttl` instead
+- PromotionCalendar: per-region windows from the last fetch, sorted by
+                     start, plus a sorted list of all boundaries, so "what
+                     is free at time T" and "next change after T" are
+                     bisect lookups without a network call
+"""
+import time
+from bisect import bisect_right
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+# Row fields kept per window in the calendar.
+WINDOW_FIELDS = ("id", "namespace", "name", "productSlug", "url", "originalPrice", "developer", "publisher")
+
+
+def parse_time(value: Any) -> Optional[float]:
+    """ISO 8601 ('2024-05-16T15:00:00.000Z') -> epoch seconds; naive times are UTC."""
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(str(value).strip().replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+
+def _iso(epoch: float) -> str:
+    return datetime.fromtimestamp(epoch, timezone.utc).isoformat().replace("+00:00", "Z")
+
+
+def promotion_window(row: Dict[str, Any]) -> Optional[Tuple[float, float]]:
+    details = row.get("promotionDetails") or {}
+    start, end = parse_time(details.get("startDate")), parse_time(details.get("endDate"))
+    if start is None or end is None or end <= start:
+        return None
+    return start, end
+
+
+def expiry_ttl(
+    rows: List[Dict[str, Any]],
+    safety_ttl: float,
+    retry_ttl: float = 60.0,
+    now: Optional[float] = None,
+) -> float:
+    """Seconds a fetched free-games list stays valid (see module docstring)."""
+    now = time.time() if now is None else now
+    next_boundary = None
+    for row in rows:
+        window = promotion_window(row)
+        if window is None:
+            continue
+        start, end = window
+        if (row.get("isFreeNow") and end <= now) or (row.get("isUpcomingFree") and start <= now):
+            return min(retry_ttl, safety_ttl)
+        for boundary in window:
+            if boundary > now and (next_boundary is None or boundary < next_boundary):
+                next_boundary = boundary
+    if next_boundary is None:
+        return safety_ttl
+    return max(1.0, min(safety_ttl, next_boundary - now))
+
+
+class PromotionCalendar:
+    def __init__(self):
+        # region -> {"fetchedAt", "starts", "windows": [(start, end, row)], "boundaries"}
+        self._regions: Dict[str, Dict[str, Any]] = {}
+
+    def update(self, region: str, rows: List[Dict[str, Any]], fetched_at: Optional[float] = None) -> None:
+        windows = []
+        for row in rows:
+            window = promotion_window(row)
+            if window is not None:
+                windows.append((*window, {f: row.get(f) for f in WINDOW_FIELDS}))
+        windows.sort(key=lambda window: window[0])
+        self._regions[region] = {
+            "fetchedAt": fetched_at or time.time(),
+            "starts": [start for start, _, _ in windows],
+            "windows": windows,
+            "boundaries": sorted({t for start, end, _ in windows for t in (start, end)}),
+        }
+
+    def has(self, region: str) -> bool:
+        return region in self._regions
+
+    def free_at(self, region: str, at: float) -> Optional[Dict[str, Any]]:
+        """Games free at `at` and the next known change; None if the region was never fetched."""
+        calendar = self._regions.get(region)
+        if calendar is None:
+            return None
+        started = bisect_right(calendar["starts"], at)
+        free = [
+            {**row, "startDate": _iso(start), "endDate": _iso(end)}
+            for start, end, row in calendar["windows"][:started]
+            if end > at
+        ]
+        boundaries = calendar["boundaries"]
+        following = bisect_right(boundaries, at)
+        return {
+            "at": _iso(at),
+            "games": free,
+            "nextChange": _iso(boundaries[following]) if following < len(boundaries) else None,
+            "calendarFetchedAt": _iso(calendar["fetchedAt"]),
+            # Promotions announced after the fetch are unknown, so answers
+            # past the last known boundary may be incomplete.
+            "beyondKnownSchedule": not boundaries or at >= boundaries[-1],
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        now = time.time()
+        stats = {}
+        for region, calendar in self._regions.items():
+            boundaries = calendar["boundaries"]
+            following = bisect_right(boundaries, now)
+            stats[region] = {
+                "windows": len(calendar["windows"]),
+                "fetchedAt": _iso(calendar["fetchedAt"]),
+                "nextChange": _iso(boundaries[following]) if following < len(boundaries) else None,
+            }
+        return stats
@@ -0,0 +1,283 @@
+# quotas.py
+"""
+Per-client quotas and fair sharing of upstream fetch slots.
+
+Clients are identified per tool call (client_id_from_request): a bearer
+token listed in QUOTA_CLIENT_TOKENS ("<token>=<client>,...") identifies its
+client by name; every other caller (no token, an unknown token) is its peer
+address, so inventing tokens or headers never yields a fresh bucket. Calls
+without an HTTP request (stdio, in-process) are "local".
+server.py stores the id in CURRENT_CLIENT for the duration of the call, so
+fetches made on the call's behalf are attributed to the client.
+
+- QuotaManager:  token buckets per client and per (client, tool); a call
+                 takes one token from each bucket that applies or none
+- FairSemaphore: a per-host slot pool (used by HostRateLimiter) whose
+                 waiters are served by weighted fair queuing: each request
+                 gets a virtual finish tag (the client's previous tag, or
+                 the pool's current virtual time if it is ahead, plus
+                 1/weight) and the lowest tag gets the next free slot, so a
+                 client with a long backlog cannot starve the others
+"""
+import asyncio
+import hashlib
+import heapq
+import itertools
+import re
+import time
+from collections import OrderedDict
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+# Fetches outside a tool call (warm-up, probes, resource refreshes) run as "internal".
+CURRENT_CLIENT: ContextVar[str] = ContextVar("current_client", default="internal")
+
+# Configured client names; no ":" so they cannot pose as "ip:..." ids.
+_CLIENT_NAME = re.compile(r"^[A-Za-z0-9._@-]{1,64}$")
+_RESERVED_CLIENTS = ("internal", "local", "unknown")
+
+# tool -> (calls per minute, burst) for every client.
+DEFAULT_TOOL_QUOTAS = {
+    "get_all_trending_games": (6.0, 3),
+    "get_all_trending_changes": (12.0, 4),
+    "get_multi_region_data": (6.0, 3),
+    "export_snapshots": (2.0, 1),
+}
+
+
+def _token_digest(token: str) -> str:
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+def parse_client_tokens(spec: Optional[str]) -> Dict[str, str]:
+    """'s3cret=team-a,0ther=team-b' -> {sha256(token): client name}"""
+    clients = {}
+    for part in (spec or "").split(","):
+        token, _, client = part.strip().rpartition("=")
+        if not token.strip() or not client.strip():
+            continue
+        client = client.strip()
+        if not _CLIENT_NAME.match(client) or client in _RESERVED_CLIENTS:
+            raise ValueError(f"Invalid client name in QUOTA_CLIENT_TOKENS: {client!r}")
+        clients[_token_digest(token.strip())] = client
+    return clients
+
+
+def client_id_from_request(request: Any, client_tokens: Optional[Dict[str, str]] = None) -> str:
+    """Client id for a Starlette request; None -> "local"."""
+    if request is None:
+        return "local"
+    authorization = request.headers.get("authorization", "")
+    if client_tokens and authorization.lower().startswith("bearer "):
+        client = client_tokens.get(_token_digest(authorization[7:].strip()))
+        if client:
+            return client
+    peer = request.client.host if request.client else None
+    return f"ip:{peer}" if peer else "unknown"
+
+
+def parse_tool_quotas(spec: Optional[str]) -> Dict[str, Tuple[float, int]]:
+    """'get_all_trending_games=6/3,export_snapshots=2/1' -> {tool: (per_minute, burst)}"""
+    quotas = {}
+    for part in (spec or "").split(","):
+        name, _, value = part.partition("=")
+        if not name.strip() or not value.strip():
+            continue
+        per_minute, _, burst = value.partition("/")
+        per_minute = float(per_minute)
+        quotas[name.strip()] = (
+            per_minute,
+            int(burst) if burst.strip() else max(1, int(per_minute)),
+        )
+    return quotas
+
+
+class TokenBucket:
+    def __init__(self, per_minute: float, burst: int):
+        self.rate = per_minute / 60.0
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def available(self, now: float) -> float:
+        self._refill(now)
+        return self.tokens
+
+    def retry_after(self) -> float:
+        """Seconds until one token is available (after _refill)."""
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / self.rate if self.rate > 0 else float("inf")
+
+
+class QuotaExceeded(Exception):
+    def __init__(self, message: str, retry_after: float, usage: Dict[str, Any]):
+        super().__init__(message)
+        self.retry_after = retry_after
+        self.usage = usage
+
+
+class QuotaManager:
+    def __init__(
+        self,
+        client_per_minute: float = 60.0,
+        client_burst: int = 20,
+        tool_quotas: Optional[Dict[str, Tuple[float, int]]] = None,
+        exempt: Iterable[str] = (),
+        max_clients: int = 10_000,
+    ):
+        self.client_per_minute = client_per_minute
+        self.client_burst = client_burst
+        self.tool_quotas = {**DEFAULT_TOOL_QUOTAS, **(tool_quotas or {})}
+        self.exempt = frozenset(exempt)
+        self.max_clients = max_clients
+        # client -> {"bucket": TokenBucket | None, "tools": {tool: TokenBucket}, counters}
+        self._clients: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+
+    def _client(self, client_id: str) -> Dict[str, Any]:
+        state = self._clients.get(client_id)
+        if state is None:
+            state = self._clients[client_id] = {
+                "bucket": TokenBucket(self.client_per_minute, self.client_burst)
+                if self.client_per_minute > 0
+                else None,
+                "tools": {},
+                "calls": 0,
+                "rejected": 0,
+                "lastSeen": None,
+            }
+            while len(self._clients) > self.max_clients:
+                self._clients.popitem(last=False)
+        self._clients.move_to_end(client_id)
+        return state
+
+    def _buckets(self, state: Dict[str, Any], tool: str) -> List[Tuple[str, TokenBucket]]:
+        buckets = []
+        if state["bucket"] is not None:
+            buckets.append(("client", state["bucket"]))
+        if tool in self.tool_quotas and self.tool_quotas[tool][0] > 0:
+            bucket = state["tools"].get(tool)
+            if bucket is None:
+                bucket = state["tools"][tool] = TokenBucket(*self.tool_quotas[tool])
+            buckets.append(("tool", bucket))
+        return buckets
+
+    def consume(self, client_id: str, tool: str) -> Dict[str, Any]:
+        """Charges one call; returns the usage report or raises QuotaExceeded."""
+        state = self._client(client_id)
+        state["lastSeen"] = time.time()
+        if tool in self.exempt:
+            return {"clientId": client_id, "exempt": True}
+        now = time.monotonic()
+        buckets = self._buckets(state, tool)
+        exhausted = [(scope, bucket) for scope, bucket in buckets if bucket.available(now) < 1]
+        if exhausted:
+            state["rejected"] += 1
+            retry_after = max(bucket.retry_after() for _, bucket in exhausted)
+            scopes = " and ".join(f"{scope} quota" for scope, _ in exhausted)
+            raise QuotaExceeded(
+                f"Client {client_id} exceeded its {scopes} for {tool}",
+                round(retry_after, 1),
+                self._usage(client_id, buckets),
+            )
+        for _, bucket in buckets:
+            bucket.tokens -= 1
+        state["calls"] += 1
+        return self._usage(client_id, buckets)
+
+    @staticmethod
+    def _usage(client_id: str, buckets: List[Tuple[str, TokenBucket]]) -> Dict[str, Any]:
+        usage: Dict[str, Any] = {"clientId": client_id}
+        for scope, bucket in buckets:
+            usage[scope] = {
+                "remaining": int(bucket.tokens),
+                "burst": bucket.burst,
+                "perMinute": round(bucket.rate * 60, 2),
+            }
+        return usage
+
+    def stats(self, top: int = 20) -> Dict[str, Any]:
+        now = time.monotonic()
+        busiest = sorted(self._clients.items(), key=lambda item: -item[1]["calls"])[:top]
+        return {
+            "clientPerMinute": self.client_per_minute,
+            "clientBurst": self.client_burst,
+            "toolQuotas": {
+                tool: {"perMinute": per_minute, "burst": burst}
+                for tool, (per_minute, burst) in self.tool_quotas.items()
+            },
+            "clients": len(self._clients),
+            "busiest": [
+                {
+                    "client": client_id,
+                    "calls": state["calls"],
+                    "rejected": state["rejected"],
+                    "remaining": int(state["bucket"].available(now)) if state["bucket"] else None,
+                    "lastSeen": datetime.fromtimestamp(state["lastSeen"]).isoformat()
+                    if state["lastSeen"]
+                    else None,
+                }
+                for client_id, state in busiest
+            ],
+        }
+
+
+class FairSemaphore:
+    """Semaphore whose waiters are served by weighted fair queuing across clients."""
+
+    def __init__(self, capacity: int, weight: Callable[[str], float] = lambda client: 1.0):
+        self.capacity = capacity
+        self.available = capacity
+        self.weight = weight
+        self.virtual_time = 0.0
+        self._finish: Dict[str, float] = {}
+        self._waiters: List[Tuple[float, int, str, asyncio.Future]] = []
+        self._arrivals = itertools.count()
+        self.waiting_by_client: Dict[str, int] = {}
+
+    def _tag(self, client: str) -> float:
+        tag = max(self.virtual_time, self._finish.get(client, 0.0)) + 1.0 / max(self.weight(client), 1e-6)
+        self._finish[client] = tag
+        return tag
+
+    def _grant(self, tag: float) -> None:
+        self.available -= 1
+        self.virtual_time = max(self.virtual_time, tag)
+        if len(self._finish) > 1000:
+            # Clients at or behind the virtual time restart from it anyway.
+            self._finish = {c: t for c, t in self._finish.items() if t > self.virtual_time}
+
+    async def acquire(self, client: str) -> None:
+        tag = self._tag(client)
+        if self.available > 0:
+            # release() hands free slots to live waiters first, so none are waiting.
+            self._grant(tag)
+            return
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (tag, next(self._arrivals), client, future))
+        self.waiting_by_client[client] = self.waiting_by_client.get(client, 0) + 1
+        try:
+            await future
+        except BaseException:
+            # Cancelled after the slot was granted: hand it on.
+            if future.done() and not future.cancelled():
+                self.release()
+            raise
+        finally:
+            self.waiting_by_client[client] -= 1
+            if not self.waiting_by_client[client]:
+                del self.waiting_by_client[client]
+
+    def release(self) -> None:
+        self.available += 1
+        while self._waiters and self.available > 0:
+            tag, _, _, future = heapq.heappop(self._waiters)
+            if future.done():
+                continue  # cancelled while waiting
+            self._grant(tag)
+            future.set_result(None)
@@ -1,9 +1,46 @@
 # server.py
-from fastmcp import FastMCP
+# startup önce import edilir ki diğer import'ların süresi ölçülebilsin.
+from startup import STARTUP
+import asyncio
+import hmac
+import json
+import os
+import threading
+from contextlib import asynccontextmanager
 from datetime import datetime # get_api_health için eklendi
+from typing import Dict, List, Optional, Union
+
+with STARTUP.phase("import fastmcp"):
+    from fastmcp import FastMCP
+    from fastmcp.server.dependencies import get_http_request
+    from fastmcp.server.middleware import Middleware
+    from fastmcp.tools import ToolResult
+    from starlette.middleware import Middleware as ASGIMiddleware
+    from starlette.responses import JSONResponse, Response, StreamingResponse
+
+from admission import STALE_READ, AdmissionController, Overloaded, StaleRead, parse_limits
+from compression import CompressionMiddleware, ResponseCompressor, parse_encodings
+from deltas import diff_snapshots, is_material_change
+from memprofile import MEMORY_PROFILER
+from profiler import CPU_PROFILER
+from tracing import SPAN_KIND_SERVER, TRACER
+from projection import apply_projection
+from quotas import (
+    CURRENT_CLIENT,
+    QuotaExceeded,
+    QuotaManager,
+    client_id_from_request,
+    parse_client_tokens,
+    parse_tool_quotas,
+)
+from subscriptions import ResourceSubscriptionHub, install_subscription_handlers
 
 # Global placeholder for the app instance
 _app_instance = None
+_app_instance_lock = threading.Lock()
+# Sunucunun event loop'u (lifespan içinde atanır); app ilk oluşturulduğunda
+# arka plan görevleri bu loop üzerinde başlatılır.
+_server_loop: Optional[asyncio.AbstractEventLoop] = None
 
 def _get_app_instance():
     """
@@ -11,73 +48,738 @@ def _get_app_instance():
     Bu fonksiyon, bir araç ilk kez çağrıldığında app örneğini oluşturur.
     """
     global _app_instance
+    STARTUP.mark("first_app_access")
     if _app_instance is None:
-        # app modülünü ve GameAnalyticsApp sınıfını burada import ediyoruz
-        # böylece başlangıçta yüklenmemiş oluyorlar.
-        from app import GameAnalyticsApp # app.py dosyasından GameAnalyticsApp import ediliyor
-        print(f"[{datetime.now()}] Initializing GameAnalyticsApp instance...")
-        _app_instance = GameAnalyticsApp()
+        # Isınma (warm-up) thread'i ile ilk araç çağrısı aynı anda gelebilir.
+        with _app_instance_lock:
+            if _app_instance is None:
+                # app modülünü ve GameAnalyticsApp sınıfını burada import ediyoruz
+                # böylece başlangıçta yüklenmemiş oluyorlar. (bs4/lxml ilk parse'ta yüklenir.)
+                app_module = STARTUP.timed_import("app")
+                print(f"[{datetime.now()}] Initializing GameAnalyticsApp instance...")
+                with STARTUP.phase("GameAnalyticsApp()"):
+                    instance = app_module.GameAnalyticsApp()
+                instance.snapshot_listeners.append(_on_snapshot_change)
+                _app_instance = instance
+                if _server_loop is not None:
+                    # İlk oluşturma bir worker thread'inde de olabilir (warm-up).
+                    _server_loop.call_soon_threadsafe(_start_background_tasks, instance)
     return _app_instance
 
+# --- MCP Resources ---
+# Veri setleri abone olunabilir kaynaklar olarak da sunulur:
+# games://<path> (varsayılan bölge US) ve games://<path>/<BÖLGE>.
+RESOURCE_DATASETS = {
+    "steam/trending": "steam_trending",
+    "steam/top-sellers": "steam_top_sellers",
+    "steam/most-played": "steam_most_played",
+    "epic/free-games": "epic_free_games",
+    "epic/trending": "epic_trending_games",
+}
+DEFAULT_RESOURCE_REGION = "US"
+
+def _parse_resource_uri(uri: str):
+    """games://steam/top-sellers/DE -> ("steam_top_sellers", "DE")"""
+    path = uri.split("://", 1)[-1].strip("/")
+    if path in RESOURCE_DATASETS:
+        return RESOURCE_DATASETS[path], DEFAULT_RESOURCE_REGION
+    base, _, region = path.rpartition("/")
+    if base in RESOURCE_DATASETS and region:
+        return RESOURCE_DATASETS[base], region.upper()
+    return None, None
+
+async def _refresh_subscribed(uris: List[str]):
+    """Abone olunan veri setlerini yeniden okur; değişiklikler _on_snapshot_change'e düşer."""
+    app = _get_app_instance()
+    targets = {_parse_resource_uri(uri) for uri in uris}
+    await asyncio.gather(
+        *(app.get_dataset(dataset, region) for dataset, region in targets if dataset),
+        return_exceptions=True,
+    )
+
+_subscriptions = ResourceSubscriptionHub(
+    refresh=_refresh_subscribed,
+    refresh_interval=float(os.getenv("RESOURCE_REFRESH_SECONDS", "120")),
+    coalesce_window=float(os.getenv("RESOURCE_NOTIFY_COALESCE_SECONDS", "2")),
+)
+
+def _on_snapshot_change(dataset, region, old_rows, new_rows):
+    """GameAnalyticsApp bir veri setinin içeriği değiştiğinde bunu çağırır."""
+    if not is_material_change(diff_snapshots(old_rows, new_rows)):
+        return
+    for uri in _subscriptions.subscribed_uris():
+        uri_dataset, uri_region = _parse_resource_uri(uri)
+        # Bölgeden bağımsız veri setleri (ör. most played) tüm bölge URI'lerini etkiler.
+        if uri_dataset == dataset and (region == "global" or uri_region == region):
+            _subscriptions.mark_changed(uri)
+
+async def _warm_up():
+    """WARMUP_ON_START=1 ise dinleyici açıldıktan hemen sonra arka planda çalışır."""
+    await asyncio.sleep(float(os.getenv("WARMUP_DELAY", "1.0")))  # listener'ın bind etmesini bekle
+    STARTUP.mark("warm_up_started")
+    try:
+        app = await asyncio.to_thread(_get_app_instance)
+        datasets = [d.strip() for d in os.getenv("WARMUP_DATASETS", "").split(",") if d.strip()]
+        await app.warm_up(datasets or None)
+    except Exception as e:
+        print(f"[{datetime.now()}] Warm-up failed: {e}")
+    STARTUP.mark("warm_up_finished")
+    STARTUP.print_report("after warm-up")
+
+def _start_background_tasks(app):
+    """
+    Sağlık izleyicisini (upstream probları, event-loop gecikmesi) ve snapshot
+    checkpoint'lerini başlatır. App ilk oluşturulduğunda çağrılır; app'i kendisi
+    oluşturmaz, böylece WARMUP_ON_START kapalıyken başlangıç tembel kalır.
+    """
+    app.health.start()
+    # Diskten geri yüklenen snapshot'lar arka planda tazelenir; periyodik checkpoint yazılır.
+    app.start_checkpoints()
+
+@asynccontextmanager
+async def _lifespan(server):
+    global _server_loop
+    STARTUP.mark("lifespan_started")
+    _server_loop = asyncio.get_running_loop()
+    if _app_instance is not None:
+        _start_background_tasks(_app_instance)
+    warm_task = None
+    if os.getenv("WARMUP_ON_START", "0").lower() in ("1", "true", "yes"):
+        warm_task = asyncio.create_task(_warm_up())
+    try:
+        yield {}
+    finally:
+        _server_loop = None
+        if warm_task is not None and not warm_task.done():
+            warm_task.cancel()
+        if _app_instance is not None:
+            await _app_instance.health.stop()
+            await _app_instance.stop_checkpoints()  # son checkpoint: yeniden başlatma sıcak başlar
+
+# Araç çağrıları için eşzamanlılık sınırları, sınırlı bekleme kuyruğu ve
+# doygunlukta bayat (stale) snapshot ile yanıt verme. Bkz. admission.py.
+_admission = AdmissionController(
+    max_concurrent=int(os.getenv("ADMISSION_MAX_CONCURRENT", "8")),
+    default_tool_limit=int(os.getenv("ADMISSION_TOOL_LIMIT", "4")),
+    tool_limits=parse_limits(os.getenv("ADMISSION_TOOL_LIMITS")),
+    priorities=parse_limits(os.getenv("ADMISSION_TOOL_PRIORITIES")),
+    exempt=[
+        t.strip()
+        for t in os.getenv(
+            "ADMISSION_EXEMPT_TOOLS", "get_api_health,get_memory_profile,cpu_profile"
+        ).split(",")
+        if t.strip()
+    ],
+    max_queue=int(os.getenv("ADMISSION_QUEUE_SIZE", "32")),
+    queue_timeout=float(os.getenv("ADMISSION_QUEUE_TIMEOUT_SECONDS", "10")),
+    degrade=os.getenv("ADMISSION_DEGRADE", "1").lower() in ("1", "true", "yes"),
+)
+
+# İstemci başına token bucket kotaları. İstemci, QUOTA_CLIENT_TOKENS içinde
+# tanımlı bearer token ile, yoksa IP adresiyle tanımlanır. Bkz. quotas.py.
+_client_tokens = parse_client_tokens(os.getenv("QUOTA_CLIENT_TOKENS"))
+_quotas = QuotaManager(
+    client_per_minute=float(os.getenv("QUOTA_CLIENT_PER_MINUTE", "60")),
+    client_burst=int(os.getenv("QUOTA_CLIENT_BURST", "20")),
+    tool_quotas=parse_tool_quotas(os.getenv("QUOTA_TOOL_LIMITS")),
+    exempt=_admission.exempt,
+)
+
+# HTTP yanıtları için Accept-Encoding'e göre zstd/br/gzip sıkıştırma. Bkz. compression.py.
+_compressor = ResponseCompressor(
+    encodings=parse_encodings(os.getenv("COMPRESSION_ENCODINGS")),
+    minimum_size=int(os.getenv("COMPRESSION_MIN_BYTES", "1024")),
+    cache_bytes=int(float(os.getenv("COMPRESSION_CACHE_MB", "32")) * 1024 * 1024),
+)
+
+def _current_client_id() -> str:
+    try:
+        request = get_http_request()
+    except RuntimeError:
+        request = None  # stdio / in-process
+    return client_id_from_request(request, _client_tokens)
+
 # MCP Server instance
-mcp = FastMCP("Gaming Trend Analytics")
+class _QuotaMiddleware(Middleware):
+    """
+    Identifies the client, charges its quotas and reports the remaining
+    budget in the result's _meta.quota. Fetches made during the call are
+    attributed to the client (CURRENT_CLIENT), so upstream slots are shared
+    fairly between clients.
+    """
+
+    async def on_call_tool(self, context, call_next):
+        name = context.message.name
+        client_id = _current_client_id()
+        span = TRACER.current_span()
+        span.set_attribute("client.id", client_id)
+        try:
+            usage = _quotas.consume(client_id, name)
+        except QuotaExceeded as e:
+            span.set_attribute("quota.exceeded", True)
+            return ToolResult(
+                structured_content={
+                    "success": False,
+                    "error": "Quota exceeded",
+                    "message": str(e),
+                    "retryAfterSeconds": e.retry_after,
+                    "quota": e.usage,
+                    "timestamp": datetime.now().isoformat(),
+                },
+                meta={"quota": e.usage},
+            )
+        token = CURRENT_CLIENT.set(client_id)
+        try:
+            result = await call_next(context)
+        finally:
+            CURRENT_CLIENT.reset(token)
+        if isinstance(result, ToolResult):
+            result.meta = {**(result.meta or {}), "quota": usage}
+        return result
+
+
+class _AdmissionMiddleware(Middleware):
+    """
+    Runs each tool call in an admission slot. When no slot is free and degrade
+    mode is on, calls of snapshot-backed tools are first answered from retained
+    snapshots; they only queue if some dataset they need was never fetched.
+    """
+
+    async def on_call_tool(self, context, call_next):
+        name = context.message.name
+        if _admission.is_exempt(name):
+            return await call_next(context)
+        span = TRACER.current_span()
+        if _admission.can_degrade(name) and _admission.saturated(name):
+            stale_read = StaleRead()
+            token = STALE_READ.set(stale_read)
+            try:
+                result = await call_next(context)
+            finally:
+                STALE_READ.reset(token)
+            if stale_read.served and not stale_read.missing:
+                _admission.record_degraded(name)
+                span.set_attribute("admission.degraded", True)
+                return result
+        try:
+            async with _admission.slot(name):
+                return await call_next(context)
+        except Overloaded as e:
+            span.set_attribute("admission.rejected", True)
+            return ToolResult(
+                structured_content={
+                    "success": False,
+                    "error": "Server overloaded",
+                    "message": str(e),
+                    "retryAfterSeconds": e.retry_after,
+                    "timestamp": datetime.now().isoformat(),
+                }
+            )
+
+
+class _InFlightMiddleware(Middleware):
+    """Counts tool calls in flight for get_api_health and /health/ready."""
+
+    async def on_call_tool(self, context, call_next):
+        with _get_app_instance().health.track_tool_call():
+            return await call_next(context)
+
+
+class _ProfilingMiddleware(Middleware):
+    """
+    Wraps each tool call in MEMORY_PROFILER.profile() and counts it towards a
+    "next N tool calls" CPU profile; both are no-ops while disabled.
+    """
+
+    async def on_call_tool(self, context, call_next):
+        try:
+            with MEMORY_PROFILER.profile(f"tool:{context.message.name}"):
+                return await call_next(context)
+        finally:
+            if context.message.name != "cpu_profile":
+                CPU_PROFILER.on_tool_call_finished()
+
+
+class _TracingMiddleware(Middleware):
+    """Root span per tool call; app, source, fetch and parse spans nest under it."""
+
+    async def on_call_tool(self, context, call_next):
+        name = context.message.name
+        with TRACER.span(
+            f"tools/call {name}", kind=SPAN_KIND_SERVER, **{"mcp.tool.name": name}
+        ) as span:
+            result = await call_next(context)
+            payload = getattr(result, "structured_content", None)
+            if isinstance(payload, dict) and payload.get("success") is False:
+                span.set_attribute("tool.success", False)
+            return result
+
+
+if os.getenv("MEMORY_PROFILE", "0") == "1":
+    MEMORY_PROFILER.enable()
+
+mcp = FastMCP("Gaming Trend Analytics", lifespan=_lifespan)
+mcp.add_middleware(_TracingMiddleware())
+mcp.add_middleware(_ProfilingMiddleware())
+mcp.add_middleware(_QuotaMiddleware())
+mcp.add_middleware(_AdmissionMiddleware())
+mcp.add_middleware(_InFlightMiddleware())
+install_subscription_handlers(mcp, _subscriptions)
+
+# Orkestratör / load balancer için: yalnızca önbelleğe alınmış sinyalleri okur,
+# upstream'lere asla istek atmaz.
+@mcp.custom_route("/health/live", methods=["GET"])
+async def health_live(request):
+    if _app_instance is None:
+        return JSONResponse({"live": True, "reason": "app not initialized yet"})
+    liveness = _app_instance.health.liveness()
+    return JSONResponse(liveness, status_code=200 if liveness["live"] else 503)
+
+@mcp.custom_route("/health/ready", methods=["GET"])
+async def health_ready(request):
+    if _app_instance is None:
+        return JSONResponse(
+            {"ready": False, "status": "starting", "reasons": ["app not initialized yet"]},
+            status_code=503,
+        )
+    readiness = _app_instance.health.readiness()
+    readiness["inFlightToolCalls"] = _app_instance.health.tool_calls_in_flight
+    return JSONResponse(readiness, status_code=200 if readiness["ready"] else 503)
+
+def _make_resource_reader(dataset: str, with_region: bool):
+    if with_region:
+        async def read_resource(region: str) -> str:
+            app = _get_app_instance()
+            return json.dumps(await app.get_dataset(dataset, region), ensure_ascii=False)
+    else:
+        async def read_resource() -> str:
+            app = _get_app_instance()
+            return json.dumps(await app.get_dataset(dataset, DEFAULT_RESOURCE_REGION), ensure_ascii=False)
+    read_resource.__name__ = f"{dataset}_resource{'_by_region' if with_region else ''}"
+    return read_resource
+
+for _path, _dataset in RESOURCE_DATASETS.items():
+    mcp.resource(
+        f"games://{_path}",
+        name=_dataset,
+        description=f"Latest {_dataset} snapshot ({DEFAULT_RESOURCE_REGION}). Subscribe to be notified when it changes materially.",
+        mime_type="application/json",
+    )(_make_resource_reader(_dataset, with_region=False))
+    mcp.resource(
+        f"games://{_path}/{{region}}",
+        name=f"{_dataset}_by_region",
+        description=f"Latest {_dataset} snapshot for an ISO country code. Subscribe to be notified when it changes materially.",
+        mime_type="application/json",
+    )(_make_resource_reader(_dataset, with_region=True))
 
 # MCP Tools
 # Her araç fonksiyonu artık _get_app_instance() çağırarak app örneğini alacak.
 
+# Every data tool also accepts fields (keep only these keys per game; "id" is
+# always kept), limit (first N games per list) and compact (column-wise game
+# lists without illustrative envelope keys). See projection.py.
+
+@mcp.tool()
+async def get_steam_trending_games(
+    region: str = "US",
+    locale: Optional[str] = None,
+    fields: Optional[List[str]] = None,
+    limit: Optional[int] = None,
+    compact: bool = False,
+) -> dict:
+    """Get real trending games from Steam platform with live data from multiple sources. region is an ISO country code (prices follow its currency); locale defaults to the region's store language. fields/limit/compact trim the response (e.g. fields=["name","price"], limit=5)."""
+    app = _get_app_instance()
+    result = await app.get_steam_trending_games(region, locale)
+    return apply_projection(result, fields, limit, compact)
+
+@mcp.tool()
+async def get_steam_top_sellers(
+    region: str = "US",
+    locale: Optional[str] = None,
+    fields: Optional[List[str]] = None,
+    limit: Optional[int] = None,
+    compact: bool = False,
+) -> dict:
+    """Get real top selling games from Steam platform with live sales data for the given region (ISO country code) and optional locale. fields/limit/compact trim the response."""
+    app = _get_app_instance()
+    result = await app.get_steam_top_sellers(region, locale)
+    return apply_projection(result, fields, limit, compact)
+
+@mcp.tool()
+async def get_steam_most_played(
+    fields: Optional[List[str]] = None, limit: Optional[int] = None, compact: bool = False
+) -> dict:
+    """Get real-time most played games from Steam with live player statistics from SteamCharts. fields/limit/compact trim the response."""
+    app = _get_app_instance()
+    return apply_projection(await app.get_steam_most_played(), fields, limit, compact)
+
+@mcp.tool()
+async def get_epic_free_games(
+    region: str = "US",
+    locale: Optional[str] = None,
+    fields: Optional[List[str]] = None,
+    limit: Optional[int] = None,
+    compact: bool = False,
+) -> dict:
+    """Get current and upcoming free games from Epic Games Store with real promotion data for the given region (ISO country code) and optional locale. fields/limit/compact trim the response."""
+    app = _get_app_instance()
+    result = await app.get_epic_free_games(region, locale)
+    return apply_projection(result, fields, limit, compact)
+
+@mcp.tool()
+async def get_epic_free_games_at(
+    at: Optional[str] = None,
+    region: str = "US",
+    fields: Optional[List[str]] = None,
+    compact: bool = False,
+) -> dict:
+    """Which Epic Games Store games are free at a given time (ISO 8601, e.g. "2025-01-02T16:00:00Z"; naive times are UTC; default now) in a region, plus the next promotion change. Answered from the promotion calendar of the last free-games fetch without contacting Epic; beyondKnownSchedule=true means the time is past every promotion known at that fetch. fields/compact trim the response."""
+    app = _get_app_instance()
+    result = app.get_epic_free_games_at(at, region)
+    return apply_projection(result, fields, None, compact)
+
+@mcp.tool()
+async def get_epic_trending_games(
+    region: str = "US",
+    locale: Optional[str] = None,
+    fields: Optional[List[str]] = None,
+    limit: Optional[int] = None,
+    compact: bool = False,
+) -> dict:
+    """Get trending games from Epic Games Store for the given region (ISO country code) and optional locale. fields/limit/compact trim the response."""
+    app = _get_app_instance()
+    result = await app.get_epic_trending_games(region, locale)
+    return apply_projection(result, fields, limit, compact)
+
+@mcp.tool()
+async def get_all_trending_games(
+    region: str = "US",
+    locale: Optional[str] = None,
+    fields: Optional[List[str]] = None,
+    limit: Optional[int] = None,
+    compact: bool = False,
+) -> dict:
+    """Get comprehensive real-time gaming data from all platforms (Steam and Epic Games) for the given region (ISO country code) and optional locale. fields/limit/compact apply to every section."""
+    app = _get_app_instance()
+    result = await app.get_all_trending_games(region, locale)
+    return apply_projection(result, fields, limit, compact)
+
+@mcp.tool()
+async def get_trending_sections(
+    sections: Optional[List[str]] = None,
+    region: str = "US",
+    locale: Optional[str] = None,
+    limit: Optional[Union[int, Dict[str, int]]] = None,
+    max_age_seconds: Optional[Union[float, Dict[str, float]]] = None,
+    plan_only: bool = False,
+    fields: Optional[List[str]] = None,
+    compact: bool = False,
+) -> dict:
+    """Selective version of get_all_trending_games: returns only the requested sections (steam_trending, steam_top_sellers, steam_most_played, epic_free_games, epic_trending_games; default: the three Steam sections) and only fetches what they need. limit and max_age_seconds (maximum acceptable data age) take one value for all sections or a per-section map, e.g. {"steam_top_sellers": 5, "*": 10}. Sections whose cached or last retained snapshot is within max_age_seconds are answered without contacting the store; older ones are refetched. "plan" shows how each section was answered (cache, retained, refresh, fetch); plan_only=true returns the plan without running it. fields/compact apply to every section."""
+    app = _get_app_instance()
+    limits = limit if isinstance(limit, dict) else ({"*": limit} if limit is not None else None)
+    max_ages = (
+        max_age_seconds
+        if isinstance(max_age_seconds, dict)
+        else ({"*": max_age_seconds} if max_age_seconds is not None else None)
+    )
+    result = await app.get_trending_sections(
+        sections, region, locale, limits, max_ages, plan_only
+    )
+    return apply_projection(result, fields, None, compact)
+
+@mcp.tool()
+async def get_game_details(
+    app_ids: List[Union[int, str]],
+    region: str = "US",
+    locale: Optional[str] = None,
+    full: bool = False,
+    fields: Optional[List[str]] = None,
+    compact: bool = False,
+) -> dict:
+    """Store details for one or more Steam app ids (e.g. [730, 570], up to 25): name, description, developers, publishers, genres, release date and the price for region (ISO country code). Games already seen in a Steam ranking are answered from memory with the fields the ranking had (detailLevel "listing"); full=true always returns the complete store record. fields/compact trim the response."""
+    app = _get_app_instance()
+    result = await app.get_game_details(app_ids, region, locale, full)
+    return apply_projection(result, fields, None, compact)
+
+@mcp.tool()
+async def get_game_reviews(
+    app_ids: List[Union[int, str]],
+    full: bool = False,
+    fields: Optional[List[str]] = None,
+    compact: bool = False,
+) -> dict:
+    """Steam review summaries for one or more app ids (up to 25): positive percentage, total/positive/negative review counts and Steam's review score description. Games seen in a ranking are answered from memory (detailLevel "listing": percentage and count only) unless full=true. fields/compact trim the response."""
+    app = _get_app_instance()
+    result = await app.get_game_reviews(app_ids, full)
+    return apply_projection(result, fields, None, compact)
+
+@mcp.tool()
+async def get_price_history(
+    app_ids: List[Union[int, str]],
+    region: str = "US",
+    max_points: Optional[int] = None,
+    fields: Optional[List[str]] = None,
+    compact: bool = False,
+) -> dict:
+    """Recorded Steam price history for one or more app ids (up to 25) in one region: current price and discount vs. the historical low (atHistoricalLow, percentAboveLow) and a timeline of price/discount changes (max_points keeps the latest). Prices are recorded whenever trending/top-seller lists or game details are fetched; untracked ids are listed in notTracked. fields/compact trim the response."""
+    app = _get_app_instance()
+    result = app.get_price_history(app_ids, region, max_points)
+    return apply_projection(result, fields, None, compact)
+
 @mcp.tool()
-async def get_steam_trending_games() -> dict:
-    """Get real trending games from Steam platform with live data from multiple sources."""
+async def get_historical_lows(
+    region: str = "US",
+    min_discount: int = 1,
+    at_low_only: bool = True,
+    limit: int = 20,
+    fields: Optional[List[str]] = None,
+    compact: bool = False,
+) -> dict:
+    """Tracked Steam games currently at their lowest recorded price in a region, highest discount first; min_discount is the minimum current discount percent (default 1: games never discounted are at their low by definition; 0 includes them), at_low_only=false lists every tracked game by current discount. fields/compact trim the response."""
     app = _get_app_instance()
-    return await app.get_steam_trending_games()
+    result = app.get_historical_lows(region, min_discount, at_low_only, limit)
+    return apply_projection(result, fields, None, compact)
 
 @mcp.tool()
-async def get_steam_top_sellers() -> dict:
-    """Get real top selling games from Steam platform with live sales data."""
+async def get_multi_region_data(
+    dataset: str,
+    regions: List[str],
+    locale: Optional[str] = None,
+    fields: Optional[List[str]] = None,
+    limit: Optional[int] = None,
+    compact: bool = False,
+) -> dict:
+    """Fetch one dataset (steam_trending, steam_top_sellers, steam_most_played, epic_free_games, epic_trending_games) for several regions (ISO country codes, e.g. ["US", "DE", "TR"]) concurrently, with per-region prices and shared game metadata. fields/limit/compact trim the response."""
     app = _get_app_instance()
-    return await app.get_steam_top_sellers()
+    result = await app.get_multi_region_data(dataset, regions, locale)
+    return apply_projection(result, fields, limit, compact)
 
 @mcp.tool()
-async def get_steam_most_played() -> dict:
-    """Get real-time most played games from Steam with live player statistics from SteamCharts."""
+async def get_dataset_changes(
+    dataset: str,
+    since: Optional[str] = None,
+    region: str = "US",
+    locale: Optional[str] = None,
+    fields: Optional[List[str]] = None,
+    limit: Optional[int] = None,
+    compact: bool = False,
+) -> dict:
+    """Return only what changed in a dataset (steam_trending, steam_top_sellers, steam_most_played, epic_free_games, epic_trending_games) since the `since` cursor from a previous call: added/removed games, rank moves, price/discount and player-count changes, or status "not_modified". Omit `since` on the first call to get the full list and a cursor. fields/limit/compact trim full lists and added games."""
     app = _get_app_instance()
-    return await app.get_steam_most_played()
+    result = await app.get_dataset_changes(dataset, since, region, locale)
+    return apply_projection(result, fields, limit, compact)
 
 @mcp.tool()
-async def get_epic_free_games() -> dict:
-    """Get current and upcoming free games from Epic Games Store with real promotion data."""
+async def get_all_trending_changes(
+    since: Optional[str] = None,
+    region: str = "US",
+    locale: Optional[str] = None,
+    fields: Optional[List[str]] = None,
+    limit: Optional[int] = None,
+    compact: bool = False,
+) -> dict:
+    """Delta variant of get_all_trending_games: pass the cursor from the previous response as `since` to receive only changed sections and entries, or status "not_modified". fields/limit/compact trim full lists and added games."""
     app = _get_app_instance()
-    return await app.get_epic_free_games()
+    result = await app.get_all_trending_changes(since, region, locale)
+    return apply_projection(result, fields, limit, compact)
 
 @mcp.tool()
-async def get_epic_trending_games() -> dict:
-    """Get trending games from Epic Games Store."""
+async def get_trending_movers(
+    metric: str = "players",
+    region: str = "US",
+    limit: int = 20,
+    window: int = 12,
+    lookback: int = 1,
+    fields: Optional[List[str]] = None,
+    compact: bool = False,
+) -> dict:
+    """Top movers by momentum: metric "players" (SteamCharts player counts, global) or "rank" (Steam top-seller rank for region). Scores each game by velocity over the last `lookback` snapshots, growth and z-score against the previous `window` snapshots. History builds up as the datasets are refreshed. fields/compact trim the response."""
     app = _get_app_instance()
-    return await app.get_epic_trending_games()
+    result = await app.get_trending_movers(metric, region, limit, window, lookback)
+    return apply_projection(result, fields, None, compact)
 
 @mcp.tool()
-async def get_all_trending_games() -> dict:
-    """Get comprehensive real-time gaming data from all platforms (Steam and Epic Games)."""
+async def export_snapshots(
+    format: str = "ndjson",
+    datasets: Optional[List[str]] = None,
+    include_history: bool = True,
+    refresh: bool = False,
+    regions: Optional[List[str]] = None,
+) -> dict:
+    """Write retained dataset snapshots to a file for bulk analytics: format "ndjson" (one game per line) or "parquet". datasets defaults to all; include_history=False exports only the latest version of each dataset/region; refresh=True fetches the datasets for `regions` first. Returns the server-side file path and a download path (GET, streamed in chunks)."""
     app = _get_app_instance()
-    return await app.get_all_trending_games()
+    result = await app.export_snapshots(format, datasets, include_history, refresh, regions)
+    if result.get("success"):
+        result["downloadPath"] = f"/exports/{result['name']}"
+    return result
+
+# Export dosyalarını parça parça (chunked) indirmek için.
+@mcp.custom_route("/exports/{name}", methods=["GET"])
+async def download_export(request):
+    exporter = _get_app_instance().exporter
+    path = exporter.resolve(request.path_params["name"])
+    if path is None:
+        return JSONResponse({"error": "export not found"}, status_code=404)
+    media_type = "application/x-ndjson" if path.endswith(".ndjson") else "application/vnd.apache.parquet"
+    # Senkron iterator; Starlette onu thread pool'da okur, event loop bloklanmaz.
+    return StreamingResponse(exporter.iter_chunks(path), media_type=media_type)
+
+# Dataset snapshot'larını düz JSON olarak sunar. Gövde snapshot içeriği
+# değişene kadar aynıdır: ETag içerik hash'idir (If-None-Match -> 304) ve
+# sıkıştırılmış varyantlar her sürüm ve encoding için bir kez üretilip
+# önbellekte tutulur.
+@mcp.custom_route("/snapshots/{dataset}", methods=["GET"])
+@mcp.custom_route("/snapshots/{dataset}/{region}", methods=["GET"])
+async def download_snapshot(request):
+    client_id = client_id_from_request(request, _client_tokens)
+    route = "http:snapshots"
+    try:
+        _quotas.consume(client_id, route)
+    except QuotaExceeded as e:
+        return JSONResponse(
+            {"error": "Quota exceeded", "message": str(e), "retryAfterSeconds": e.retry_after},
+            status_code=429,
+            headers={"Retry-After": str(max(1, round(e.retry_after)))},
+        )
+    token = CURRENT_CLIENT.set(client_id)
+    try:
+        async with _admission.slot(route):
+            snapshot = await _get_app_instance().get_dataset_snapshot(
+                request.path_params["dataset"],
+                request.path_params.get("region", DEFAULT_RESOURCE_REGION),
+                request.query_params.get("locale"),
+            )
+    except Overloaded as e:
+        return JSONResponse(
+            {"error": "Server overloaded", "message": str(e), "retryAfterSeconds": e.retry_after},
+            status_code=503,
+            headers={"Retry-After": str(max(1, round(e.retry_after)))},
+        )
+    finally:
+        CURRENT_CLIENT.reset(token)
+    if not snapshot["success"]:
+        status = 404 if snapshot["error"].startswith("Unknown dataset") else 502
+        return JSONResponse(snapshot, status_code=status)
+    etag = f'"{snapshot["digest"]}"'
+    headers = {
+        "ETag": etag,
+        "Cache-Control": "no-cache",  # her seferinde ETag ile doğrula
+        "Vary": "Accept-Encoding",
+        "X-Snapshot-Version": str(snapshot["version"]),
+        "X-Snapshot-Age": str(round(snapshot["cacheAgeSeconds"] or 0, 1)),
+        "X-Snapshot-Stale": "1" if snapshot["stale"] else "0",
+    }
+    if_none_match = request.headers.get("if-none-match", "")
+    if etag in [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]:
+        return Response(status_code=304, headers=headers)
+    encoding = _compressor.negotiate(request.headers.get("accept-encoding"))
+    body, applied = await _compressor.cached(
+        f"snapshot:{snapshot['key']}:{snapshot['digest']}",
+        encoding,
+        lambda: json.dumps(
+            {
+                "dataset": snapshot["dataset"],
+                "region": snapshot["region"],
+                "locale": snapshot["locale"],
+                "digest": snapshot["digest"],
+                "count": len(snapshot["rows"]),
+                "data": snapshot["rows"],
+            },
+            ensure_ascii=False,
+            separators=(",", ":"),
+            default=str,
+        ).encode(),
+    )
+    if applied:
+        headers["Content-Encoding"] = applied
+    return Response(body, media_type="application/json", headers=headers)
+
+def _admin_error(admin_token: Optional[str]) -> Optional[dict]:
+    """None when admin_token matches ADMIN_TOKEN; admin tools are disabled while it is unset."""
+    expected = os.getenv("ADMIN_TOKEN")
+    if not expected:
+        return {"success": False, "error": "Admin tools are disabled", "message": "Set ADMIN_TOKEN on the server to enable them."}
+    if not admin_token or not hmac.compare_digest(admin_token, expected):
+        return {"success": False, "error": "Invalid admin token"}
+    return None
+
+@mcp.tool()
+async def cpu_profile(
+    admin_token: str,
+    action: str = "status",
+    duration_seconds: float = 30.0,
+    tool_calls: Optional[int] = None,
+    interval_ms: float = 10.0,
+) -> dict:
+    """Admin: sampling CPU profiler. action="start" samples all threads every interval_ms for duration_seconds (or until the next tool_calls tool calls finish) and writes a collapsed-stack file for flamegraph tools; "stop" ends a run early; "status" reports the current/last run. Requires the server's ADMIN_TOKEN."""
+    error = _admin_error(admin_token)
+    if error:
+        return error
+    if action == "start":
+        try:
+            status = CPU_PROFILER.start(duration_seconds, tool_calls, interval_ms / 1000)
+        except RuntimeError as e:
+            return {"success": False, "error": str(e), **CPU_PROFILER.status()}
+        return {"success": True, **status}
+    if action == "stop":
+        result = await asyncio.to_thread(CPU_PROFILER.stop)
+        return {"success": True, "result": result}
+    if action == "status":
+        return {"success": True, **CPU_PROFILER.status()}
+    return {"success": False, "error": f"Unknown action: {action}", "message": "Expected start, stop or status."}
+
+@mcp.tool()
+async def get_memory_profile(admin_token: str, enable: Optional[bool] = None, last: int = 10) -> dict:
+    """Admin: per-tool-call memory reports (peak, growth, top allocation sites) from tracemalloc. Pass enable=true/false to switch profiling on or off; it slows every call while on. Requires the server's ADMIN_TOKEN."""
+    error = _admin_error(admin_token)
+    if error:
+        return error
+    if enable is True:
+        MEMORY_PROFILER.enable()
+    elif enable is False:
+        MEMORY_PROFILER.disable()
+    return {
+        **MEMORY_PROFILER.summary(last=max(0, last)),
+        "timestamp": datetime.now().isoformat(),
+    }
 
 @mcp.tool()
 async def get_api_health() -> dict:
-    """Check the health status of the Gaming Trend Analytics API."""
+    """
+    Check the health status of the Gaming Trend Analytics API: readiness,
+    upstream probe results and latency percentiles, event-loop lag, in-flight
+    requests, admission queue state, per-client quota usage, response
+    compression (bytes saved per encoding, compressed-body cache) and per-dataset
+    freshness. Reads cached signals only.
+    """
     app = _get_app_instance()
     # GameAnalyticsApp örneği üzerinden get_api_health çağrılıyor
-    return app.get_api_health()
+    return {
+        **app.get_api_health(),
+        "admission": _admission.stats(),
+        "quotas": _quotas.stats(),
+        "compression": _compressor.stats(),
+    }
 
 
 if __name__ == "__main__":
-    import os
     # Port ve host'u environment variable'lardan al, yoksa varsayılan değerleri kullan
     host = os.getenv("HOST", "0.0.0.0")  # 0.0.0.0 ile tüm network interface'lerden erişim sağla
     port = int(os.getenv("PORT", 8080))   # Smithery deployment için 8080 port kullan
     
     print(f"[{datetime.now()}] MCP Server (server.py) starting in HTTP mode on {host}:{port}...")
     print(f"[{datetime.now()}] MCP endpoint will be available at: http://{host}:{port}/mcp")
+    # Birden fazla worker/container çalıştırılacaksa CACHE_BACKEND_URL ile ortak önbellek kullanılır.
+    print(f"[{datetime.now()}] Shared cache backend: {os.getenv('CACHE_BACKEND_URL') or 'none (process-local)'}")
     # FastMCP araç kaydı, dekoratörler işlendiğinde (modül yükleme zamanında) gerçekleşir.
     # Bu kısım hızlı olmalıdır. GameAnalyticsApp'in asıl başlatılması ertelenmiştir.
-    mcp.run(transport="http", host=host, port=port)
+    STARTUP.mark("server_module_ready")
+    STARTUP.print_report("before listener start")
+    mcp.run(
+        transport="http",
+        host=host,
+        port=port,
+        middleware=[ASGIMiddleware(CompressionMiddleware, compressor=_compressor)],
+    )
     print(f"[{datetime.now()}] MCP Server (server.py) finished.")
\ No newline at end of file
@@ -0,0 +1,69 @@
+# startup.py
+"""
+Cold-start instrumentation.
+
+STARTUP records how long each startup phase takes (module imports, app
+construction, warm-up steps) relative to process start, so the cost of the
+first tool call can be attributed. Kept free of third-party imports so it can
+be imported before anything else.
+"""
+import importlib
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+
+class StartupTimer:
+    def __init__(self):
+        self._t0 = time.perf_counter()
+        self.started_at = datetime.now()
+        self.phases: List[Dict[str, Any]] = []
+        self.marks: Dict[str, float] = {}
+
+    def _offset(self) -> float:
+        return round(time.perf_counter() - self._t0, 4)
+
+    @contextmanager
+    def phase(self, name: str):
+        start = time.perf_counter()
+        offset = self._offset()
+        try:
+            yield
+        finally:
+            self.phases.append(
+                {
+                    "phase": name,
+                    "startOffsetSeconds": offset,
+                    "durationSeconds": round(time.perf_counter() - start, 4),
+                }
+            )
+
+    def timed_import(self, module_name: str):
+        with self.phase(f"import {module_name}"):
+            return importlib.import_module(module_name)
+
+    def mark(self, name: str) -> None:
+        # Only the first occurrence matters (e.g. "first_tool_call").
+        self.marks.setdefault(name, self._offset())
+
+    def report(self) -> Dict[str, Any]:
+        return {
+            "processStartedAt": self.started_at.isoformat(),
+            "uptimeSeconds": self._offset(),
+            "marks": dict(self.marks),
+            "phases": list(self.phases),
+        }
+
+    def print_report(self, title: Optional[str] = None) -> None:
+        print(f"[{datetime.now()}] Startup timing report{f' ({title})' if title else ''}:")
+        for name, offset in self.marks.items():
+            print(f"    mark  {name:<40} at +{offset:.3f}s")
+        for phase in self.phases:
+            print(
+                f"    phase {phase['phase']:<40} at +{phase['startOffsetSeconds']:.3f}s"
+                f" took {phase['durationSeconds'] * 1000:.1f} ms"
+            )
+
+
+STARTUP = StartupTimer()
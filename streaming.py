@@ -0,0 +1,98 @@
+# streaming.py
+"""
+Incremental HTML parsing for sources that only need the top of a page.
+
+StreamingHTMLParser is fed body chunks as they arrive and hands back each
+element matching a predicate as soon as its end tag has been parsed, so the
+caller can build records while the download is still running and stop
+reading once it has enough. Matched elements are cleared after they are
+returned, together with their already-processed siblings, to keep the
+partial tree small.
+
+The helpers below give the few BeautifulSoup conveniences the extractors in
+app.py rely on (class lookup, first matching descendant, stripped text) on
+lxml elements.
+"""
+from typing import Any, Callable, List, Optional
+
+from startup import STARTUP
+
+Element = Any  # lxml.etree._Element; lxml is imported on first use
+_etree = None
+
+
+def _lxml_etree():
+    global _etree
+    if _etree is None:
+        with STARTUP.phase("import lxml (first streaming parse)"):
+            from lxml import etree
+        _etree = etree
+    return _etree
+
+
+class StreamingHTMLParser:
+    def __init__(self, match: Callable[[Element], bool], encoding: Optional[str] = None):
+        etree = _lxml_etree()
+        self._syntax_error = etree.XMLSyntaxError
+        self.match = match
+        self._parser = etree.HTMLPullParser(events=("end",), encoding=encoding)
+        self._handed_out: List[Element] = []
+
+    def feed(self, chunk: bytes) -> List[Element]:
+        self._release_handed_out()
+        self._parser.feed(chunk)
+        return self._drain()
+
+    def close(self) -> List[Element]:
+        self._release_handed_out()
+        try:
+            self._parser.close()
+        except self._syntax_error:
+            pass  # an early stop leaves the document unterminated
+        return self._drain()
+
+    def _drain(self) -> List[Element]:
+        matched = [
+            element for _, element in self._parser.read_events() if self.match(element)
+        ]
+        self._handed_out = matched
+        return matched
+
+    def _release_handed_out(self) -> None:
+        # The caller is done with the previous batch once it feeds more data.
+        for element in self._handed_out:
+            element.clear(keep_tail=True)
+            while element.getprevious() is not None:
+                del element.getparent()[0]
+        self._handed_out = []
+
+
+def classes(element: Element) -> set:
+    return set((element.get("class") or "").split())
+
+
+def has_class(element: Element, *names: str) -> bool:
+    return not classes(element).isdisjoint(names)
+
+
+def has_ancestor(element: Element, predicate: Callable[[Element], bool]) -> bool:
+    parent = element.getparent()
+    while parent is not None:
+        if predicate(parent):
+            return True
+        parent = parent.getparent()
+    return False
+
+
+def find_first(
+    element: Element, predicate: Callable[[Element], bool]
+) -> Optional[Element]:
+    """First descendant (not the element itself) matching predicate, in document order."""
+    for descendant in element.iterdescendants():
+        if isinstance(descendant.tag, str) and predicate(descendant):
+            return descendant
+    return None
+
+
+def text_of(element: Optional[Element]) -> str:
+    return "".join(element.itertext()).strip() if element is not None else ""
@@ -0,0 +1,192 @@
+# subscriptions.py
+"""
+MCP resource subscriptions with coalesced update notifications.
+
+Clients subscribe to resource URIs in one of two ways, depending on the
+negotiated protocol version:
+
+- 2026-07-28 and later: a subscriptions/listen request whose response is
+  the stream; the hub publishes ResourceUpdated events to the SDK's
+  subscription bus and the SDK's ListenHandler delivers them
+- earlier versions: resources/subscribe, answered with a
+  notifications/resources/updated sent to each subscribed session
+
+When a refresh produces a material change, mark_changed() queues the URI;
+queued URIs are flushed once per coalescing window, so a burst of changes
+results in a single update per subscriber and URI. While any subscription
+is active a background loop re-reads the subscribed datasets so changes are
+detected without clients polling.
+"""
+import asyncio
+import weakref
+from collections import Counter
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Set
+
+
+class ResourceSubscriptionHub:
+    def __init__(
+        self,
+        refresh: Optional[Callable[[List[str]], Awaitable[Any]]] = None,
+        refresh_interval: float = 120.0,
+        coalesce_window: float = 2.0,
+    ):
+        self.refresh = refresh
+        self.refresh_interval = refresh_interval
+        self.coalesce_window = coalesce_window
+        # uri -> sessions; weak so disconnected sessions drop out on their own.
+        self._subscribers: Dict[str, "weakref.WeakSet"] = {}
+        # uri -> open subscriptions/listen streams asking for it
+        self._listeners: Counter = Counter()
+        # Publishes ResourceUpdated(uri) to the SDK subscription bus; set by
+        # install_subscription_handlers when the SDK serves subscriptions/listen.
+        self.publish: Optional[Callable[[str], Awaitable[None]]] = None
+        self._pending: Set[str] = set()
+        self._flush_task: Optional[asyncio.Task] = None
+        self._refresh_task: Optional[asyncio.Task] = None
+        self.notifications_sent = 0
+        self.changes_coalesced = 0
+
+    def subscribe(self, uri: str, session: Any) -> None:
+        self._subscribers.setdefault(uri, weakref.WeakSet()).add(session)
+        print(f"[{datetime.now()}] Subscriptions: +{uri} ({len(self._subscribers[uri])} subscriber(s))")
+        self._start_refresh()
+
+    def add_listener(self, uris: Iterable[str]) -> None:
+        """Counts an open subscriptions/listen stream for uris."""
+        for uri in uris:
+            self._listeners[uri] += 1
+            print(f"[{datetime.now()}] Subscriptions: +{uri} (listen stream)")
+        self._start_refresh()
+
+    def remove_listener(self, uris: Iterable[str]) -> None:
+        for uri in uris:
+            self._listeners[uri] -= 1
+            if self._listeners[uri] <= 0:
+                del self._listeners[uri]
+
+    def _start_refresh(self) -> None:
+        if self.refresh is not None and (self._refresh_task is None or self._refresh_task.done()):
+            self._refresh_task = asyncio.get_running_loop().create_task(self._refresh_loop())
+
+    def unsubscribe(self, uri: str, session: Any) -> None:
+        sessions = self._subscribers.get(uri)
+        if sessions is not None:
+            sessions.discard(session)
+            if not sessions:
+                self._subscribers.pop(uri, None)
+
+    def subscribed_uris(self) -> List[str]:
+        uris = [uri for uri, sessions in self._subscribers.items() if len(sessions)]
+        return uris + [uri for uri in self._listeners if uri not in uris]
+
+    def mark_changed(self, uri: str) -> None:
+        if not self._subscribers.get(uri) and not self._listeners.get(uri):
+            return
+        if uri in self._pending:
+            self.changes_coalesced += 1
+        self._pending.add(uri)
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.get_running_loop().create_task(self._flush())
+
+    async def _flush(self) -> None:
+        await asyncio.sleep(self.coalesce_window)
+        pending, self._pending = self._pending, set()
+        for uri in pending:
+            if self._listeners.get(uri) and self.publish is not None:
+                try:
+                    await self.publish(uri)
+                    self.notifications_sent += self._listeners.get(uri, 0)
+                except Exception as e:
+                    print(f"[{datetime.now()}] Subscriptions: publishing update of {uri} failed: {e}")
+            for session in list(self._subscribers.get(uri, ())):
+                try:
+                    await session.send_resource_updated(uri)
+                    self.notifications_sent += 1
+                except Exception as e:
+                    print(f"[{datetime.now()}] Subscriptions: dropping subscriber of {uri}: {e}")
+                    self.unsubscribe(uri, session)
+        if self._pending:
+            # Marked while this flush was sending: mark_changed saw the task
+            # still running and did not schedule another one.
+            self._flush_task = asyncio.get_running_loop().create_task(self._flush())
+
+    async def _refresh_loop(self) -> None:
+        while self.subscribed_uris():
+            await asyncio.sleep(self.refresh_interval)
+            uris = self.subscribed_uris()
+            if not uris:
+                break
+            try:
+                await self.refresh(uris)
+            except Exception as e:
+                print(f"[{datetime.now()}] Subscriptions: refresh failed: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "subscriptions": {uri: len(s) for uri, s in self._subscribers.items() if len(s)},
+            "listenStreams": dict(self._listeners),
+            "pending": sorted(self._pending),
+            "notifications_sent": self.notifications_sent,
+            "changes_coalesced": self.changes_coalesced,
+        }
+
+
+def install_subscription_handlers(mcp: Any, hub: ResourceSubscriptionHub) -> None:
+    """
+    Registers the subscription handlers on a FastMCP server: subscriptions/listen
+    where the SDK provides it (MCP SDK 2.3+, protocol 2026-07-28), plus
+    resources/subscribe and resources/unsubscribe for clients that negotiate
+    an earlier version. Older MCP SDKs expose decorator hooks on the low-level
+    server, newer ones a generic add_request_handler(); both are supported.
+    """
+    low = mcp._mcp_server
+    try:
+        from mcp import types
+        from mcp.server.subscriptions import InMemorySubscriptionBus, ListenHandler, ResourceUpdated
+    except ImportError:
+        pass  # SDK without subscriptions/listen
+    else:
+        bus = InMemorySubscriptionBus()
+        listen = ListenHandler(bus)
+
+        async def _listen_request(ctx, params):
+            uris = list(params.notifications.resource_subscriptions or ())
+            hub.add_listener(uris)
+            try:
+                return await listen(ctx, params)
+            finally:
+                hub.remove_listener(uris)
+
+        hub.publish = lambda uri: bus.publish(ResourceUpdated(uri=uri))
+        low.add_request_handler(
+            "subscriptions/listen", types.SubscriptionsListenRequestParams, _listen_request
+        )
+
+    if hasattr(low, "subscribe_resource"):
+
+        @low.subscribe_resource()
+        async def _subscribe(uri):
+            hub.subscribe(str(uri), low.request_context.session)
+
+        @low.unsubscribe_resource()
+        async def _unsubscribe(uri):
+            hub.unsubscribe(str(uri), low.request_context.session)
+
+    else:
+        from mcp import types
+
+        async def _subscribe_request(ctx, params):
+            hub.subscribe(str(params.uri), ctx.session)
+            return types.EmptyResult()
+
+        async def _unsubscribe_request(ctx, params):
+            hub.unsubscribe(str(params.uri), ctx.session)
+            return types.EmptyResult()
+
+        low.add_request_handler(
+            "resources/subscribe", types.SubscribeRequestParams, _subscribe_request
+        )
+        low.add_request_handler(
+            "resources/unsubscribe", types.UnsubscribeRequestParams, _unsubscribe_request
+        )
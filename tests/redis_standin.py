@@ -0,0 +1,106 @@
+# tests/redis_standin.py
+"""
+In-process Redis-protocol stand-in for exercising RedisBackend without a
+Redis server.
+
+Supports AUTH (password or username + password), SELECT, GET, SET (NX, PX),
+DEL and PING. EVAL answers with an error, like a server without scripting,
+so RedisBackend.release_lock takes its check-then-delete fallback. Replies
+for keys in `delays` are held back that many seconds, to interrupt a
+command between its write and its reply.
+"""
+import asyncio
+import time
+from typing import Dict, List, Optional, Tuple
+
+
+class RedisStandIn:
+    def __init__(self, username: Optional[str] = None, password: Optional[str] = None):
+        self.username = username
+        self.password = password
+        self.data: Dict[bytes, Tuple[bytes, Optional[float]]] = {}
+        self.delays: Dict[bytes, float] = {}
+        self.commands: List[List[bytes]] = []
+        self.connections = 0
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    async def start(self, host: str = "127.0.0.1") -> int:
+        self._server = await asyncio.start_server(self._handle, host, 0)
+        return self._server.sockets[0].getsockname()[1]
+
+    async def stop(self) -> None:
+        self._server.close()
+        await self._server.wait_closed()
+
+    @staticmethod
+    async def _read_command(reader: asyncio.StreamReader) -> Optional[List[bytes]]:
+        line = await reader.readline()
+        if not line:
+            return None
+        count = int(line[1:-2])
+        args = []
+        for _ in range(count):
+            length = int((await reader.readline())[1:-2])
+            args.append((await reader.readexactly(length + 2))[:-2])
+        return args
+
+    def _get(self, key: bytes) -> Optional[bytes]:
+        item = self.data.get(key)
+        if item is None:
+            return None
+        value, expires_at = item
+        if expires_at is not None and expires_at <= time.time():
+            del self.data[key]
+            return None
+        return value
+
+    def _execute(self, args: List[bytes], authed: bool) -> Tuple[bytes, bool]:
+        command = args[0].upper()
+        if command == b"AUTH":
+            credentials = [a.decode() for a in args[1:]]
+            expected = [self.password] if self.username is None else [self.username, self.password]
+            if credentials == expected:
+                return b"+OK\r\n", True
+            return b"-WRONGPASS invalid username-password pair\r\n", authed
+        if self.password is not None and not authed:
+            return b"-NOAUTH Authentication required.\r\n", authed
+        if command in (b"PING", b"SELECT"):
+            return b"+OK\r\n", authed
+        if command == b"GET":
+            value = self._get(args[1])
+            if value is None:
+                return b"$-1\r\n", authed
+            return b"$%d\r\n%s\r\n" % (len(value), value), authed
+        if command == b"SET":
+            options = [a.upper() for a in args[3:]]
+            if b"NX" in options and self._get(args[1]) is not None:
+                return b"$-1\r\n", authed
+            expires_at = None
+            if b"PX" in options:
+                expires_at = time.time() + int(args[3 + options.index(b"PX") + 1]) / 1000
+            self.data[args[1]] = (args[2], expires_at)
+            return b"+OK\r\n", authed
+        if command == b"DEL":
+            removed = sum(1 for key in args[1:] if self.data.pop(key, None) is not None)
+            return b":%d\r\n" % removed, authed
+        return b"-ERR unknown command '%s'\r\n" % args[0], authed
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.connections += 1
+        authed = False
+        try:
+            while True:
+                args = await self._read_command(reader)
+                if args is None:
+                    break
+                self.commands.append(args)
+                reply, authed = self._execute(args, authed)
+                delay = self.delays.get(args[1]) if len(args) > 1 else None
+                if delay:
+                    await asyncio.sleep(delay)
+                writer.write(reply)
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
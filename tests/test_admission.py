@@ -0,0 +1,23 @@
+# tests/test_admission.py
+"""Which tool calls degrade mode may answer from retained snapshots."""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from admission import DEFAULT_DEGRADABLE_TOOLS, AdmissionController  # noqa: E402
+
+
+def test_only_snapshot_backed_tools_degrade():
+    admission = AdmissionController()
+    assert admission.can_degrade("get_steam_top_sellers")
+    for tool in ("get_game_details", "get_game_reviews", "export_snapshots"):
+        assert not admission.can_degrade(tool)
+    assert not AdmissionController(degrade=False).can_degrade("get_steam_top_sellers")
+
+
+def test_degradable_tools_exist():
+    import server
+
+    for tool in DEFAULT_DEGRADABLE_TOOLS:
+        assert callable(getattr(server, tool, None)), tool
@@ -0,0 +1,36 @@
+# tests/test_app_lookups.py
+"""Per-appid lookups shared between concurrent callers."""
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def test_waiter_survives_cancelled_caller_of_shared_fetch():
+    from app import GameAnalyticsApp
+
+    async def run():
+        app = GameAnalyticsApp()
+        calls = []
+
+        async def fetch(session, appid):
+            calls.append(appid)
+            await asyncio.sleep(0.05)
+            if session.closed:
+                raise RuntimeError("Session is closed")
+            return {"id": appid, "name": "Game"}
+
+        def lookup():
+            return app._lookup_apps(["10"], lambda appid: f"details:{appid}", fetch, True)
+
+        first = asyncio.create_task(lookup())
+        await asyncio.sleep(0.01)
+        second = asyncio.create_task(lookup())
+        await asyncio.sleep(0.01)
+        first.cancel()
+        result = await asyncio.wait_for(second, 1)
+        assert result["data"] == [{"id": "10", "name": "Game", "detailLevel": "full"}]
+        assert calls == ["10"]
+
+    asyncio.run(run())
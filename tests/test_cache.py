@@ -0,0 +1,87 @@
+# tests/test_cache.py
+"""Shared in-flight fetches of SnapshotCache and AppInfoCache."""
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cache import AppInfoCache, SnapshotCache  # noqa: E402
+
+
+def _slow_fetch(calls, value, delay=0.05):
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(delay)
+        return value
+
+    return fetch
+
+
+def test_snapshot_cache_waiters_survive_cancelled_leader():
+    async def run():
+        cache = SnapshotCache(default_ttl=60)
+        calls = []
+        leader = asyncio.create_task(cache.get_or_fetch("k", _slow_fetch(calls, ["row"])))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(cache.get_or_fetch("k", _slow_fetch(calls, ["other"])))
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        result = await asyncio.wait_for(follower, 1)
+        assert result["value"] == ["row"]
+        assert calls == [1]
+        assert cache.get("k")["value"] == ["row"]
+
+    asyncio.run(run())
+
+
+def test_snapshot_cache_failure_reaches_every_waiter():
+    async def run():
+        cache = SnapshotCache(default_ttl=60)
+
+        async def failing():
+            await asyncio.sleep(0.01)
+            raise RuntimeError("upstream down")
+
+        results = await asyncio.gather(
+            cache.get_or_fetch("k", failing),
+            cache.get_or_fetch("k", failing),
+            return_exceptions=True,
+        )
+        assert all(isinstance(r, RuntimeError) for r in results)
+        assert cache.get("k") is None
+
+    asyncio.run(run())
+
+
+def test_app_info_cache_waiters_survive_cancelled_leader():
+    async def run():
+        cache = AppInfoCache()
+        calls = []
+        leader = asyncio.create_task(cache.get_or_fetch("details:1", _slow_fetch(calls, {"id": "1"})))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(cache.get_or_fetch("details:1", _slow_fetch(calls, {})))
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        assert await asyncio.wait_for(follower, 1) == ({"id": "1"}, True)
+        assert calls == [1]
+
+    asyncio.run(run())
+
+
+def test_forced_refresh_bypasses_fresh_shared_record():
+    from cache_backends import MemoryBackend
+
+    async def run():
+        backend = MemoryBackend()
+        worker_a = SnapshotCache(default_ttl=60, backend=backend)
+        worker_b = SnapshotCache(default_ttl=60, backend=backend)
+        calls = []
+        await worker_a.get_or_fetch("k", _slow_fetch(calls, ["old"], delay=0))
+        assert (await worker_b.get_or_fetch("k", _slow_fetch(calls, ["new"], delay=0)))["value"] == ["old"]
+        result = await worker_b.get_or_fetch("k", _slow_fetch(calls, ["new"], delay=0), force=True)
+        assert result["value"] == ["new"] and not result["cached"]
+        assert (await backend.get("k"))["value"] == ["new"]
+        assert len(calls) == 2
+
+    asyncio.run(run())
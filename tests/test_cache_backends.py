@@ -0,0 +1,107 @@
+# tests/test_cache_backends.py
+"""Cache backends; RedisBackend against the in-process Redis-protocol stand-in."""
+import asyncio
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cache_backends import CacheBackend, MemoryBackend, RedisBackend, SQLiteBackend  # noqa: E402
+from redis_standin import RedisStandIn  # noqa: E402
+
+
+async def _with_backend(test, username=None, password=None, url_auth=""):
+    standin = RedisStandIn(username=username, password=password)
+    port = await standin.start()
+    backend = RedisBackend(f"redis://{url_auth}127.0.0.1:{port}/0")
+    try:
+        await test(standin, backend)
+    finally:
+        await backend.close()
+        await standin.stop()
+
+
+def test_records_round_trip():
+    async def test(standin, backend):
+        await backend.set("a", {"value": [1, 2]}, ttl=60)
+        assert await backend.get("a") == {"value": [1, 2]}
+        assert await backend.get("missing") is None
+        await backend.delete("a")
+        assert await backend.get("a") is None
+
+    asyncio.run(_with_backend(test))
+
+
+def test_records_expire():
+    async def test(standin, backend):
+        await backend.set("a", {"value": 1}, ttl=0.05)
+        await asyncio.sleep(0.1)
+        assert await backend.get("a") is None
+
+    asyncio.run(_with_backend(test))
+
+
+def test_lock_is_exclusive_and_released_by_owner_only():
+    async def test(standin, backend):
+        assert await backend.acquire_lock("steam", "worker-1", ttl=60)
+        assert not await backend.acquire_lock("steam", "worker-2", ttl=60)
+        await backend.release_lock("steam", "worker-2")  # not the holder: no effect
+        assert not await backend.acquire_lock("steam", "worker-2", ttl=60)
+        await backend.release_lock("steam", "worker-1")
+        assert await backend.acquire_lock("steam", "worker-2", ttl=60)
+
+    asyncio.run(_with_backend(test))
+
+
+def test_cancelled_command_does_not_desync_connection():
+    async def test(standin, backend):
+        await backend.set("a", {"key": "a"}, ttl=60)
+        await backend.set("b", {"key": "b"}, ttl=60)
+        standin.delays[b"gta:a"] = 0.2
+        pending = asyncio.create_task(backend.get("a"))
+        await asyncio.sleep(0.05)  # GET a is written, its reply is held back
+        pending.cancel()
+        await asyncio.gather(pending, return_exceptions=True)
+        standin.delays.clear()
+        assert await backend.get("b") == {"key": "b"}
+        assert standin.connections == 2  # the interrupted connection was dropped
+
+    asyncio.run(_with_backend(test))
+
+
+def test_auth_with_password():
+    async def test(standin, backend):
+        await backend.set("a", {"value": 1}, ttl=60)
+        assert await backend.get("a") == {"value": 1}
+        assert standin.commands[0] == [b"AUTH", b"secret"]
+
+    asyncio.run(_with_backend(test, password="secret", url_auth=":secret@"))
+
+
+def test_auth_with_username_and_password():
+    async def test(standin, backend):
+        await backend.set("a", {"value": 1}, ttl=60)
+        assert await backend.get("a") == {"value": 1}
+        assert standin.commands[0] == [b"AUTH", b"app", b"secret"]
+
+    asyncio.run(_with_backend(test, username="app", password="secret", url_auth="app:secret@"))
+
+
+def test_incomplete_backend_fails_at_construction(tmp_path):
+    class NoLocks(CacheBackend):
+        async def get(self, key):
+            return None
+
+        async def set(self, key, record, ttl):
+            pass
+
+        async def delete(self, key):
+            pass
+
+    with pytest.raises(TypeError):
+        NoLocks()
+    MemoryBackend()
+    SQLiteBackend(str(tmp_path / "cache.db"))
+    RedisBackend("redis://127.0.0.1:6379/0")
@@ -0,0 +1,60 @@
+# tests/test_checkpoint_restore.py
+"""TTLs of snapshots restored from a checkpoint."""
+import os
+import sys
+import time
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cache import SnapshotCache  # noqa: E402
+from checkpoint import CheckpointStore  # noqa: E402
+
+HOUR = 3600
+
+
+def _iso(epoch):
+    return datetime.fromtimestamp(epoch, timezone.utc).isoformat()
+
+
+def test_restored_free_games_expire_at_promotion_end(tmp_path, monkeypatch):
+    now = time.time()
+    fetched_at = now - HOUR
+    promotion_end = now + 2 * HOUR
+    rows = [
+        {
+            "id": "some-game",
+            "name": "Some Game",
+            "isFreeNow": True,
+            "promotionDetails": {"startDate": _iso(now - 24 * HOUR), "endDate": _iso(promotion_end)},
+        }
+    ]
+    key = SnapshotCache.make_key("epic_free_games", "US", "en-US")
+    path = str(tmp_path / "snapshots.ckpt")
+    CheckpointStore(path)._write([(key, "epic_free_games", "US", "en-US", fetched_at, rows)])
+    monkeypatch.setenv("CHECKPOINT_PATH", path)
+    monkeypatch.setenv("EPIC_PROMOTION_SAFETY_TTL_SECONDS", str(6 * HOUR))
+
+    from app import GameAnalyticsApp
+
+    app = GameAnalyticsApp()
+    entry = app.cache.get(key)
+    assert entry is not None and not entry["stale"]
+    assert abs(entry["expires_at"] - promotion_end) < 5
+    assert abs(app.dataset_status[key]["freshUntil"] - promotion_end) < 5
+
+
+def test_restored_free_games_keep_safety_ttl_from_fetch(tmp_path, monkeypatch):
+    now = time.time()
+    fetched_at = now - 5 * HOUR
+    rows = [{"id": "some-game", "name": "Some Game", "isFreeNow": False}]
+    key = SnapshotCache.make_key("epic_free_games", "US", "en-US")
+    path = str(tmp_path / "snapshots.ckpt")
+    CheckpointStore(path)._write([(key, "epic_free_games", "US", "en-US", fetched_at, rows)])
+    monkeypatch.setenv("CHECKPOINT_PATH", path)
+    monkeypatch.setenv("EPIC_PROMOTION_SAFETY_TTL_SECONDS", str(6 * HOUR))
+
+    from app import GameAnalyticsApp
+
+    app = GameAnalyticsApp()
+    assert abs(app.dataset_status[key]["freshUntil"] - (now + HOUR)) < 5
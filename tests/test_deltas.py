@@ -0,0 +1,43 @@
+# tests/test_deltas.py
+"""Delta cursors of SnapshotHistory."""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from deltas import SnapshotHistory  # noqa: E402
+
+OLD = [{"id": "1", "rank": 1, "price": "$10"}, {"id": "2", "rank": 2, "price": "$5"}]
+NEW = [{"id": "2", "rank": 1, "price": "$5"}, {"id": "1", "rank": 2, "price": "$8"}]
+KEY = "steam_top_sellers:US:en"
+
+
+def _changes(history, since, rows):
+    return history.changes_since(KEY, since, rows, history.record(KEY, rows))
+
+
+def test_cursor_from_another_worker_yields_delta():
+    worker_a, worker_b = SnapshotHistory(), SnapshotHistory()
+    worker_b.record(KEY, [{"id": "0", "rank": 1}])  # B's version numbers differ
+    cursor = _changes(worker_a, None, OLD)["cursor"]
+    _changes(worker_b, None, OLD)
+    delta = _changes(worker_b, cursor, NEW)
+    assert delta["status"] == "delta"
+    assert delta["counts"]["changed"] == 2
+    assert delta["cursor"] == _changes(worker_a, cursor, NEW)["cursor"]
+
+
+def test_not_modified_and_unknown_cursor():
+    history = SnapshotHistory()
+    cursor = _changes(history, None, OLD)["cursor"]
+    assert _changes(history, cursor, OLD)["status"] == "not_modified"
+    full = _changes(SnapshotHistory(), cursor, NEW)
+    assert full["status"] == "full"
+    assert full["reason"] == "cursor unknown or expired"
+
+
+def test_content_seen_again_is_not_modified():
+    history = SnapshotHistory()
+    cursor = _changes(history, None, OLD)["cursor"]
+    _changes(history, cursor, NEW)
+    assert _changes(history, cursor, OLD)["status"] == "not_modified"
@@ -0,0 +1,34 @@
+# tests/test_epic_catalog.py
+"""Price fields parsed from Epic catalog search results."""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import EpicGamesService  # noqa: E402
+
+SPEC = {"locale": "en-US", "cc": "US"}
+
+
+def _parse(total_price):
+    element = {"title": "Game", "productSlug": "game", "price": {"totalPrice": total_price}}
+    data = {"data": {"Catalog": {"searchStore": {"elements": [element]}}}}
+    (game,) = EpicGamesService()._parse_catalog_trending(data, SPEC, 10)
+    return game["price"], game["discount"]
+
+
+def test_discounted_price():
+    assert _parse(
+        {"originalPrice": 2000, "discountPrice": 1000, "fmtPrice": {"discountPrice": "$10.00"}}
+    ) == ("$10.00", 50)
+
+
+def test_free_game():
+    assert _parse({"originalPrice": 1999, "discountPrice": 0}) == ("Free", 100)
+    assert _parse({"originalPrice": 0, "discountPrice": 0}) == ("Free", 0)
+
+
+def test_missing_discount_price_is_unknown_not_free():
+    assert _parse({"originalPrice": 2000}) == ("N/A", 0)
+    assert _parse({"discountPrice": 0}) == ("N/A", 0)
+    assert _parse({}) == ("N/A", 0)
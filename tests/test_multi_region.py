@@ -0,0 +1,40 @@
+# tests/test_multi_region.py
+"""Shared metadata in get_multi_region_data responses."""
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+ROWS = {
+    "US": {"name": "Cyberpunk 2077", "tags": ["Open World"], "releaseDate": "Dec 9, 2020"},
+    "DE": {"name": "Cyberpunk 2077", "tags": ["Offene Spielwelt"], "releaseDate": "9. Dez. 2020"},
+}
+
+
+def test_localized_fields_stay_per_region():
+    from app import GameAnalyticsApp
+
+    async def run():
+        app = GameAnalyticsApp()
+
+        async def load(dataset, region=None, locale=None, refresh=False):
+            row = {"id": "1091500", "developer": "CD PROJEKT RED", "price": "$59.99", **ROWS[region]}
+            return {
+                "value": [row],
+                "region": region,
+                "locale": locale,
+                "cached": True,
+                "age": 0.0,
+                "stale": False,
+                "version": 1,
+            }
+
+        app._load_dataset = load
+        result = await app.get_multi_region_data("steam_top_sellers", ["US", "DE"])
+        assert result["sharedMetadata"] == {"1091500": {"developer": "CD PROJEKT RED"}}
+        for region, localized in ROWS.items():
+            (row,) = result["regions"][region]["data"]
+            assert {field: row[field] for field in localized} == localized
+
+    asyncio.run(run())
@@ -0,0 +1,44 @@
+# tests/test_quotas.py
+"""Client identification for quotas."""
+import os
+import sys
+from types import SimpleNamespace
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from quotas import client_id_from_request, parse_client_tokens  # noqa: E402
+
+TOKENS = parse_client_tokens("s3cret=team-a, b64/token==team-b")
+
+
+def _request(headers, host="10.0.0.1"):
+    return SimpleNamespace(headers=headers, client=SimpleNamespace(host=host))
+
+
+def test_configured_token_names_its_client():
+    assert client_id_from_request(_request({"authorization": "Bearer s3cret"}), TOKENS) == "team-a"
+    assert client_id_from_request(_request({"authorization": "Bearer b64/token="}), TOKENS) == "team-b"
+    assert (
+        client_id_from_request(_request({"authorization": "Bearer s3cret"}, host="10.0.0.2"), TOKENS)
+        == "team-a"
+    )
+
+
+def test_unverified_credentials_fall_back_to_peer_address():
+    for headers in (
+        {},
+        {"authorization": "Bearer made-up"},
+        {"x-client-id": "team-a"},
+        {"authorization": "Bearer s3cret"},  # no token map configured
+    ):
+        tokens = TOKENS if headers.get("authorization") != "Bearer s3cret" else None
+        assert client_id_from_request(_request(headers), tokens) == "ip:10.0.0.1"
+    assert client_id_from_request(None, TOKENS) == "local"
+
+
+def test_client_names_cannot_pose_as_other_ids():
+    for spec in ("t=ip:10.0.0.9", "t=internal", "t=bad name"):
+        with pytest.raises(ValueError):
+            parse_client_tokens(spec)
@@ -0,0 +1,21 @@
+# tests/test_server_startup.py
+"""Lazy app construction at server startup."""
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def test_lifespan_does_not_build_app_without_warm_up(monkeypatch):
+    import server
+
+    monkeypatch.delenv("WARMUP_ON_START", raising=False)
+    monkeypatch.setattr(server, "_app_instance", None)
+
+    async def run():
+        async with server._lifespan(server.mcp):
+            await asyncio.sleep(1.0)
+            assert server._app_instance is None
+
+    asyncio.run(run())
@@ -0,0 +1,92 @@
+# tests/test_subscriptions.py
+"""Coalesced update delivery of ResourceSubscriptionHub."""
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from subscriptions import ResourceSubscriptionHub  # noqa: E402
+
+
+class SlowSession:
+    def __init__(self, delay: float):
+        self.delay = delay
+        self.sent = []
+
+    async def send_resource_updated(self, uri):
+        await asyncio.sleep(self.delay)
+        self.sent.append(uri)
+
+
+def test_burst_is_coalesced():
+    async def run():
+        hub = ResourceSubscriptionHub(coalesce_window=0.02)
+        session = SlowSession(0)
+        hub.subscribe("games://steam/trending", session)
+        for _ in range(5):
+            hub.mark_changed("games://steam/trending")
+        await asyncio.sleep(0.1)
+        assert session.sent == ["games://steam/trending"]
+        assert hub.changes_coalesced == 4
+
+    asyncio.run(run())
+
+
+def test_change_marked_during_flush_is_sent():
+    async def run():
+        hub = ResourceSubscriptionHub(coalesce_window=0.01)
+        session = SlowSession(0.05)
+        hub.subscribe("games://steam/trending", session)
+        hub.mark_changed("games://steam/trending")
+        await asyncio.sleep(0.03)  # the flush is now sending
+        hub.mark_changed("games://steam/trending")
+        await asyncio.sleep(0.2)
+        assert session.sent == ["games://steam/trending"] * 2
+        assert hub.stats()["pending"] == []
+
+    asyncio.run(run())
+
+
+def test_listen_streams_are_published_to():
+    async def run():
+        hub = ResourceSubscriptionHub(coalesce_window=0.01)
+        published = []
+
+        async def publish(uri):
+            published.append(uri)
+
+        hub.publish = publish
+        hub.add_listener(["games://epic/free-games"])
+        assert hub.subscribed_uris() == ["games://epic/free-games"]
+        hub.mark_changed("games://epic/free-games")
+        hub.mark_changed("games://steam/trending")  # nobody listens
+        await asyncio.sleep(0.05)
+        assert published == ["games://epic/free-games"]
+        hub.remove_listener(["games://epic/free-games"])
+        assert hub.subscribed_uris() == []
+
+    asyncio.run(run())
+
+
+def test_failing_publish_does_not_drop_other_updates():
+    async def run():
+        hub = ResourceSubscriptionHub(coalesce_window=0.01)
+        published = []
+
+        async def publish(uri):
+            if uri == "games://steam/trending":
+                raise RuntimeError("bus closed")
+            published.append(uri)
+
+        hub.publish = publish
+        session = SlowSession(0)
+        hub.add_listener(["games://steam/trending", "games://epic/free-games"])
+        hub.subscribe("games://steam/trending", session)
+        hub.mark_changed("games://steam/trending")
+        hub.mark_changed("games://epic/free-games")
+        await asyncio.sleep(0.05)
+        assert published == ["games://epic/free-games"]
+        assert session.sent == ["games://steam/trending"]
+
+    asyncio.run(run())
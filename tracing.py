@@ -0,0 +1,321 @@
+# tracing.py
+"""
+Lightweight span tracing: tool call -> app method -> source -> fetch/parse.
+
+Spans follow the OpenTelemetry data model (trace/span ids, parent ids,
+attributes, status) and are exported as OTLP/JSON:
+
+- TRACING_FILE=path                      one ExportTraceServiceRequest JSON
+                                         document per line (batched)
+- OTEL_EXPORTER_OTLP_ENDPOINT=http://localhost:4318
+                                         POSTed to <endpoint>/v1/traces, e.g.
+                                         to a local OpenTelemetry Collector
+
+With neither set tracing is off and span() costs one attribute check.
+Parent/child links use a contextvar, so spans opened inside coroutines that
+asyncio.gather() runs concurrently still attach to the span that started
+them. Export happens on a background thread and never blocks the loop.
+"""
+import atexit
+import functools
+import inspect
+import json
+import os
+import queue
+import secrets
+import threading
+import time
+import urllib.request
+from contextlib import aclosing
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+SERVICE_NAME = "gaming-trend-analytics"
+SCOPE_NAME = "gaming-trend-analytics.tracing"
+
+STATUS_UNSET, STATUS_OK, STATUS_ERROR = 0, 1, 2
+SPAN_KIND_INTERNAL, SPAN_KIND_SERVER, SPAN_KIND_CLIENT = 1, 2, 3
+
+_current_span: ContextVar[Optional["Span"]] = ContextVar("current_span", default=None)
+
+
+def _otlp_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    if isinstance(value, (list, tuple)):
+        return {"arrayValue": {"values": [_otlp_value(v) for v in value]}}
+    return {"stringValue": str(value)}
+
+
+def _otlp_attributes(attributes: Dict[str, Any]) -> List[Dict[str, Any]]:
+    return [
+        {"key": key, "value": _otlp_value(value)}
+        for key, value in attributes.items()
+        if value is not None
+    ]
+
+
+class Span:
+    def __init__(
+        self,
+        tracer: "Tracer",
+        name: str,
+        parent: Optional["Span"],
+        kind: int,
+        attributes: Dict[str, Any],
+    ):
+        self.tracer = tracer
+        self.name = name
+        self.kind = kind
+        self.trace_id = parent.trace_id if parent else secrets.token_hex(16)
+        self.span_id = secrets.token_hex(8)
+        self.parent_span_id = parent.span_id if parent else None
+        self.attributes = dict(attributes)
+        self.events: List[Dict[str, Any]] = []
+        self.status = STATUS_UNSET
+        self.status_message = ""
+        self.start_ns = 0
+        self.end_ns = 0
+        self._token = None
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def set_attributes(self, attributes: Dict[str, Any]) -> None:
+        self.attributes.update(attributes)
+
+    def record_exception(self, exc: BaseException) -> None:
+        self.events.append(
+            {
+                "timeUnixNano": str(time.time_ns()),
+                "name": "exception",
+                "attributes": _otlp_attributes(
+                    {"exception.type": type(exc).__name__, "exception.message": str(exc)}
+                ),
+            }
+        )
+        self.status = STATUS_ERROR
+        self.status_message = str(exc)
+
+    def __enter__(self) -> "Span":
+        self.start_ns = time.time_ns()
+        self._token = _current_span.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        self.end_ns = time.time_ns()
+        _current_span.reset(self._token)
+        # GeneratorExit is a consumer closing a traced generator early, not a failure.
+        if exc is not None and not isinstance(exc, GeneratorExit):
+            self.record_exception(exc)
+        self.tracer._finish(self)
+        return False
+
+    def to_otlp(self) -> Dict[str, Any]:
+        span = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": self.kind,
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns),
+            "attributes": _otlp_attributes(self.attributes),
+            "status": {"code": self.status, "message": self.status_message}
+            if self.status_message
+            else {"code": self.status},
+        }
+        if self.parent_span_id:
+            span["parentSpanId"] = self.parent_span_id
+        if self.events:
+            span["events"] = self.events
+        return span
+
+
+class _NoopSpan:
+    def set_attribute(self, key: str, value: Any) -> None:
+        pass
+
+    def set_attributes(self, attributes: Dict[str, Any]) -> None:
+        pass
+
+    def record_exception(self, exc: BaseException) -> None:
+        pass
+
+    def __enter__(self) -> "_NoopSpan":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        return False
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+class Tracer:
+    def __init__(
+        self,
+        file_path: Optional[str] = None,
+        otlp_endpoint: Optional[str] = None,
+        batch_size: int = 256,
+        flush_interval: float = 2.0,
+    ):
+        self.file_path = file_path
+        self.otlp_endpoint = otlp_endpoint.rstrip("/") if otlp_endpoint else None
+        self.enabled = bool(file_path or otlp_endpoint)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.exported = 0
+        self.export_errors = 0
+        self._queue: "queue.Queue[Span]" = queue.Queue(maxsize=10000)
+        self.dropped = 0
+        self._worker: Optional[threading.Thread] = None
+        if self.enabled:
+            self._worker = threading.Thread(target=self._export_loop, name="span-exporter", daemon=True)
+            self._worker.start()
+
+    def span(self, name: str, kind: int = SPAN_KIND_INTERNAL, **attributes: Any):
+        if not self.enabled:
+            return _NOOP_SPAN
+        return Span(self, name, _current_span.get(), kind, attributes)
+
+    def current_span(self):
+        return _current_span.get() or _NOOP_SPAN
+
+    def _finish(self, span: Span) -> None:
+        try:
+            self._queue.put_nowait(span)
+        except queue.Full:
+            self.dropped += 1
+
+    # --- export (background thread) ---
+
+    def _export_loop(self) -> None:
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            self._export(batch)
+
+    def _request_body(self, spans: List[Span]) -> Dict[str, Any]:
+        return {
+            "resourceSpans": [
+                {
+                    "resource": {
+                        "attributes": _otlp_attributes(
+                            {"service.name": SERVICE_NAME, "process.pid": os.getpid()}
+                        )
+                    },
+                    "scopeSpans": [
+                        {"scope": {"name": SCOPE_NAME}, "spans": [s.to_otlp() for s in spans]}
+                    ],
+                }
+            ]
+        }
+
+    def _export(self, spans: List[Span]) -> None:
+        body = json.dumps(self._request_body(spans), separators=(",", ":"))
+        try:
+            if self.file_path:
+                with open(self.file_path, "a", encoding="utf-8") as f:
+                    f.write(body + "\n")
+            if self.otlp_endpoint:
+                request = urllib.request.Request(
+                    f"{self.otlp_endpoint}/v1/traces",
+                    data=body.encode(),
+                    headers={"Content-Type": "application/json"},
+                    method="POST",
+                )
+                with urllib.request.urlopen(request, timeout=5):
+                    pass
+            self.exported += len(spans)
+        except Exception as e:
+            self.export_errors += 1
+            print(f"[{datetime.now()}] Tracer: export of {len(spans)} span(s) failed: {e}")
+
+    def flush(self) -> None:
+        """Exports whatever is still queued (called at interpreter exit)."""
+        spans = []
+        while True:
+            try:
+                spans.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        if spans:
+            self._export(spans)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "file": self.file_path,
+            "otlpEndpoint": self.otlp_endpoint,
+            "exported": self.exported,
+            "queued": self._queue.qsize(),
+            "dropped": self.dropped,
+            "exportErrors": self.export_errors,
+        }
+
+
+TRACER = Tracer(
+    file_path=os.getenv("TRACING_FILE"),
+    otlp_endpoint=os.getenv("OTEL_EXPORTER_OTLP_ENDPOINT"),
+)
+if TRACER.enabled:
+    atexit.register(TRACER.flush)
+
+
+def traced(name: str, rows_attribute: bool = True, **attributes: Any) -> Callable:
+    """
+    Decorator for coroutine functions: runs each call in a span. When the
+    result is a list its length is recorded as "rows" (rows parsed/returned).
+    Async generator functions get a span from first pull to close, with the
+    number of records yielded as "rows".
+    """
+
+    def decorator(fn: Callable) -> Callable:
+        if inspect.isasyncgenfunction(fn):
+
+            @functools.wraps(fn)
+            async def generator_wrapper(*args, **kwargs):
+                if not TRACER.enabled:
+                    async with aclosing(fn(*args, **kwargs)) as records:
+                        async for record in records:
+                            yield record
+                    return
+                with TRACER.span(name, **attributes) as span:
+                    rows = 0
+                    try:
+                        async with aclosing(fn(*args, **kwargs)) as records:
+                            async for record in records:
+                                rows += 1
+                                yield record
+                    finally:
+                        if rows_attribute:
+                            span.set_attribute("rows", rows)
+
+            return generator_wrapper
+
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs):
+            if not TRACER.enabled:
+                return await fn(*args, **kwargs)
+            with TRACER.span(name, **attributes) as span:
+                result = await fn(*args, **kwargs)
+                if rows_attribute and isinstance(result, list):
+                    span.set_attribute("rows", len(result))
+                return result
+
+        return wrapper
+
+    return decorator
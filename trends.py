@@ -0,0 +1,269 @@
+# trends.py
+"""
+Momentum scoring over retained player-count and rank observations.
+
+Every fresh fetch of a tracked dataset appends one observation (a column
+per game) to a fixed-capacity ring buffer for its metric/region:
+
+- players:<region>  SteamCharts current players (steam_most_played)
+- rank:<region>     top-seller rank (steam_top_sellers)
+
+Scoring works on the whole (snapshots x games) matrix at once with NumPy:
+
+- velocityPerHour  change since `lookback` snapshots ago, per hour; for
+                   ranks, places climbed per hour (games entering the
+                   list count as coming from just below the last rank)
+- growth           latest vs. the mean of the previous `window`
+                   snapshots (relative; for ranks, relative improvement)
+- zScore           the same difference in units of that baseline's std
+- momentum         weighted sum of the three signals after standardizing
+                   each across all scored games
+
+NumPy is imported on first use so it does not add to startup time.
+"""
+import time
+import warnings
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from startup import STARTUP
+
+# dataset -> (metric, row field)
+TRACKED_DATASETS = {
+    "steam_most_played": ("players", "currentPlayers"),
+    "steam_top_sellers": ("rank", "rank"),
+}
+DEFAULT_WEIGHTS = {"velocity": 0.4, "growth": 0.3, "zScore": 0.3}
+MIN_OBSERVATION_INTERVAL = 1.0  # seconds; re-reads of the same snapshot are skipped
+Z_SCORE_CLIP = 10.0
+
+_np = None
+
+
+def _numpy():
+    global _np
+    if _np is None:
+        with STARTUP.phase("import numpy (first trend observation)"):
+            import numpy
+        _np = numpy
+    return _np
+
+
+class MetricSeries:
+    """Ring buffer of observations: rows are snapshots, columns are games."""
+
+    def __init__(self, capacity: int, lower_is_better: bool = False, initial_games: int = 256):
+        np = _numpy()
+        self.capacity = capacity
+        self.lower_is_better = lower_is_better
+        self.timestamps = np.full(capacity, np.nan)
+        self.values = np.full((capacity, initial_games), np.nan, dtype=np.float32)
+        self.columns: Dict[str, int] = {}
+        self.names: List[Optional[str]] = []
+        self.observations = 0
+
+    def _column(self, game_id: str, name: Optional[str]) -> int:
+        column = self.columns.get(game_id)
+        if column is None:
+            column = self.columns[game_id] = len(self.names)
+            self.names.append(name)
+            if column >= self.values.shape[1]:
+                np = _numpy()
+                grown = np.full(
+                    (self.capacity, self.values.shape[1] * 2), np.nan, dtype=np.float32
+                )
+                grown[:, : self.values.shape[1]] = self.values
+                self.values = grown
+        elif name:
+            self.names[column] = name
+        return column
+
+    @property
+    def last_timestamp(self) -> Optional[float]:
+        if not self.observations:
+            return None
+        return float(self.timestamps[(self.observations - 1) % self.capacity])
+
+    def add(self, timestamp: float, values: Dict[str, float], names: Dict[str, str]) -> None:
+        np = _numpy()
+        columns = np.fromiter(
+            (self._column(game_id, names.get(game_id)) for game_id in values),
+            dtype=np.int64,
+            count=len(values),
+        )
+        row = self.observations % self.capacity
+        self.values[row, :] = np.nan
+        self.values[row, columns] = np.fromiter(values.values(), dtype=np.float32, count=len(values))
+        self.timestamps[row] = timestamp
+        self.observations += 1
+
+    def ordered(self):
+        """(timestamps, values) for retained snapshots, oldest first, trimmed to known games."""
+        np = _numpy()
+        retained = min(self.observations, self.capacity)
+        order = (np.arange(retained) + self.observations - retained) % self.capacity
+        return self.timestamps[order], self.values[order, : len(self.names)]
+
+
+def _standardize(np, signal):
+    std = np.nanstd(signal)
+    if not np.isfinite(std) or std == 0:
+        return np.zeros_like(signal)
+    return np.nan_to_num((signal - np.nanmean(signal)) / std)
+
+
+def score_matrix(
+    timestamps,
+    values,
+    lower_is_better: bool = False,
+    window: int = 12,
+    lookback: int = 1,
+    weights: Optional[Dict[str, float]] = None,
+) -> Dict[str, Any]:
+    """
+    Scores every column of a (snapshots x games) matrix; NaN means the game
+    was absent from that snapshot. Returns per-game signal arrays.
+    """
+    np = _numpy()
+    weights = weights or DEFAULT_WEIGHTS
+    values = values.astype(np.float64)
+    present = ~np.isnan(values[-1])
+    observed = np.sum(~np.isnan(values), axis=0)
+    if lower_is_better:
+        # Absent from the list = just below its last place.
+        floor = np.nanmax(values, axis=1, keepdims=True) + 1
+        values = np.where(np.isnan(values), np.nan_to_num(floor, nan=1.0), values)
+        # Flip so that "higher is better" holds for every signal below.
+        values = -values
+    latest = values[-1]
+    lookback = max(1, min(lookback, len(values) - 1))
+    previous = values[-1 - lookback]
+    hours = max((timestamps[-1] - timestamps[-1 - lookback]) / 3600, 1e-9)
+    history = values[max(0, len(values) - 1 - window) : -1]
+
+    with warnings.catch_warnings(), np.errstate(divide="ignore", invalid="ignore"):
+        warnings.simplefilter("ignore", RuntimeWarning)
+        baseline = np.nanmean(history, axis=0)
+        spread = np.nanstd(history, axis=0)
+        velocity = (latest - previous) / hours
+        growth = (latest - baseline) / np.abs(baseline)
+        z_score = np.clip((latest - baseline) / spread, -Z_SCORE_CLIP, Z_SCORE_CLIP)
+        z_score = np.where(spread > 0, z_score, 0.0)
+
+    eligible = present & ~np.isnan(baseline)
+    momentum = np.full(latest.shape, np.nan)
+    if eligible.any():
+        momentum[eligible] = (
+            weights.get("velocity", 0) * _standardize(np, velocity[eligible])
+            + weights.get("growth", 0) * _standardize(np, growth[eligible])
+            + weights.get("zScore", 0) * _standardize(np, z_score[eligible])
+        )
+    sign = -1 if lower_is_better else 1
+    return {
+        "latest": sign * latest,
+        "baseline": sign * baseline,
+        "velocityPerHour": velocity,
+        "growth": growth,
+        "zScore": z_score,
+        "momentum": momentum,
+        "observations": observed,
+    }
+
+
+def top_indices(np, scores, limit: int):
+    """Indices of the `limit` highest non-NaN scores, best first."""
+    candidates = np.flatnonzero(~np.isnan(scores))
+    if len(candidates) > limit:
+        candidates = candidates[np.argpartition(-scores[candidates], limit - 1)[:limit]]
+    return candidates[np.argsort(-scores[candidates], kind="stable")]
+
+
+def _round(value: float, digits: int = 3) -> Optional[float]:
+    return round(float(value), digits) if value == value else None  # NaN -> None
+
+
+class TrendEngine:
+    def __init__(self, capacity: int = 288):
+        self.capacity = capacity
+        self.series: Dict[str, MetricSeries] = {}
+
+    def observe(
+        self,
+        dataset: str,
+        region: str,
+        rows: List[Dict[str, Any]],
+        fetched_at: Optional[float] = None,
+    ) -> bool:
+        """Records one snapshot of a tracked dataset; False if it was skipped."""
+        if dataset not in TRACKED_DATASETS or not rows:
+            return False
+        metric, field = TRACKED_DATASETS[dataset]
+        fetched_at = fetched_at or time.time()
+        key = f"{metric}:{region}"
+        series = self.series.get(key)
+        if series is None:
+            series = self.series[key] = MetricSeries(self.capacity, lower_is_better=metric == "rank")
+        last = series.last_timestamp
+        if last is not None and fetched_at - last < MIN_OBSERVATION_INTERVAL:
+            return False
+        values, names = {}, {}
+        for row in rows:
+            value = row.get(field)
+            if row.get("id") and isinstance(value, (int, float)) and not isinstance(value, bool):
+                values[str(row["id"])] = value
+                names[str(row["id"])] = row.get("name")
+        if not values:
+            return False
+        series.add(fetched_at, values, names)
+        return True
+
+    def top_movers(
+        self,
+        metric: str,
+        region: str,
+        limit: int = 20,
+        window: int = 12,
+        lookback: int = 1,
+        weights: Optional[Dict[str, float]] = None,
+    ) -> Dict[str, Any]:
+        np = _numpy()
+        series = self.series.get(f"{metric}:{region}")
+        retained = min(series.observations, series.capacity) if series else 0
+        if retained < 2:
+            return {"snapshots": retained, "games": len(series.names) if series else 0, "movers": []}
+        started = time.perf_counter()
+        timestamps, values = series.ordered()
+        scores = score_matrix(timestamps, values, series.lower_is_better, window, lookback, weights)
+        best = top_indices(np, scores["momentum"], max(1, limit))
+        ids = list(series.columns)
+        movers = [
+            {
+                "id": ids[i],
+                "name": series.names[i],
+                "latest": _round(scores["latest"][i], 1),
+                "baseline": _round(scores["baseline"][i], 1),
+                "velocityPerHour": _round(scores["velocityPerHour"][i]),
+                "growth": _round(scores["growth"][i]),
+                "zScore": _round(scores["zScore"][i]),
+                "momentum": _round(scores["momentum"][i]),
+                "observations": int(scores["observations"][i]),
+            }
+            for i in best
+        ]
+        return {
+            "snapshots": retained,
+            "games": values.shape[1],
+            "firstSnapshot": datetime.fromtimestamp(float(timestamps[0])).isoformat(),
+            "lastSnapshot": datetime.fromtimestamp(float(timestamps[-1])).isoformat(),
+            "scoringMs": round((time.perf_counter() - started) * 1000, 2),
+            "movers": movers,
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            key: {
+                "snapshots": min(series.observations, series.capacity),
+                "games": len(series.names),
+            }
+            for key, series in self.series.items()
+        }